@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Synthetic YouTube API cassette generator.
+
+Writes a cassette (see services/youtube_cassette.py) with channels.list, search.list,
+playlistItems.list, videos.list and commentThreads.list responses for N fake channels, shaped exactly like
+the requests made by youtube_analytics and youtube_comments.
+
+Usage:
+    python -m benchmarks.synthetic_cassette --channels 100 --output cassettes/synthetic_100.json
+"""
+
+import argparse
+import random
+import string
+from datetime import datetime, timedelta, timezone
+
+from services.youtube_cassette import Cassette
+
+SEARCH_PAGE_SIZES = (10, 20, 50)  # maxResults values used by the pipelines being benchmarked
+UPLOAD_PAGE_SIZES = (10, 50)  # get_latest_videos_detailed(max_results=10), and with exclude_shorts
+COMMENT_PAGE_SIZE = 100  # youtube_comments.COMMENT_SYNC_PAGE_SIZE
+
+def _random_id(rng, length):
+    return "".join(rng.choice(string.ascii_letters + string.digits + "-_") for _ in range(length))
+
+def _timestamp(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _thumbnails(url):
+    return {size: {"url": f"{url}/{size}.jpg"} for size in ("default", "medium", "high")}
+
+def _video_item(rng, channel_id, channel_title, video_id, published_at, view_scale):
+    # Long-tailed view counts with the occasional breakout video
+    views = int(view_scale * rng.lognormvariate(0, 0.6) * (8 if rng.random() < 0.03 else 1))
+    likes = int(views * rng.uniform(0.01, 0.06))
+    return {
+        "id": video_id,
+        "snippet": {
+            "title": f"Synthetic video {video_id}",
+            "description": "Synthetic benchmark video. " * rng.randint(1, 40),
+            "publishedAt": _timestamp(published_at),
+            "channelId": channel_id,
+            "channelTitle": channel_title,
+            "thumbnails": _thumbnails(f"https://i.ytimg.com/vi/{video_id}"),
+            "tags": [f"tag{rng.randint(1, 50)}" for _ in range(rng.randint(0, 12))],
+            "categoryId": rng.choice(["22", "24", "27", "28"])
+        },
+        "contentDetails": {
+            "duration": rng.choice(["PT45S", f"PT{rng.randint(2, 30)}M{rng.randint(0, 59)}S"])
+        },
+        "statistics": {
+            "viewCount": str(views),
+            "likeCount": str(likes),
+            "commentCount": str(int(likes * rng.uniform(0.02, 0.2)))
+        }
+    }
+
+def _comment_thread(rng, video_id, published_at):
+    comment_id = _random_id(rng, 26)
+    return {
+        "id": comment_id,
+        "snippet": {
+            "videoId": video_id,
+            "canReply": True,
+            "totalReplyCount": 0,
+            "topLevelComment": {
+                "id": comment_id,
+                "snippet": {
+                    "textDisplay": rng.choice(["Great video!", "This didn't work for me.", "Can you cover more of this?", "Thanks, very helpful"]),
+                    "authorDisplayName": f"viewer{rng.randint(1, 10000)}",
+                    "likeCount": rng.randint(0, 200),
+                    "publishedAt": _timestamp(published_at)
+                }
+            }
+        }
+    }
+
+def channel_urls(channel_ids):
+    return [f"https://www.youtube.com/channel/{channel_id}" for channel_id in channel_ids]
+
+def generate_cassette(path, channel_count, videos_per_channel=20, comments_per_video=3, days_span=28, seed=0):
+    """
+    Generate a synthetic cassette and return the channel IDs it covers.
+    Videos are spread evenly over the last `days_span` days.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    cassette = Cassette(path, shift_times=False)
+    cassette.interactions = {}
+    cassette.recorded_at = now
+
+    channel_ids = []
+    for index in range(channel_count):
+        channel_id = "UC" + _random_id(rng, 22)
+        channel_title = f"Synthetic Channel {index}"
+        subscriber_count = int(10 ** rng.uniform(3, 7))
+        channel_ids.append(channel_id)
+
+        cassette.record(
+            [("channels", (), {}), ("list", (), {"part": "snippet,statistics,brandingSettings", "id": channel_id})],
+            {"items": [{
+                "id": channel_id,
+                "snippet": {
+                    "title": channel_title,
+                    "description": "Synthetic benchmark channel",
+                    "thumbnails": _thumbnails(f"https://yt3.ggpht.com/{channel_id}"),
+                    "customUrl": f"@synthetic{index}",
+                    "publishedAt": _timestamp(now - timedelta(days=rng.randint(365, 3650)))
+                },
+                "statistics": {
+                    "subscriberCount": str(subscriber_count),
+                    "videoCount": str(videos_per_channel),
+                    "viewCount": str(subscriber_count * 50)
+                },
+                "brandingSettings": {"channel": {"keywords": "synthetic benchmark"}}
+            }]}
+        )
+
+        # Most recent first, as search.list(order="date") returns them
+        step = timedelta(days=days_span) / max(1, videos_per_channel)
+        view_scale = subscriber_count * rng.uniform(0.01, 0.1)
+        videos = []
+        for position in range(videos_per_channel):
+            published_at = now - step * position - timedelta(minutes=rng.randint(0, 600))
+            videos.append(_video_item(rng, channel_id, channel_title, _random_id(rng, 11), published_at, view_scale))
+
+        for page_size in SEARCH_PAGE_SIZES:
+            page = videos[:page_size]
+            cassette.record(
+                [("search", (), {}), ("list", (), {"part": "snippet", "channelId": channel_id, "order": "date", "type": "video", "maxResults": page_size})],
+                {"items": [{"id": {"videoId": video["id"]}, "snippet": {"publishedAt": video["snippet"]["publishedAt"]}} for video in page]}
+            )
+            cassette.record(
+                [("videos", (), {}), ("list", (), {"part": "snippet,statistics,contentDetails", "id": ",".join(video["id"] for video in page)})],
+                {"items": page}
+            )
+
+        for page_size in UPLOAD_PAGE_SIZES:
+            cassette.record(
+                [("playlistItems", (), {}), ("list", (), {"part": "contentDetails", "playlistId": "UU" + channel_id[2:], "maxResults": page_size, "pageToken": None})],
+                {"items": [{"contentDetails": {"videoId": video["id"], "videoPublishedAt": video["snippet"]["publishedAt"]}} for video in videos[:page_size]]}
+            )
+        
+        # Comments for the videos get_latest_videos_detailed(max_results=10) returns
+        for video in videos[:SEARCH_PAGE_SIZES[0]]:
+            published_at = datetime.fromisoformat(video["snippet"]["publishedAt"].replace("Z", "+00:00"))
+            cassette.record(
+                [("commentThreads", (), {}), ("list", (), {"part": "snippet,replies", "videoId": video["id"], "maxResults": COMMENT_PAGE_SIZE, "order": "time"})],
+                {"items": [_comment_thread(rng, video["id"], published_at + timedelta(hours=hour + 1)) for hour in range(comments_per_video)]}
+            )
+
+    cassette.save()
+    return channel_ids
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic YouTube API cassette")
+    parser.add_argument("--channels", type=int, default=100)
+    parser.add_argument("--videos-per-channel", type=int, default=20)
+    parser.add_argument("--comments-per-video", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="cassettes/synthetic.json")
+    args = parser.parse_args()
+
+    ids = generate_cassette(args.output, args.channels, args.videos_per_channel, args.comments_per_video, seed=args.seed)
+    print(f"Wrote {args.output} with {len(ids)} synthetic channels")
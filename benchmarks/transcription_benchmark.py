@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Transcription backend benchmark.
+
+Extracts speech audio from each input file the same way the pipeline does (mono 16 kHz),
+then transcribes it with every requested backend and reports per file:
+  - wall time and real-time factor (RTF = transcription seconds / audio seconds, lower is faster)
+and per backend:
+  - throughput in audio seconds transcribed per wall-clock second, with --concurrency
+    files in flight at once
+
+The transcription cache is bypassed so every run does the work. The first local run
+includes loading the model; use --warmup to load it before timing.
+
+Usage:
+    python -m benchmarks.transcription_benchmark talk.mp4 interview.mp3
+    python -m benchmarks.transcription_benchmark /app/videos/*.mp4 --backends local --concurrency 2 --json rtf.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # Never connected, the cache is bypassed
+
+from services import youtube_transcription
+
+def _prepare_audio(paths, workdir):
+    """Extract normalized audio for every input once, so only transcription is timed."""
+    prepared = []
+    for index, path in enumerate(paths):
+        output_dir = os.path.join(workdir, str(index))
+        os.makedirs(output_dir)
+        audio_path = youtube_transcription.extract_audio(path, output_dir)
+        prepared.append({
+            "file": os.path.basename(path),
+            "audio_path": audio_path,
+            "audio_seconds": youtube_transcription.get_audio_duration(audio_path)
+        })
+    return prepared
+
+def _transcribe_timed(item, backend):
+    started = time.perf_counter()
+    text, segments = youtube_transcription._transcribe_audio_file(item["audio_path"], backend)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "file": item["file"],
+        "audio_seconds": round(item["audio_seconds"], 2),
+        "seconds": round(elapsed, 2),
+        "rtf": round(elapsed / item["audio_seconds"], 3) if item["audio_seconds"] else None,
+        "segments": len(segments),
+        "characters": len(text)
+    }
+
+def run_benchmark(prepared, backend, concurrency=1):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        files = list(executor.map(lambda item: _transcribe_timed(item, backend), prepared))
+    elapsed = time.perf_counter() - started
+
+    audio_seconds = sum(item["audio_seconds"] for item in prepared)
+    return {
+        "backend": backend,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "audio_seconds": round(audio_seconds, 2),
+        "throughput": round(audio_seconds / elapsed, 2) if elapsed else None,
+        "files": files
+    }
+
+def _print_results(results):
+    print(f"{'backend':<8}  {'file':<40}{'audio s':>10}{'seconds':>10}{'RTF':>8}")
+    for result in results:
+        for item in result["files"]:
+            print(f"{result['backend']:<8}  {item['file'][:38]:<40}{item['audio_seconds']:>10}{item['seconds']:>10}{item['rtf']:>8}")
+    print()
+    print(f"{'backend':<8}  {'concurrency':>11}{'audio s':>10}{'seconds':>10}{'audio s / s':>13}")
+    for result in results:
+        print(f"{result['backend']:<8}  {result['concurrency']:>11}{result['audio_seconds']:>10}{result['seconds']:>10}{result['throughput']:>13}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare transcription backends by real-time factor and throughput")
+    parser.add_argument("files", nargs="+", help="Video or audio files to transcribe")
+    parser.add_argument("--backends", nargs="+", default=list(youtube_transcription.TRANSCRIPTION_BACKENDS), choices=list(youtube_transcription.TRANSCRIPTION_BACKENDS))
+    parser.add_argument("--concurrency", type=int, default=1, help="Files transcribed at the same time per backend")
+    parser.add_argument("--warmup", action="store_true", help="Load the local model before timing")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    backends = []
+    for backend in args.backends:
+        try:
+            backends.append(youtube_transcription.resolve_transcription_backend(backend))
+        except RuntimeError as e:
+            print(f"Skipping {backend}: {e}", file=sys.stderr)
+
+    if args.warmup and "local" in backends:
+        youtube_transcription._get_local_whisper_model()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        prepared = _prepare_audio(args.files, workdir)
+        results = [run_benchmark(prepared, backend, args.concurrency) for backend in backends]
+
+    _print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
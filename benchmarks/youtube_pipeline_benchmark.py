@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the YouTube analytics pipelines.
+
+Generates a synthetic cassette per channel count, replays it (YOUTUBE_API_MODE=replay)
+and reports wall time, API calls (and quota units they would have cost) and peak
+traced memory for:
+  - get_videos_from_multiple_channels
+  - analyze_video_outliers (28-day fetch + outlier classification)
+  - get_latest_videos_detailed (per channel, with comments)
+
+Database persistence is replaced with in-memory no-ops so only the pipeline and the
+API layer are measured.
+
+Usage:
+    python -m benchmarks.youtube_pipeline_benchmark
+    python -m benchmarks.youtube_pipeline_benchmark --channels 10 100 --latency-ms 50 --json results.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+os.environ["YOUTUBE_API_MODE"] = "replay"
+os.environ["YOUTUBE_DAILY_QUOTA"] = str(10 ** 9)  # Quota is counted, never a limit
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # Never connected, persistence is stubbed below
+
+from services import database as db_service
+from services import youtube_cassette
+from services.youtube_quota import quota_manager, oauth_quota_manager
+from benchmarks.synthetic_cassette import generate_cassette, channel_urls
+
+def _disable_persistence():
+    """Replace the database calls made by the pipelines with in-memory no-ops."""
+    replacements = {
+        "get_saved_youtube_channel": lambda *args, **kwargs: None,
+        "get_saved_youtube_channels": lambda *args, **kwargs: [],
+        "get_channel_urls_for_analysis": lambda *args, **kwargs: [],
+        "save_youtube_channel": lambda *args, **kwargs: None,
+        "update_channel_analysis_stats": lambda *args, **kwargs: None,
+        "upsert_channel_videos": lambda channel_id, videos: len(videos),
+        "get_channel_sync_state": lambda *args, **kwargs: None,
+        "get_stored_channel_videos": lambda *args, **kwargs: [],
+        "get_channel_baseline": lambda *args, **kwargs: None,
+        "get_channel_baselines": lambda *args, **kwargs: [],
+        "get_comment_sync_state": lambda *args, **kwargs: None,
+        "get_latest_comment_published_at": lambda *args, **kwargs: None,
+        "upsert_youtube_comments": lambda comments: len(comments),
+        "save_comment_sync_state": lambda *args, **kwargs: None,
+        "get_stored_video_comments": lambda *args, **kwargs: [],
+    }
+    for name, replacement in replacements.items():
+        setattr(db_service, name, replacement)
+
+def _measure(name, function):
+    """Run one pipeline stage and collect time, API call and memory figures."""
+    cassette = youtube_cassette.active_cassette()
+    cassette.reset_counts()
+    quota_before = quota_manager.remaining() + oauth_quota_manager.remaining()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "stage": name,
+        "seconds": round(elapsed, 3),
+        "api_calls": sum(cassette.calls.values()),
+        "calls_by_method": dict(cassette.calls),
+        "quota_units": quota_before - quota_manager.remaining() - oauth_quota_manager.remaining(),
+        "peak_memory_mb": round(peak / (1024 * 1024), 2)
+    }
+
+def run_benchmark(channel_count, latency_ms=0, videos_per_channel=20, workdir=None):
+    from services import youtube_analytics, youtube_comments
+
+    path = os.path.join(workdir, f"synthetic_{channel_count}.json")
+    channel_ids = generate_cassette(path, channel_count, videos_per_channel=videos_per_channel)
+    urls = channel_urls(channel_ids)
+
+    # Load the cassette up front so it isn't counted in the stage memory figures
+    youtube_cassette.configure(mode="replay", path=path, latency_ms=latency_ms)
+
+    stages = [
+        _measure("get_videos_from_multiple_channels", lambda: youtube_analytics.get_videos_from_multiple_channels(
+            channel_urls=urls, days_back=14, max_videos_per_channel=20, save_channels=False, use_saved_channels=False
+        )),
+        _measure("analyze_video_outliers", lambda: youtube_analytics.analyze_video_outliers(
+            channel_urls=urls, use_saved_channels=False
+        )),
+        _measure("get_latest_videos_detailed", lambda: [
+            youtube_comments.get_latest_videos_detailed(channel_id, max_results=10, include_comments=True, comment_limit=20)
+            for channel_id in channel_ids
+        ]),
+    ]
+
+    return {"channels": channel_count, "latency_ms": latency_ms, "stages": stages}
+
+def _print_results(results):
+    print(f"{'channels':>8}  {'stage':<36}{'seconds':>10}{'calls':>9}{'quota':>9}{'peak MB':>10}")
+    for result in results:
+        for stage in result["stages"]:
+            print(f"{result['channels']:>8}  {stage['stage']:<36}{stage['seconds']:>10}{stage['api_calls']:>9}{stage['quota_units']:>9}{stage['peak_memory_mb']:>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the YouTube analytics pipelines against replayed API responses")
+    parser.add_argument("--channels", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--latency-ms", type=float, default=0, help="Artificial latency added to every replayed API call")
+    parser.add_argument("--videos-per-channel", type=int, default=20)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    _disable_persistence()
+
+    # Pipelines print per-channel debug output; keep the report readable
+    stdout = sys.stdout
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for channel_count in args.channels:
+            sys.stdout = open(os.devnull, "w")
+            try:
+                results.append(run_benchmark(channel_count, args.latency_ms, args.videos_per_channel, workdir))
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+    _print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
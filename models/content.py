@@ -12,6 +12,7 @@ class ScrapedData(BaseModel):
     """A Pydantic model to hold the scraped content for a single URL."""
     url: str = Field(..., description="The URL of the scraped page.")
     markdown: str = Field(..., description="The scraped content in Markdown format.")
+    html: Optional[str] = Field(default=None, description="The scraped HTML, only when requested.")
 
 class ContentCreationResult(BaseModel):
     """The final, structured output containing the selected URLs and their content."""
@@ -39,6 +40,8 @@ class ContentCreationResult(BaseModel):
     
 class SearchQuery(BaseModel):
     query: str
+    include_html: bool = False  # Also scrape and return each page's HTML
+    refresh: bool = False  # Refetch search results and pages even if cached copies are fresh
     
 class ContentGenerationRequest(BaseModel):
     query: str
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON, ForeignKey, Date, Time, Index, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON, ForeignKey, Date, Time, Index, Float, Enum, UniqueConstraint, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -278,4 +278,260 @@ class CommentSentimentAnalysis(Base):
         Index('idx_sentiment_overall', 'overall_sentiment'),
         Index('idx_sentiment_score', 'sentiment_score'),
         Index('idx_sentiment_created_at', 'created_at'),
-    ) 
\ No newline at end of file
+    ) 
+
+class MultiChannelAnalysisCache(Base):
+    __tablename__ = "multi_channel_analysis_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Cache identification
+    cache_key = Column(String, nullable=False, unique=True, index=True)  # Hash of normalized request parameters
+    parameters = Column(JSON, nullable=False)  # Request parameters the result was computed for
+    
+    # Cached output
+    result = Column(JSON, nullable=False)  # Combined video data + outlier analysis
+    
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_analysis_cache_updated_at', 'updated_at'),
+    )
+
+class YouTubeQuotaUsage(Base):
+    __tablename__ = "youtube_quota_usage"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Usage bucket
+    key_fingerprint = Column(String, nullable=False)  # Hash prefix of the API key (never the key itself)
+    quota_day = Column(Date, nullable=False)  # Quota day in Pacific time, when YouTube resets quotas
+    units_used = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    # Indexes for performance
+    __table_args__ = (
+        UniqueConstraint('key_fingerprint', 'quota_day', name='uq_youtube_quota_key_day'),
+        Index('idx_youtube_quota_day', 'quota_day'),
+    )
+
+class YouTubeChannelVideo(Base):
+    __tablename__ = "youtube_channel_videos"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Video identification
+    video_id = Column(String, nullable=False, unique=True, index=True)  # YouTube video ID
+    channel_id = Column(String, nullable=False)  # YouTube channel ID
+    
+    # Video metadata
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)  # Truncated the same way as live analysis data
+    published_at = Column(DateTime, nullable=False)  # Publish time (UTC)
+    thumbnail = Column(String, nullable=True)
+    duration = Column(String, nullable=True)  # ISO 8601 duration, e.g. PT4M13S
+    video_url = Column(String, nullable=False)
+    tags = Column(JSON, nullable=True)
+    category_id = Column(String, nullable=True)
+    
+    # Latest statistics snapshot
+    view_count = Column(Integer, default=0, nullable=False)
+    like_count = Column(Integer, default=0, nullable=False)
+    comment_count = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    stats_updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))  # When statistics were last fetched
+    
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_channel_videos_channel_published', 'channel_id', 'published_at'),
+    )
+
+class YouTubeChannelSyncState(Base):
+    __tablename__ = "youtube_channel_sync_state"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    channel_id = Column(String, nullable=False, unique=True, index=True)  # YouTube channel ID
+    synced_at = Column(DateTime, nullable=False)  # When the background refresh last completed
+    covered_from = Column(DateTime, nullable=False)  # Uploads published after this are guaranteed to be stored
+    video_count = Column(Integer, default=0, nullable=False)  # Videos stored inside the refresh window
+
+class VideoPercentileSketch(Base):
+    __tablename__ = "video_percentile_index"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Bucket the sketch summarizes ("all" for the category/band fallback buckets)
+    category_id = Column(String, nullable=False)
+    subscriber_band = Column(String, nullable=False)
+    metric = Column(String, nullable=False)  # views_per_day, engagement_rate or like_ratio
+    
+    # Equi-depth quantile sketch
+    sample_count = Column(Integer, default=0, nullable=False)  # Videos summarized
+    quantiles = Column(JSON, nullable=False)  # Sorted quantile points
+    
+    built_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    # Indexes for performance
+    __table_args__ = (
+        UniqueConstraint('category_id', 'subscriber_band', 'metric', name='uq_video_percentile_bucket'),
+    )
+
+class YouTubeChannelBaseline(Base):
+    __tablename__ = "youtube_channel_baselines"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    channel_id = Column(String, nullable=False, index=True)  # YouTube channel ID
+    analysis_days = Column(Integer, nullable=False)  # Analysis window: days 1-N
+    baseline_days = Column(Integer, nullable=False)  # Baseline window length, directly after the analysis window
+    
+    # Running statistics (Welford count/mean/m2 per metric) and the values each member video contributed
+    stats = Column(JSON, nullable=False)
+    members = Column(JSON, nullable=False)  # {video_id: {metric: value, "published_at": ...}}
+    
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    # Indexes for performance
+    __table_args__ = (
+        UniqueConstraint('channel_id', 'analysis_days', 'baseline_days', name='uq_channel_baseline_window'),
+    )
+
+class YouTubeComment(Base):
+    __tablename__ = "youtube_comments"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Comment identification
+    comment_id = Column(String, nullable=False, unique=True, index=True)  # YouTube comment ID
+    video_id = Column(String, nullable=False)  # YouTube video ID
+    parent_id = Column(String, nullable=True)  # Top-level comment ID for replies, NULL for top-level comments
+    
+    # Comment content
+    author = Column(String, nullable=True)
+    text = Column(Text, nullable=False)  # textDisplay
+    like_count = Column(Integer, default=0, nullable=False)
+    published_at = Column(DateTime, nullable=False)  # Publish time (UTC)
+    edited_at = Column(DateTime, nullable=True)  # YouTube's updatedAt (UTC)
+    
+    # Thread details (top-level comments only)
+    can_reply = Column(Boolean, nullable=True)
+    total_reply_count = Column(Integer, default=0, nullable=False)
+    
+    synced_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))  # When this comment was last fetched
+    
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_youtube_comments_video_published', 'video_id', 'published_at'),
+        Index('idx_youtube_comments_parent', 'parent_id'),
+    )
+
+class YouTubeCommentSyncState(Base):
+    __tablename__ = "youtube_comment_sync_state"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    video_id = Column(String, nullable=False, unique=True, index=True)  # YouTube video ID
+    synced_at = Column(DateTime, nullable=False)  # When the last sync completed
+    comment_count = Column(Integer, default=0, nullable=False)  # Comments and replies stored for the video
+
+class CommentSentimentRefreshState(Base):
+    __tablename__ = "comment_sentiment_refresh_state"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    video_id = Column(String, nullable=False, unique=True, index=True)  # YouTube video ID
+    comment_count = Column(Integer, nullable=True)  # Video comment count the saved analysis was based on
+    analyzed_at = Column(DateTime, nullable=True)  # When the saved analysis ran
+    queued_at = Column(DateTime, nullable=True)  # When a background re-analysis was last queued (cleared once it runs)
+
+class TranscriptionAudioCache(Base):
+    __tablename__ = "transcription_audio_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    audio_hash = Column(String, nullable=False, unique=True, index=True)  # SHA-256 of the normalized (mono 16 kHz PCM) audio
+    transcription = Column(Text, nullable=False)
+    segments = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class TranscriptionVideoAlias(Base):
+    __tablename__ = "transcription_video_aliases"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    alias = Column(String, nullable=False, unique=True, index=True)  # YouTube video ID or local file key
+    audio_hash = Column(String, ForeignKey('transcription_audio_cache.audio_hash'), nullable=False, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class VideoIngestionJob(Base):
+    __tablename__ = "video_ingestion_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    job_id = Column(String, nullable=False, unique=True, index=True, default=lambda: str(uuid.uuid4()))
+    source_type = Column(String, nullable=False)  # youtube or local
+    source = Column(String, nullable=False)  # YouTube video ID or filename in /app/videos
+    channel_id = Column(String, nullable=True)
+    describe = Column(Boolean, default=True, nullable=False)  # Generate a description after transcribing
+    
+    # Progress
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    current_stage = Column(String, nullable=True)  # Stage running or last attempted
+    completed_stages = Column(JSON, nullable=False, default=list)
+    error = Column(Text, nullable=True)
+    
+    # Stage outputs, persisted so a failed job resumes from the last completed stage
+    workspace_path = Column(String, nullable=True)
+    media_path = Column(String, nullable=True)
+    audio_path = Column(String, nullable=True)
+    transcription = Column(Text, nullable=True)
+    segments = Column(JSON, nullable=True)
+    description = Column(JSON, nullable=True)  # {"description": ..., "chapters": [...]}
+    youtube_transcription_id = Column(Integer, nullable=True)
+    youtube_description_id = Column(Integer, nullable=True)
+    
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        Index('idx_video_ingestion_jobs_source', 'source_type', 'source'),
+    )
+
+class TranscriptionSegmentIndex(Base):
+    __tablename__ = "transcription_segment_index"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    youtube_transcription_id = Column(Integer, ForeignKey('youtube_transcriptions.id'), nullable=False, unique=True, index=True)
+    segment_count = Column(Integer, nullable=False)
+    duration = Column(Float, nullable=False)  # End of the last segment (seconds)
+    data = Column(LargeBinary, nullable=False)  # Columnar segments, see services/transcript_segments.py
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class WebSearchCache(Base):
+    __tablename__ = "web_search_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    cache_key = Column(String, nullable=False, unique=True, index=True)  # Hash of the normalized query and limit
+    query = Column(String, nullable=False)  # Normalized query
+    results = Column(JSON, nullable=False)  # [{"title", "url", "description"}]
+    content_hash = Column(String, nullable=False)  # SHA-256 of the results
+    
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))  # Last fetched from Firecrawl
+
+class WebScrapeCache(Base):
+    __tablename__ = "web_scrape_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    url = Column(String, nullable=False, unique=True, index=True)  # Normalized URL
+    markdown = Column(Text, nullable=False)
+    html = Column(Text, nullable=True)  # Only stored when a scrape requested HTML
+    content_hash = Column(String, nullable=False)  # SHA-256 of the markdown
+    
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))  # Last fetched from Firecrawl
+    changed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))  # Last time the content hash changed
+
+class ResearchSummaryCache(Base):
+    __tablename__ = "research_summary_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    
+    content_hash = Column(String, nullable=False, unique=True, index=True)  # SHA-256 of the scraped markdown that was summarized
+    summary = Column(JSON, nullable=False)  # SummaryResult fields
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
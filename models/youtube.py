@@ -40,6 +40,19 @@ class CommentCreateAndPin(BaseModel):
     video_id: str
     comment_text: str
 
+class SentimentBatchRequest(BaseModel):
+    video_ids: List[str]
+    min_new_comments: Optional[int] = None  # New comments needed before re-analysis (default SENTIMENT_REANALYZE_MIN_NEW_COMMENTS)
+    growth_ratio: Optional[float] = None  # Relative comment growth needed before re-analysis (default SENTIMENT_REANALYZE_GROWTH_RATIO)
+    analyze_missing: bool = True  # Queue analysis for videos that were never analyzed
+
+class VideoIngestionRequest(BaseModel):
+    video_id: Optional[str] = None  # YouTube video ID
+    video_path: Optional[str] = None  # Filename in /app/videos (instead of video_id)
+    channel_id: Optional[str] = None
+    describe: bool = True  # Also generate a description and chapters
+    backend: Optional[str] = None  # Transcription backend: openai or local (default TRANSCRIPTION_BACKEND)
+
 class ReplyInfo(BaseModel):
     reply_id: str
     text: str
@@ -91,6 +104,13 @@ class MultiChannelRequest(BaseModel):
     max_videos_per_channel: int = 50
     save_channels: bool = True  # Whether to save channels to database
     use_saved_channels: bool = True  # Whether to use saved channels if no URLs provided
+    use_local_store: bool = True  # Read saved channels from the background-refreshed video store when fresh
+    analysis_days: int = 14  # Outlier analysis window: days 1-N
+    baseline_days: int = 14  # Baseline window directly before the analysis window
+
+class MultiChannelJobRequest(MultiChannelRequest):
+    max_age_minutes: int = 60  # Freshness window for returning a cached result
+    force_refresh: bool = False  # Ignore any cached result and always run a new job
 
 # Saved channel models
 class SavedChannelRequest(BaseModel):
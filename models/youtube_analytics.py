@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from enum import Enum
+
+class SentimentType(str, Enum):
+    POSITIVE = "positive"
+    NEGATIVE = "negative"
+    NEUTRAL = "neutral"
+
+class CommentSample(BaseModel):
+    comment_id: str
+    author: str
+    text: str
+    like_count: int = 0
+    published_at: str
+    sentiment_score: Optional[float] = None
+
+class CommentSentimentAnalysisResult(BaseModel):
+    video_id: str
+    video_title: str
+    overall_sentiment: SentimentType
+    sentiment_score: float = Field(..., description="Overall sentiment from -1.0 (negative) to 1.0 (positive)")
+    confidence_score: float = Field(0.5, description="Confidence in the analysis (0-1)")
+    positive_count: int = 0
+    negative_count: int = 0
+    neutral_count: int = 0
+    total_comments_analyzed: int = 0
+    total_comments_available: Optional[int] = Field(None, description="Comments supplied for analysis (the stored threads for stored analyses); not saved with the analysis")
+    key_action_items: List[str] = []
+    suggestions: List[str] = []
+    main_themes: List[str] = []
+    ai_analysis: Optional[str] = None
+    top_positive_comments: List[CommentSample] = []
+    top_negative_comments: List[CommentSample] = []
+    most_liked_comments: List[CommentSample] = []
+    analysis_model: Optional[str] = None
+    processing_time_seconds: Optional[float] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
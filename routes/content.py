@@ -64,7 +64,11 @@ def search_content(search_query: SearchQuery):
     scrapes them, and returns the structured content.
     """
     try:
-        result = content_service.content_search(search_query.query)
+        result = content_service.content_search(
+            search_query.query,
+            include_html=search_query.include_html,
+            refresh=search_query.refresh
+        )
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from services import youtube_analytics, youtube_comments, youtube_transcription
 from services import database as database_service
 from models.youtube import (
     YouTubeTranscriptionUpdate, YouTubeDescriptionCreate, YouTubeOutput, YouTubeDescriptionUpdate,
     CommentCreate, CommentPin, CommentCreateAndPin, MultiChannelRequest, ReplyInfo, 
-    CommentInfo, VideoInfo, VideosResponse, SavedChannelRequest
+    CommentInfo, VideoInfo, VideosResponse, SavedChannelRequest, MultiChannelJobRequest, SentimentBatchRequest,
+    VideoIngestionRequest
 )
 from ai_agents.youtube import youtube_agent_runner
 import os
+import json
+import asyncio
 from dotenv import load_dotenv
 from typing import Optional, List
 
@@ -46,23 +50,156 @@ async def get_latest_youtube_video():
     user_input = "tylerreedai"
     channel_id = youtube_analytics.get_channel_id(user_input)
     latest_video = youtube_analytics.get_latest_videos(channel_id)
-    transcribed_video = youtube_transcription.process_video(latest_video[0], channel_id)
+    transcribed_video = await asyncio.wrap_future(
+        youtube_transcription.submit_transcription(youtube_transcription.process_video, latest_video[0], channel_id)
+    )
     
     database_service.insert_transcription(transcribed_video)
     
     return {"message": "Transcriptions inserted successfully"}
 
+def _validate_transcription_backend(backend):
+    # Workers run the same image as the API, so a backend that can't load here can't load there either
+    if backend and backend not in youtube_transcription.TRANSCRIPTION_BACKENDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown transcription backend '{backend}', expected one of: {', '.join(youtube_transcription.TRANSCRIPTION_BACKENDS)}"
+        )
+    if (backend or youtube_transcription.TRANSCRIPTION_BACKEND) == "local" and not youtube_transcription.FASTER_WHISPER_AVAILABLE:
+        raise HTTPException(status_code=400, detail="The local transcription backend needs faster-whisper, which is not installed")
+
 @router.get("/transcribe_local_video")
-async def transcribe_local_video(video_path: str):
+async def transcribe_local_video(
+    video_path: str,
+    background: bool = Query(False, description="Queue a staged ingestion job instead of transcribing in the request"),
+    backend: Optional[str] = Query(None, description="Transcription backend: openai or local (default TRANSCRIPTION_BACKEND)")
+):
     """
     Endpoint to retrieve the latest YouTube video.
     """
-    transcribed_video = youtube_transcription.transcribe_local_video(video_path)
+    _validate_transcription_backend(backend)
+    
+    if background:
+        return await start_video_ingestion(VideoIngestionRequest(video_path=video_path, backend=backend))
+    
+    transcribed_video = await asyncio.wrap_future(
+        youtube_transcription.submit_transcription(youtube_transcription.transcribe_local_video, video_path, backend)
+    )
     
     database_service.insert_transcription(transcribed_video)
     
     return {"message": "Transcriptions inserted successfully"}
 
+@router.get("/transcribe_local_videos")
+async def transcribe_local_videos(
+    video_paths: List[str] = Query(..., description="Video filenames in /app/videos"),
+    backend: Optional[str] = Query(None, description="Transcription backend: openai or local (default TRANSCRIPTION_BACKEND)")
+):
+    """
+    Endpoint to transcribe several local videos in parallel (bounded by TRANSCRIPTION_MAX_WORKERS).
+    """
+    _validate_transcription_backend(backend)
+    
+    results = await asyncio.to_thread(youtube_transcription.transcribe_local_videos, video_paths, backend)
+    
+    inserted = []
+    failed = []
+    for result in results:
+        if "error" in result:
+            failed.append({"video_path": result["item"], "error": result["error"]})
+        else:
+            database_service.insert_transcription(result["transcription"])
+            inserted.append(result["item"])
+    
+    return {"message": f"Inserted {len(inserted)} transcriptions", "inserted": inserted, "failed": failed}
+
+
+# Staged Video Ingestion Endpoints
+
+@router.post("/ingest")
+async def start_video_ingestion(request: VideoIngestionRequest):
+    """
+    Queue a staged ingestion job (download, extract, transcribe, describe, persist) for a
+    YouTube video or a local export. Each stage is its own Celery task; poll
+    GET /ingest/jobs/{job_id} for progress.
+    
+    If the same source already has a queued or running job, that job is returned instead.
+    """
+    try:
+        if bool(request.video_id) == bool(request.video_path):
+            raise HTTPException(status_code=400, detail="Provide exactly one of video_id or video_path")
+        _validate_transcription_backend(request.backend)
+        
+        from services import video_ingestion
+        from services.tasks import start_video_ingestion as queue_video_ingestion
+        
+        source_type, source = ("youtube", request.video_id) if request.video_id else ("local", request.video_path)
+        
+        active_job = database_service.get_active_ingestion_job(source_type, source)
+        if active_job:
+            return {**video_ingestion.job_status(active_job), "already_queued": True}
+        
+        job = database_service.create_ingestion_job(source_type, source, channel_id=request.channel_id, describe=request.describe)
+        if not job:
+            raise HTTPException(status_code=500, detail="Failed to create ingestion job")
+        
+        queue_video_ingestion(job, backend=request.backend)
+        
+        return {**video_ingestion.job_status(database_service.get_ingestion_job(job["job_id"]) or job), "already_queued": False}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting ingestion job: {str(e)}")
+
+@router.get("/ingest/jobs/{job_id}")
+async def get_video_ingestion_job(job_id: str):
+    """
+    Get the status of an ingestion job: completed and pending stages, the failing stage's
+    error, and the saved transcription/description ids once persisted.
+    """
+    try:
+        from services import video_ingestion
+        
+        job = database_service.get_ingestion_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+        
+        return video_ingestion.job_status(job)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting ingestion job: {str(e)}")
+
+@router.post("/ingest/jobs/{job_id}/resume")
+async def resume_video_ingestion_job(
+    job_id: str,
+    backend: Optional[str] = Query(None, description="Transcription backend if the transcribe stage still has to run")
+):
+    """
+    Re-queue a failed ingestion job from the first stage that hasn't completed.
+    """
+    try:
+        _validate_transcription_backend(backend)
+        
+        from services import video_ingestion
+        from services.tasks import start_video_ingestion as queue_video_ingestion
+        
+        job = database_service.get_ingestion_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+        if job["status"] in ("queued", "running"):
+            raise HTTPException(status_code=409, detail=f"Ingestion job is already {job['status']}")
+        
+        stages = queue_video_ingestion(job, backend=backend)
+        
+        return {**video_ingestion.job_status(database_service.get_ingestion_job(job_id) or job), "resumed_stages": stages}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error resuming ingestion job: {str(e)}")
 
 @router.get("/create_youtube_description")
 async def create_youtube_description():
@@ -109,6 +246,44 @@ async def get_transcription_by_id(transcription_id: int):
     
     return youtube_description_output
 
+@router.get("/transcriptions/{transcription_id}/segments")
+async def get_transcription_segments(
+    transcription_id: int,
+    start: Optional[float] = Query(None, description="Range start in seconds (default: start of the video)"),
+    end: Optional[float] = Query(None, description="Range end in seconds (default: end of the video)"),
+    include_segments: bool = Query(True, description="Also return the individual segments in the range")
+):
+    """
+    Get the transcript text (and segments) between two timestamps, looked up by binary
+    search over the transcription's columnar segment index.
+    """
+    try:
+        if start is not None and end is not None and end < start:
+            raise HTTPException(status_code=400, detail="end must not be before start")
+        
+        from services.transcript_segments import load_segment_index
+        
+        segment_index = load_segment_index(transcription_id)
+        if segment_index is None:
+            raise HTTPException(status_code=404, detail="Transcription not found")
+        
+        response = {
+            "transcription_id": transcription_id,
+            "start": start,
+            "end": end,
+            "duration": segment_index.duration,
+            "text": segment_index.text_between(start, end)
+        }
+        if include_segments:
+            response["segments"] = segment_index.segments_between(start, end)
+        
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting transcription segments: {str(e)}")
+
 @router.post("/save_youtube_description")
 async def save_youtube_description_endpoint(description_data: YouTubeDescriptionCreate):
     """
@@ -221,16 +396,81 @@ async def update_description_endpoint(description_id: int, update_data: YouTubeD
 # YouTube Comment Management Endpoints
 
 @router.get("/comments/{video_id}")
-async def get_video_comments(video_id: str, max_results: int = 100):
+async def get_video_comments(video_id: str, max_results: int = 100, sync: bool = Query(True, description="Incrementally sync new comments before reading the local store")):
     """
     Endpoint to get comments from a YouTube video.
     """
     try:
-        comments = youtube_comments.get_video_comments(video_id, max_results)
+        comments = youtube_comments.get_video_comments(video_id, max_results, sync=sync)
         return {"video_id": video_id, "comments": comments}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting comments: {str(e)}")
 
+@router.post("/comments/{video_id}/sync")
+async def sync_video_comments(video_id: str, full: bool = Query(False, description="Re-fetch every thread and reply instead of stopping at the newest stored comment")):
+    """
+    Endpoint to sync a video's comments and replies into the local comment store.
+    """
+    try:
+        return youtube_comments.sync_video_comments(video_id, full=full)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error syncing comments: {str(e)}")
+
+@router.get("/comments/{video_id}/sentiment")
+async def get_video_comment_sentiment(
+    video_id: str,
+    refresh: bool = Query(False, description="Re-run the analysis instead of returning the saved one"),
+    max_comments: Optional[int] = Query(None, description="Maximum number of stored comments to analyze (default all; the AI sees the most liked and recent ones within the token budget)"),
+    use_llm: bool = Query(True, description="False returns counts and overall sentiment from the local lexicon classifier without an AI call")
+):
+    """
+    Endpoint to get the sentiment analysis of a video's comments, analyzed from the local comment store.
+    """
+    try:
+        from services import comment_sentiment_analysis
+        
+        if not refresh:
+            analysis = comment_sentiment_analysis.get_sentiment_analysis_from_db(video_id)
+            if analysis:
+                return analysis
+        
+        return comment_sentiment_analysis.analyze_stored_video_comments(video_id, max_comments=max_comments, use_llm=use_llm)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing comment sentiment: {str(e)}")
+
+@router.post("/comments/sentiment/batch")
+async def get_comment_sentiment_batch(request: SentimentBatchRequest):
+    """
+    Get saved comment sentiment analyses for many videos at once (stale-while-revalidate).
+    
+    Saved analyses are returned immediately. Videos whose comment count has grown past the
+    threshold since they were analyzed - and videos never analyzed, unless analyze_missing
+    is false - are re-analyzed concurrently in one background job.
+    
+    Returns:
+    - videos: per video the saved analysis (or null), current and analyzed comment counts, stale and refresh_queued
+    - queued: video IDs queued for re-analysis
+    - job_id: Celery task id of the re-analysis job (null when nothing was queued)
+    """
+    try:
+        if not request.video_ids:
+            raise HTTPException(status_code=400, detail="video_ids must not be empty")
+        if len(request.video_ids) > 200:
+            raise HTTPException(status_code=400, detail="At most 200 video_ids per request")
+        
+        from services import comment_sentiment_analysis
+        
+        return comment_sentiment_analysis.get_sentiment_analyses_batch(
+            request.video_ids,
+            min_new_comments=request.min_new_comments,
+            growth_ratio=request.growth_ratio,
+            analyze_missing=request.analyze_missing
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting comment sentiment batch: {str(e)}")
+
 @router.post("/comments/create")
 async def create_comment_endpoint(comment_data: CommentCreate):
     """
@@ -276,6 +516,21 @@ async def check_oauth_status():
     except Exception as e:
         return {"status": "not_authenticated", "message": str(e)}
 
+@router.get("/quota/status")
+async def get_quota_status():
+    """
+    Get today's YouTube Data API quota usage for the API key pool and the OAuth client.
+    """
+    try:
+        from services.youtube_quota import quota_manager, oauth_quota_manager
+        
+        return {
+            "api_keys": quota_manager.status(),
+            "oauth": oauth_quota_manager.status()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting quota status: {str(e)}")
+
 # Multi-Channel Analysis Endpoints
 
 @router.post("/multi-channel/analyze")
@@ -291,6 +546,9 @@ async def analyze_multiple_channels(request: MultiChannelRequest):
     - max_videos_per_channel: Maximum videos to fetch per channel (default: 50)
     - save_channels: Whether to save new channels to database (default: true)
     - use_saved_channels: Whether to use saved channels if no URLs provided (default: true)
+    - use_local_store: Serve saved channels from the background-refreshed video store when fresh (default: true)
+    - analysis_days: Outlier analysis window, days 1-N (default: 14)
+    - baseline_days: Baseline window directly before the analysis window (default: 14)
     
     Example URLs supported:
     - https://www.youtube.com/channel/UCxxxxxx
@@ -303,52 +561,160 @@ async def analyze_multiple_channels(request: MultiChannelRequest):
     - outlier_analysis: Outlier analysis comparing last 14 days against baseline
     """
     try:
-        if request.days_back < 1 or request.days_back > 365:
-            raise HTTPException(status_code=400, detail="days_back must be between 1 and 365")
-        
-        if request.max_videos_per_channel < 1 or request.max_videos_per_channel > 100:
-            raise HTTPException(status_code=400, detail="max_videos_per_channel must be between 1 and 100")
-        
-        # Get video data from channels
-        video_results = youtube_analytics.get_videos_from_multiple_channels(
-            channel_urls=request.channel_urls,
-            days_back=request.days_back,
-            max_videos_per_channel=request.max_videos_per_channel,
-            save_channels=request.save_channels,
-            use_saved_channels=request.use_saved_channels
-        )
+        parameters = _multi_channel_parameters(request)
         
-        # Perform outlier analysis using the already-fetched video data
-        # This avoids double API calls and saves ~50% quota usage
-        outlier_results = youtube_analytics.analyze_video_outliers(
-            channel_urls=request.channel_urls,
-            use_saved_channels=request.use_saved_channels,
-            video_data=video_results  # Pass the already-fetched data
-        )
+        # Fetch videos and run outlier analysis on the already-fetched data
+        combined_results = youtube_analytics.run_multi_channel_analysis(**parameters)
         
-        # Combine results
-        combined_results = {
-            "video_data": video_results,
-            "outlier_analysis": outlier_results,
-            "analysis_metadata": {
-                "days_back_requested": request.days_back,
-                "max_videos_per_channel": request.max_videos_per_channel,
-                "save_channels": request.save_channels,
-                "use_saved_channels": request.use_saved_channels,
-                "outlier_analysis_period": "Last 14 days vs Days 15-28 baseline"
-            }
-        }
+        # Seed the job-mode cache so an identical background request can be served instantly
+        cache_key = youtube_analytics.get_multi_channel_analysis_cache_key(**parameters)
+        database_service.save_multi_channel_analysis_cache(cache_key, parameters, combined_results)
         
         return combined_results
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing channels: {str(e)}")
 
+def _multi_channel_parameters(request: MultiChannelRequest) -> dict:
+    """Validate a multi-channel request and return the pipeline parameters."""
+    if request.days_back < 1 or request.days_back > 365:
+        raise HTTPException(status_code=400, detail="days_back must be between 1 and 365")
+    
+    if request.max_videos_per_channel < 1 or request.max_videos_per_channel > 100:
+        raise HTTPException(status_code=400, detail="max_videos_per_channel must be between 1 and 100")
+    
+    if request.analysis_days < 1 or request.baseline_days < 1 or request.analysis_days + request.baseline_days > 90:
+        raise HTTPException(status_code=400, detail="analysis_days and baseline_days must be at least 1 and cover at most 90 days together")
+    
+    return {
+        "channel_urls": request.channel_urls,
+        "days_back": request.days_back,
+        "max_videos_per_channel": request.max_videos_per_channel,
+        "save_channels": request.save_channels,
+        "use_saved_channels": request.use_saved_channels,
+        "use_local_store": request.use_local_store,
+        "analysis_days": request.analysis_days,
+        "baseline_days": request.baseline_days
+    }
+
+@router.post("/multi-channel/analyze/stream")
+async def stream_multiple_channels_analysis(request: MultiChannelRequest, format: str = Query("ndjson", description="ndjson or sse")):
+    """
+    Streaming version of POST /multi-channel/analyze.
+    
+    Channels are fetched concurrently and each channel's video data and outlier analysis is
+    emitted as soon as that channel completes, followed by a final summary record.
+    
+    Query parameters:
+    - format: "ndjson" (application/x-ndjson, one JSON object per line) or "sse" (text/event-stream)
+    
+    Record types:
+    - {"type": "channel", "completed", "total", "url", "video_data", "outlier_analysis"}
+    - {"type": "summary", "video_summary", "outlier_summary", "date_range", "analysis_metadata"}
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    
+    parameters = _multi_channel_parameters(request)
+    
+    def event_stream():
+        try:
+            for record in youtube_analytics.iter_multi_channel_analysis(**parameters):
+                payload = json.dumps(record, default=str)
+                if format == "sse":
+                    yield f"event: {record['type']}\ndata: {payload}\n\n"
+                else:
+                    yield payload + "\n"
+        except Exception as e:
+            payload = json.dumps({"type": "error", "error": f"Error analyzing channels: {str(e)}"})
+            yield f"event: error\ndata: {payload}\n\n" if format == "sse" else payload + "\n"
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type)
+
+@router.post("/multi-channel/analyze/jobs")
+async def create_multi_channel_analysis_job(request: MultiChannelJobRequest):
+    """
+    Run multi-channel analysis as a background Celery job.
+    
+    If an identical request finished within max_age_minutes, the cached result is returned
+    immediately instead of starting a new job.
+    
+    Body: same fields as POST /multi-channel/analyze, plus
+    - max_age_minutes: Freshness window for cached results (default: 60)
+    - force_refresh: Always start a new job (default: false)
+    
+    Returns:
+    - job_id: Celery task id to poll via GET /multi-channel/analyze/jobs/{job_id} (null when cached)
+    - status: "completed" for a cached result, otherwise "queued"
+    """
+    try:
+        parameters = _multi_channel_parameters(request)
+        cache_key = youtube_analytics.get_multi_channel_analysis_cache_key(**parameters)
+        
+        if not request.force_refresh:
+            cached = database_service.get_multi_channel_analysis_cache(cache_key, max_age_minutes=request.max_age_minutes)
+            if cached:
+                return {
+                    "job_id": None,
+                    "status": "completed",
+                    "cached": True,
+                    "cached_at": cached.updated_at.isoformat() if cached.updated_at else None,
+                    "result": cached.result
+                }
+        
+        from services.tasks import analyze_multiple_channels_task
+        
+        job = analyze_multiple_channels_task.delay(parameters, cache_key)
+        
+        return {
+            "job_id": job.id,
+            "status": "queued",
+            "cached": False
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting analysis job: {str(e)}")
+
+@router.get("/multi-channel/analyze/jobs/{job_id}")
+async def get_multi_channel_analysis_job(job_id: str):
+    """
+    Get the status of a background multi-channel analysis job.
+    
+    Returns per-channel progress while running and the full result once completed.
+    """
+    try:
+        from services.tasks import celery_app
+        
+        job = celery_app.AsyncResult(job_id)
+        response = {"job_id": job_id, "status": job.state.lower()}
+        
+        if job.state == "PROGRESS":
+            response["progress"] = job.info
+        elif job.state == "SUCCESS":
+            cached = database_service.get_multi_channel_analysis_cache(job.result["cache_key"])
+            response["status"] = "completed"
+            response["progress"] = {"channels": job.result.get("channels", [])}
+            response["result"] = cached.result if cached else None
+        elif job.state == "FAILURE":
+            response["error"] = str(job.result)
+        
+        return response
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting analysis job: {str(e)}")
+
 @router.get("/multi-channel/analyze")
 async def analyze_multiple_channels_get(
     channel_urls: List[str] = Query(..., description="List of YouTube channel URLs"),
     days_back: int = Query(14, description="Number of days to look back for videos"),
-    max_videos_per_channel: int = Query(50, description="Maximum videos to fetch per channel")
+    max_videos_per_channel: int = Query(50, description="Maximum videos to fetch per channel"),
+    analysis_days: int = Query(14, description="Outlier analysis window (days 1-N)"),
+    baseline_days: int = Query(14, description="Baseline window directly before the analysis window")
 ):
     """
     GET version of multi-channel analysis. Use POST version for cleaner request format.
@@ -357,6 +723,8 @@ async def analyze_multiple_channels_get(
     - channel_urls: YouTube channel URLs (can specify multiple times)
     - days_back: Number of days to look back (default: 14)
     - max_videos_per_channel: Max videos per channel (default: 50)
+    - analysis_days: Outlier analysis window, days 1-N (default: 14)
+    - baseline_days: Baseline window directly before the analysis window (default: 14)
     
     Example: /multi-channel/analyze?channel_urls=https://youtube.com/@mrbreast&channel_urls=https://youtube.com/@pewdiepie&days_back=7
     """
@@ -364,7 +732,9 @@ async def analyze_multiple_channels_get(
         request = MultiChannelRequest(
             channel_urls=channel_urls,
             days_back=days_back,
-            max_videos_per_channel=max_videos_per_channel
+            max_videos_per_channel=max_videos_per_channel,
+            analysis_days=analysis_days,
+            baseline_days=baseline_days
         )
         return await analyze_multiple_channels(request)
         
@@ -399,6 +769,70 @@ async def extract_channel_id(url: str = Query(..., description="YouTube channel
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting channel ID: {str(e)}")
 
+# Outlier Baseline Endpoints
+
+@router.get("/outliers/video/{video_id}")
+async def get_video_outlier(
+    video_id: str,
+    analysis_days: int = Query(14, description="Analysis window (days 1-N)"),
+    baseline_days: int = Query(14, description="Baseline window directly before the analysis window")
+):
+    """
+    Classify a single video against its channel's persisted running baseline.
+    """
+    try:
+        from services import outlier_baselines
+        
+        if analysis_days < 1 or baseline_days < 1 or analysis_days + baseline_days > 90:
+            raise HTTPException(status_code=400, detail="analysis_days and baseline_days must be at least 1 and cover at most 90 days together")
+        
+        result = outlier_baselines.get_video_outlier(video_id, analysis_days, baseline_days)
+        if not result:
+            raise HTTPException(status_code=404, detail=f"Video not found: {video_id}")
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking video outlier: {str(e)}")
+
+# Video Percentile Index Endpoints
+
+@router.get("/percentiles/{video_id}")
+async def get_video_percentiles(video_id: str):
+    """
+    Get a video's percentile rank (views/day, engagement, like ratio) against stored videos
+    in the same category and subscriber band.
+    """
+    try:
+        from services import video_percentiles
+        
+        result = video_percentiles.get_video_percentiles(video_id)
+        if not result:
+            raise HTTPException(status_code=404, detail=f"Video not found: {video_id}")
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting video percentiles: {str(e)}")
+
+@router.post("/percentiles/rebuild")
+async def rebuild_video_percentiles():
+    """
+    Queue a rebuild of the percentile index (it is also rebuilt on a schedule).
+    """
+    try:
+        from services.tasks import rebuild_video_percentile_index
+        
+        task = rebuild_video_percentile_index.delay()
+        return {"task_id": task.id, "status": "queued"}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queuing percentile index rebuild: {str(e)}")
+
 # Saved Channel Management Endpoints
 
 @router.get("/saved-channels")
@@ -0,0 +1,127 @@
+"""
+Local lexicon-based comment sentiment classifier.
+
+Every lexicon term and negation word is folded into one compiled regex alternation, so a
+comment is scanned once no matter how large the lexicon is. Each matched term adds its
+weight; a negation word flips (and dampens) the terms in the next few words. The summed
+weight is squashed into [-1, 1]. No AI call is made, so this doubles as a fast path for
+overall sentiment and counts.
+"""
+
+import re
+import html
+import math
+import heapq
+from typing import Dict, List, Tuple
+
+# Term -> weight. Multi-word phrases take precedence over the words they contain.
+LEXICON = {
+    # Positive
+    "love": 3.0, "loved": 3.0, "loving": 2.5, "amazing": 3.0, "awesome": 3.0, "fantastic": 3.0,
+    "excellent": 3.0, "brilliant": 3.0, "incredible": 3.0, "outstanding": 3.0, "perfect": 2.5,
+    "great": 2.5, "wonderful": 2.5, "best": 2.5, "beautiful": 2.0, "insightful": 2.0,
+    "helpful": 2.0, "useful": 2.0, "informative": 2.0, "valuable": 2.0, "inspiring": 2.0,
+    "motivating": 2.0, "clear": 1.5, "easy": 1.0, "good": 1.5, "nice": 1.5, "cool": 1.5,
+    "enjoyed": 2.0, "enjoy": 1.5, "interesting": 1.5, "impressive": 2.0, "genius": 2.5,
+    "thanks": 1.5, "thank you": 2.0, "appreciate": 2.0, "appreciated": 2.0, "subscribed": 1.5,
+    "well done": 2.5, "good job": 2.5, "great job": 3.0, "keep it up": 2.0, "game changer": 2.5,
+    "life saver": 2.5, "lifesaver": 2.5, "works": 1.0, "worked": 1.0, "solved": 1.5,
+    "❤": 2.0, "❤️": 2.0, "🔥": 2.0, "👍": 1.5, "🙏": 1.5, "😍": 2.5,
+    # Negative
+    "hate": -3.0, "hated": -3.0, "terrible": -3.0, "awful": -3.0, "horrible": -3.0,
+    "worst": -3.0, "garbage": -3.0, "trash": -3.0, "scam": -3.0, "clickbait": -2.5,
+    "useless": -2.5, "pointless": -2.0, "waste": -2.5, "waste of time": -3.0, "bad": -2.0,
+    "boring": -2.0, "disappointing": -2.5, "disappointed": -2.5, "misleading": -2.5,
+    "wrong": -1.5, "confusing": -2.0, "confused": -1.5, "annoying": -2.0, "stupid": -2.5,
+    "outdated": -1.5, "broken": -2.0, "error": -1.0, "errors": -1.0, "fails": -1.5,
+    "failed": -1.5, "problem": -1.0, "no problem": 1.0, "issue": -1.0, "bug": -1.0, "slow": -1.0,
+    "too long": -1.5, "too fast": -1.5, "unsubscribed": -2.5, "dislike": -2.0,
+    "doesn't work": -2.5, "does not work": -2.5, "didn't work": -2.5, "not working": -2.5,
+    "👎": -2.0, "😡": -2.5,
+}
+
+NEGATIONS = {
+    "not", "no", "never", "nothing", "without", "hardly", "barely", "cannot", "can't", "cant",
+    "don't", "dont", "doesn't", "doesnt", "didn't", "didnt", "isn't", "isnt", "wasn't", "wasnt",
+    "aren't", "arent", "won't", "wont", "wouldn't", "wouldnt", "shouldn't", "shouldnt",
+}
+
+NEGATION_SCOPE = 3  # Words after a negation (within the same clause) that it applies to
+NEGATION_SCALE = -0.74  # "not great" is milder than "terrible"
+NORMALIZATION_ALPHA = 15  # score = s / sqrt(s^2 + alpha)
+NEUTRAL_THRESHOLD = 0.05  # |score| below this is neutral
+
+def _compile_matcher(terms) -> "re.Pattern":
+    # Longest first so phrases win over their own words; lookarounds instead of \b so emoji match too
+    alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+
+_MATCHER = _compile_matcher(set(LEXICON) | NEGATIONS)
+_WORD = re.compile(r"\S+")
+_CLAUSE_BREAK = re.compile(r"[.,;:!?]")  # A negation doesn't reach past the end of its clause
+
+def _normalize_text(text: str) -> str:
+    # Comments are stored as textDisplay (HTML); unify curly apostrophes with the lexicon
+    return html.unescape(text or "").replace("’", "'").lower()
+
+def score_text(text: str) -> float:
+    """Sentiment score of a single text in [-1, 1]."""
+    text = _normalize_text(text)
+    total = 0.0
+    negation_end = None  # Position after the last negation word
+
+    for match in _MATCHER.finditer(text):
+        term = match.group(0)
+
+        if term in NEGATIONS:
+            negation_end = match.end()
+            continue
+
+        weight = LEXICON.get(term, 0.0)
+        if negation_end is not None:
+            between = text[negation_end:match.start()]
+            if len(_WORD.findall(between)) < NEGATION_SCOPE and not _CLAUSE_BREAK.search(between):
+                weight *= NEGATION_SCALE
+        total += weight
+
+    if not total:
+        return 0.0
+    return total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+
+def label_for_score(score: float) -> str:
+    if score >= NEUTRAL_THRESHOLD:
+        return "positive"
+    if score <= -NEUTRAL_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+def _like_key(item: Tuple[Dict, float]):
+    return item[0].get("like_count", 0)
+
+def classify_comments(comments: List[Dict], top_k: int = 5) -> Dict:
+    """
+    Score every comment and summarize them in one pass.
+    Returns counts per label, the mean score, per-comment scores, and the top_k most liked
+    positive, negative and overall comments as (comment, score) pairs - selected with
+    heaps instead of sorting every comment.
+    """
+    counts = {"positive": 0, "negative": 0, "neutral": 0}
+    scores = []
+    scored = []
+
+    for comment in comments:
+        score = score_text(comment.get("text", ""))
+        counts[label_for_score(score)] += 1
+        scores.append(score)
+        scored.append((comment, score))
+
+    return {
+        "positive_count": counts["positive"],
+        "negative_count": counts["negative"],
+        "neutral_count": counts["neutral"],
+        "sentiment_score": round(sum(scores) / len(scores), 3) if scores else 0.0,
+        "scores": scores,
+        "top_positive": heapq.nlargest(top_k, (item for item in scored if item[1] >= NEUTRAL_THRESHOLD), key=_like_key),
+        "top_negative": heapq.nlargest(top_k, (item for item in scored if item[1] <= -NEUTRAL_THRESHOLD), key=_like_key),
+        "most_liked": heapq.nlargest(top_k, scored, key=_like_key),
+    }
@@ -9,10 +9,14 @@ This service provides comprehensive sentiment analysis including:
 """
 
 import os
+import re
 import json
+import html
+import math
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
 from models.youtube_analytics import (
     CommentSentimentAnalysisResult,
@@ -21,6 +25,7 @@ from models.youtube_analytics import (
 )
 from models.db_models import SentimentType as DBSentimentType
 from services import database as db_service
+from services import comment_lexicon
 
 # Import OpenAI as backup
 try:
@@ -38,6 +43,73 @@ try:
 except ImportError:
     GEMINI_AVAILABLE = False
 
+# Optional exact token counting for prompt budgets
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Comment tokens sent to the AI in a single-prompt analysis (0 for no limit); high-like and recent
+# comments are kept first. Map-reduce covers every comment, each chunk bounded by SENTIMENT_CHUNK_TOKENS
+SENTIMENT_PROMPT_TOKEN_BUDGET = int(os.getenv("SENTIMENT_PROMPT_TOKEN_BUDGET", "24000"))
+MAX_COMMENT_CHARS = 600  # Longer comments are truncated in prompts
+RECENCY_WEIGHT = 1.5  # Priority of the newest comment over the oldest, in log(1 + likes) units
+
+# Map-reduce analysis: prompt budget per chunk and how many chunk requests run at once
+SENTIMENT_CHUNK_TOKENS = int(os.getenv("SENTIMENT_CHUNK_TOKENS", "8000"))
+SENTIMENT_MAX_CONCURRENCY = int(os.getenv("SENTIMENT_MAX_CONCURRENCY", "4"))
+MERGED_LIST_LIMIT = 10  # Themes, action items and suggestions kept after merging chunks
+LEXICON_CONFIDENCE = 0.4  # Reported confidence when counts come from the local lexicon classifier
+
+# Batch requests: when a saved analysis is stale, and how re-analysis runs in the background
+SENTIMENT_REANALYZE_MIN_NEW_COMMENTS = int(os.getenv("SENTIMENT_REANALYZE_MIN_NEW_COMMENTS", "25"))
+SENTIMENT_REANALYZE_GROWTH_RATIO = float(os.getenv("SENTIMENT_REANALYZE_GROWTH_RATIO", "0.1"))
+SENTIMENT_REQUEUE_MINUTES = int(os.getenv("SENTIMENT_REQUEUE_MINUTES", "30"))
+SENTIMENT_BATCH_CONCURRENCY = int(os.getenv("SENTIMENT_BATCH_CONCURRENCY", "4"))
+
+AI_ERROR_PREFIX = "Error generating AI response"
+
+COMMENT_FORMAT_NOTE = "One comment per line as [likes] text, or [likes|N replies] text when it has replies."
+
+_token_encoding = {"encoding": None, "loaded": False}
+
+def _get_token_encoding():
+    """tiktoken encoding, loaded on first use (None if tiktoken is missing or can't load it)."""
+    if not _token_encoding["loaded"]:
+        _token_encoding["loaded"] = True
+        if TIKTOKEN_AVAILABLE:
+            try:
+                _token_encoding["encoding"] = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                print(f"tiktoken encoding unavailable, estimating tokens from length: {e}")
+    return _token_encoding["encoding"]
+
+def _estimate_tokens(text: str) -> int:
+    """Token count for prompt budgeting: exact with tiktoken, otherwise ~4 characters per token."""
+    encoding = _get_token_encoding()
+    if encoding is not None:
+        return max(1, len(encoding.encode(text, disallowed_special=())))
+    return max(1, math.ceil(len(text) / 4))
+
+_LINE_BREAK_TAG = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_WHITESPACE = re.compile(r"\s+")
+
+def _encode_comment(comment: Dict) -> str:
+    """Compact one-line prompt encoding of a comment: like count, reply count and plain text."""
+    text = _WHITESPACE.sub(" ", html.unescape(_HTML_TAG.sub("", _LINE_BREAK_TAG.sub(" ", comment.get("text", ""))))).strip()
+    if len(text) > MAX_COMMENT_CHARS:
+        text = text[:MAX_COMMENT_CHARS] + "..."
+    
+    replies = len(comment.get("replies", []))
+    prefix = f"[{comment.get('like_count', 0)}|{replies} replies]" if replies else f"[{comment.get('like_count', 0)}]"
+    return f"{prefix} {text}"
+
+def _normalize_item(item: str) -> str:
+    """Key used to recognize the same theme or suggestion reported by different chunks."""
+    return re.sub(r"[^a-z0-9 ]", "", item.lower()).strip()
+
 class CommentSentimentAnalyzer:
     """
     Advanced AI-powered comment sentiment analyzer with comprehensive insights.
@@ -80,21 +152,41 @@ class CommentSentimentAnalyzer:
             else:
                 raise Exception("No AI service available")
         except Exception as e:
-            return f"Error generating AI response: {str(e)}"
+            return f"{AI_ERROR_PREFIX}: {str(e)}"
     
     def _prepare_comments_for_analysis(self, comments: List[Dict]) -> str:
-        """Prepare comments data for AI analysis."""
-        comment_data = []
-        for comment in comments:
-            comment_data.append({
-                "id": comment.get("comment_id", ""),
-                "author": comment.get("author", ""),
-                "text": comment.get("text", ""),
-                "likes": comment.get("like_count", 0),
-                "published": comment.get("published_at", ""),
-                "replies": len(comment.get("replies", []))
-            })
-        return json.dumps(comment_data, indent=2)
+        """Prepare comments data for AI analysis, one compact line per comment (see COMMENT_FORMAT_NOTE)."""
+        return "\n".join(_encode_comment(comment) for comment in comments)
+    
+    def _select_comments_within_budget(self, comments: List[Dict], max_tokens: int = None) -> List[Dict]:
+        """
+        Pick the comments to send to the AI within a token budget.
+        Comments are ranked by log(1 + likes) plus a recency bonus and taken greedily while they
+        fit, so the prompt size per video is bounded. Returned in priority order.
+        """
+        max_tokens = SENTIMENT_PROMPT_TOKEN_BUDGET if max_tokens is None else max_tokens
+        if not max_tokens:
+            return comments
+        
+        # Recency rank: 1.0 for the newest comment, 0.0 for the oldest
+        by_time = sorted(range(len(comments)), key=lambda index: comments[index].get("published_at", ""))
+        recency = {index: rank / max(1, len(comments) - 1) for rank, index in enumerate(by_time)}
+        
+        priority = sorted(
+            range(len(comments)),
+            key=lambda index: (-(math.log1p(max(0, comments[index].get("like_count", 0))) + RECENCY_WEIGHT * recency[index]), index)
+        )
+        
+        selected = []
+        used_tokens = 0
+        for index in priority:
+            tokens = _estimate_tokens(_encode_comment(comments[index]))
+            if used_tokens + tokens > max_tokens:
+                continue
+            selected.append(comments[index])
+            used_tokens += tokens
+        
+        return selected
     
     def _parse_ai_sentiment_response(self, ai_response: str) -> Dict[str, Any]:
         """Parse AI response to extract structured sentiment data."""
@@ -179,105 +271,170 @@ class CommentSentimentAnalyzer:
         
         return result
     
-    def _categorize_comments_by_sentiment(self, comments: List[Dict], ai_response: str) -> Tuple[List[CommentSample], List[CommentSample], List[CommentSample]]:
-        """Categorize comments by sentiment based on AI analysis."""
-        positive_comments = []
-        negative_comments = []
-        most_liked_comments = []
-        
-        # Sort comments by likes
-        sorted_comments = sorted(comments, key=lambda x: x.get("like_count", 0), reverse=True)
-        
-        # Get top liked comments
-        for comment in sorted_comments[:5]:
-            most_liked_comments.append(CommentSample(
-                comment_id=comment.get("comment_id", ""),
-                author=comment.get("author", ""),
-                text=comment.get("text", "")[:200] + "..." if len(comment.get("text", "")) > 200 else comment.get("text", ""),
-                like_count=comment.get("like_count", 0),
-                published_at=comment.get("published_at", ""),
-                sentiment_score=None
-            ))
-        
-        # Simple sentiment categorization based on keywords and patterns
-        positive_keywords = ["great", "amazing", "awesome", "fantastic", "excellent", "perfect", "love", "wonderful", "brilliant", "helpful", "thanks", "thank you", "good job", "well done", "inspiring", "motivating"]
-        negative_keywords = ["bad", "terrible", "awful", "hate", "stupid", "boring", "worst", "horrible", "disappointing", "waste", "useless", "confusing", "wrong", "misleading", "annoying"]
+    def _chunk_comments(self, comments: List[Dict], max_tokens: int = None) -> List[List[Dict]]:
+        """Split comments, in order, into chunks whose encoded size stays within max_tokens."""
+        max_tokens = max_tokens or SENTIMENT_CHUNK_TOKENS
+        chunks = []
+        current = []
+        current_tokens = 0
         
         for comment in comments:
-            text = comment.get("text", "").lower()
+            tokens = _estimate_tokens(_encode_comment(comment))
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(current)
+                current = []
+                current_tokens = 0
+            current.append(comment)
+            current_tokens += tokens
+        
+        if current:
+            chunks.append(current)
+        
+        return chunks
+    
+    def _build_chunk_prompt(self, video_title: str, chunk: List[Dict], chunk_index: int, chunk_count: int) -> str:
+        """Prompt for the map step: one chunk, strictly structured output."""
+        return f"""
+        You are analyzing part {chunk_index + 1} of {chunk_count} of the comments on the YouTube video "{video_title}".
+        
+        Classify every comment below as positive, negative or neutral and summarize this part only.
+        Respond with a single JSON object and nothing else, using exactly these keys:
+        {{
+            "sentiment_score": <-1 to 1>,
+            "confidence_score": <0 to 1>,
+            "positive_count": <int>,
+            "negative_count": <int>,
+            "neutral_count": <int>,
+            "main_themes": [<short phrases>],
+            "key_action_items": [<specific steps for the creator>],
+            "suggestions": [<engagement or content ideas>],
+            "summary": "<two sentences on how viewers received the video>"
+        }}
+        
+        Comments Data ({len(chunk)} comments). {COMMENT_FORMAT_NOTE}
+        {self._prepare_comments_for_analysis(chunk)}
+        """
+    
+    def _analyze_chunk(self, video_title: str, chunk: List[Dict], chunk_index: int, chunk_count: int) -> Optional[Dict[str, Any]]:
+        """Map step for one chunk. Returns None when the AI call failed."""
+        ai_response = self._generate_ai_response(self._build_chunk_prompt(video_title, chunk, chunk_index, chunk_count))
+        if ai_response.startswith(AI_ERROR_PREFIX):
+            print(f"Sentiment chunk {chunk_index + 1}/{chunk_count} failed: {ai_response}")
+            return None
+        
+        parsed = self._parse_ai_sentiment_response(ai_response)
+        parsed["comment_count"] = len(chunk)
+        return parsed
+    
+    def _merge_chunk_results(self, chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Reduce step: combine per-chunk results without another AI call.
+        Counts are summed, scores are weighted by chunk size, and list items are ranked by
+        how many comments' worth of chunks reported them (ties keep first-seen order),
+        so the same chunk results always merge to the same output.
+        """
+        merged = {
+            "positive_count": 0,
+            "negative_count": 0,
+            "neutral_count": 0,
+            "sentiment_score": 0.0,
+            "confidence_score": 0.0
+        }
+        total = sum(result["comment_count"] for result in chunk_results)
+        if not total:
+            merged.update({"key_action_items": [], "suggestions": [], "main_themes": [], "summaries": []})
+            return merged
+        
+        def number(value, default=0.0):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return default
+        
+        ranked = {"main_themes": {}, "key_action_items": {}, "suggestions": {}}
+        summaries = []
+        
+        for result in chunk_results:
+            size = result["comment_count"]
             
-            # Count positive/negative indicators
-            positive_score = sum(1 for keyword in positive_keywords if keyword in text)
-            negative_score = sum(1 for keyword in negative_keywords if keyword in text)
+            # Keep each chunk's counts consistent with the number of comments it was given
+            positive = min(size, max(0, int(number(result.get("positive_count")))))
+            negative = min(size - positive, max(0, int(number(result.get("negative_count")))))
+            merged["positive_count"] += positive
+            merged["negative_count"] += negative
+            merged["neutral_count"] += size - positive - negative
             
-            comment_sample = CommentSample(
-                comment_id=comment.get("comment_id", ""),
-                author=comment.get("author", ""),
-                text=comment.get("text", "")[:200] + "..." if len(comment.get("text", "")) > 200 else comment.get("text", ""),
-                like_count=comment.get("like_count", 0),
-                published_at=comment.get("published_at", ""),
-                sentiment_score=round((positive_score - negative_score) / max(len(text.split()), 1), 2)
-            )
+            merged["sentiment_score"] += max(-1.0, min(1.0, number(result.get("sentiment_score")))) * size
+            merged["confidence_score"] += max(0.0, min(1.0, number(result.get("confidence_score"), 0.5))) * size
+            
+            for key, items in ranked.items():
+                for item in result.get(key) or []:
+                    if not isinstance(item, str) or not _normalize_item(item):
+                        continue
+                    entry = items.setdefault(_normalize_item(item), {"text": item.strip(), "weight": 0, "order": len(items)})
+                    entry["weight"] += size
             
-            if positive_score > negative_score:
-                positive_comments.append(comment_sample)
-            elif negative_score > positive_score:
-                negative_comments.append(comment_sample)
+            if result.get("summary"):
+                summaries.append(str(result["summary"]))
         
-        # Sort and limit results
-        positive_comments.sort(key=lambda x: x.like_count, reverse=True)
-        negative_comments.sort(key=lambda x: x.like_count, reverse=True)
+        merged["sentiment_score"] = round(merged["sentiment_score"] / total, 3)
+        merged["confidence_score"] = round(merged["confidence_score"] / total, 3)
+        for key, items in ranked.items():
+            ordered = sorted(items.values(), key=lambda entry: (-entry["weight"], entry["order"]))
+            merged[key] = [entry["text"] for entry in ordered[:MERGED_LIST_LIMIT]]
+        merged["summaries"] = summaries
         
-        return positive_comments[:5], negative_comments[:5], most_liked_comments
+        return merged
     
-    def analyze_video_comments(
-        self, 
-        video_id: str, 
-        video_title: str, 
-        comments: List[Dict],
-        include_replies: bool = True,
-        max_comments: int = 200
-    ) -> CommentSentimentAnalysisResult:
+    def _map_reduce_analysis(self, video_title: str, chunks: List[List[Dict]]) -> Tuple[Optional[Dict[str, Any]], str]:
         """
-        Perform comprehensive sentiment analysis on video comments.
-        
-        Args:
-            video_id: YouTube video ID
-            video_title: Title of the video
-            comments: List of comment dictionaries
-            include_replies: Whether to include replies in analysis
-            max_comments: Maximum number of comments to analyze
-            
-        Returns:
-            CommentSentimentAnalysisResult with comprehensive analysis
+        Analyze chunks concurrently (at most SENTIMENT_MAX_CONCURRENCY at a time) and merge them.
+        Returns no parsed data when every chunk failed.
         """
-        start_time = time.time()
+        workers = max(1, min(SENTIMENT_MAX_CONCURRENCY, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda indexed: self._analyze_chunk(video_title, indexed[1], indexed[0], len(chunks)),
+                enumerate(chunks)
+            ))
         
-        if not comments:
-            return CommentSentimentAnalysisResult(
-                video_id=video_id,
-                video_title=video_title,
-                overall_sentiment=SentimentType.NEUTRAL,
-                sentiment_score=0.0,
-                confidence_score=0.0,
-                positive_count=0,
-                negative_count=0,
-                neutral_count=0,
-                total_comments_analyzed=0,
-                key_action_items=["No comments available for analysis"],
-                suggestions=["Encourage viewers to leave comments to get feedback"],
-                main_themes=["No comments to analyze"],
-                ai_analysis="No comments available for analysis",
-                analysis_model=self.model_name,
-                processing_time_seconds=time.time() - start_time
-            )
+        succeeded = [result for result in results if result is not None]
+        if not succeeded:
+            return None, f"{AI_ERROR_PREFIX}: all {len(chunks)} comment chunks failed"
         
-        # Limit comments for analysis
-        comments_to_analyze = comments[:max_comments]
-        total_comments = len(comments_to_analyze)
+        merged = self._merge_chunk_results(succeeded)
+        analyzed = sum(result["comment_count"] for result in succeeded)
+        
+        lines = [f"Map-reduce analysis of {analyzed} comments in {len(succeeded)} of {len(chunks)} chunks."]
+        lines.extend(f"- {summary}" for summary in merged.pop("summaries"))
+        merged["comment_count"] = analyzed
+        return merged, "\n".join(lines)
+    
+    def _comment_sample(self, comment: Dict, sentiment_score: Optional[float]) -> CommentSample:
+        text = comment.get("text", "")
+        return CommentSample(
+            comment_id=comment.get("comment_id", ""),
+            author=comment.get("author", ""),
+            text=text[:200] + "..." if len(text) > 200 else text,
+            like_count=comment.get("like_count", 0),
+            published_at=comment.get("published_at", ""),
+            sentiment_score=round(sentiment_score, 2) if sentiment_score is not None else None
+        )
+    
+    def _categorize_comments_by_sentiment(self, lexicon_result: Dict[str, Any]) -> Tuple[List[CommentSample], List[CommentSample], List[CommentSample]]:
+        """Build the top positive, negative and most liked samples from the lexicon classification."""
+        return (
+            [self._comment_sample(comment, score) for comment, score in lexicon_result["top_positive"]],
+            [self._comment_sample(comment, score) for comment, score in lexicon_result["top_negative"]],
+            [self._comment_sample(comment, None) for comment, _ in lexicon_result["most_liked"]]
+        )
+    
+    def _single_prompt_analysis(self, video_title: str, comments: List[Dict]) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Analyze all comments with one AI call. Returns no parsed data when the call failed."""
+        total_comments = len(comments)
         
         # Prepare comprehensive AI prompt
-        comments_data = self._prepare_comments_for_analysis(comments_to_analyze)
+        comments_data = self._prepare_comments_for_analysis(comments)
         
         ai_prompt = f"""
         Analyze the sentiment of these YouTube video comments for the video "{video_title}".
@@ -309,7 +466,7 @@ class CommentSentimentAnalyzer:
            - Notable patterns in engagement
            - Specific insights about audience behavior
         
-        Comments Data ({total_comments} comments):
+        Comments Data ({total_comments} comments). {COMMENT_FORMAT_NOTE}
         {comments_data}
         
         Please structure your response with clear sections for each component above.
@@ -318,14 +475,102 @@ class CommentSentimentAnalyzer:
         
         # Generate AI analysis
         ai_response = self._generate_ai_response(ai_prompt)
+        if ai_response.startswith(AI_ERROR_PREFIX):
+            return None, ai_response
         
         # Parse AI response
-        parsed_data = self._parse_ai_sentiment_response(ai_response)
+        return self._parse_ai_sentiment_response(ai_response), ai_response
+    
+    def analyze_video_comments(
+        self, 
+        video_id: str, 
+        video_title: str, 
+        comments: List[Dict],
+        include_replies: bool = True,
+        max_comments: Optional[int] = 200,
+        map_reduce: Optional[bool] = None,
+        use_llm: bool = True,
+        max_prompt_tokens: Optional[int] = None
+    ) -> CommentSentimentAnalysisResult:
+        """
+        Perform comprehensive sentiment analysis on video comments.
         
-        # Categorize comments
-        positive_samples, negative_samples, most_liked_samples = self._categorize_comments_by_sentiment(
-            comments_to_analyze, ai_response
-        )
+        Args:
+            video_id: YouTube video ID
+            video_title: Title of the video
+            comments: List of comment dictionaries
+            include_replies: Whether to include replies in analysis
+            max_comments: Maximum number of comments to analyze (None for all)
+            map_reduce: Analyze token-bounded chunks concurrently and merge them
+                (None uses map-reduce only when the comments don't fit in one chunk)
+            use_llm: False skips the AI call and uses the local lexicon classifier only
+                (also the fallback when the AI call fails)
+            max_prompt_tokens: Token ceiling for the comments sent in a single prompt
+                (None uses SENTIMENT_PROMPT_TOKEN_BUDGET, 0 sends every comment); map-reduce
+                analyzes every comment regardless
+            
+        Returns:
+            CommentSentimentAnalysisResult with comprehensive analysis
+        """
+        start_time = time.time()
+        
+        if not comments:
+            return CommentSentimentAnalysisResult(
+                video_id=video_id,
+                video_title=video_title,
+                overall_sentiment=SentimentType.NEUTRAL,
+                sentiment_score=0.0,
+                confidence_score=0.0,
+                positive_count=0,
+                negative_count=0,
+                neutral_count=0,
+                total_comments_analyzed=0,
+                total_comments_available=0,
+                key_action_items=["No comments available for analysis"],
+                suggestions=["Encourage viewers to leave comments to get feedback"],
+                main_themes=["No comments to analyze"],
+                ai_analysis="No comments available for analysis",
+                analysis_model=self.model_name,
+                processing_time_seconds=time.time() - start_time
+            )
+        
+        # Limit comments for analysis
+        comments_to_analyze = comments[:max_comments] if max_comments else comments
+        total_comments = len(comments_to_analyze)
+        
+        # Local lexicon pass: comment samples, plus counts and score when the LLM is skipped or fails
+        lexicon_result = comment_lexicon.classify_comments(comments_to_analyze)
+        positive_samples, negative_samples, most_liked_samples = self._categorize_comments_by_sentiment(lexicon_result)
+        
+        parsed_data = None
+        ai_response = None
+        
+        if use_llm:
+            if map_reduce is not False:
+                chunks = self._chunk_comments(comments_to_analyze)
+                map_reduce = map_reduce or len(chunks) > 1
+            
+            if map_reduce:
+                parsed_data, ai_response = self._map_reduce_analysis(video_title, chunks)
+                if parsed_data:
+                    # Comments in failed chunks aren't counted
+                    total_comments = parsed_data["comment_count"]
+            else:
+                # Only the highest-priority comments that fit the token budget go in the single prompt
+                prompt_comments = self._select_comments_within_budget(comments_to_analyze, max_prompt_tokens)
+                parsed_data, ai_response = self._single_prompt_analysis(video_title, prompt_comments)
+                if parsed_data:
+                    total_comments = len(prompt_comments)
+        
+        analysis_model = self.model_name
+        if parsed_data is None:
+            analysis_model = "lexicon"
+            parsed_data = {
+                "sentiment_score": lexicon_result["sentiment_score"],
+                "confidence_score": LEXICON_CONFIDENCE,
+                "positive_count": lexicon_result["positive_count"],
+                "negative_count": lexicon_result["negative_count"]
+            }
         
         # Determine overall sentiment
         sentiment_score = parsed_data.get("sentiment_score", 0.0)
@@ -337,8 +582,8 @@ class CommentSentimentAnalyzer:
             overall_sentiment = SentimentType.NEUTRAL
         
         # Ensure counts make sense
-        positive_count = parsed_data.get("positive_count", len(positive_samples))
-        negative_count = parsed_data.get("negative_count", len(negative_samples))
+        positive_count = parsed_data.get("positive_count", lexicon_result["positive_count"])
+        negative_count = parsed_data.get("negative_count", lexicon_result["negative_count"])
         neutral_count = max(0, total_comments - positive_count - negative_count)
         
         processing_time = time.time() - start_time
@@ -353,6 +598,7 @@ class CommentSentimentAnalyzer:
             negative_count=negative_count,
             neutral_count=neutral_count,
             total_comments_analyzed=total_comments,
+            total_comments_available=len(comments),
             key_action_items=parsed_data.get("key_action_items", []),
             suggestions=parsed_data.get("suggestions", []),
             main_themes=parsed_data.get("main_themes", []),
@@ -360,7 +606,7 @@ class CommentSentimentAnalyzer:
             top_positive_comments=positive_samples,
             top_negative_comments=negative_samples,
             most_liked_comments=most_liked_samples,
-            analysis_model=self.model_name,
+            analysis_model=analysis_model,
             processing_time_seconds=round(processing_time, 2),
             created_at=datetime.now(timezone.utc).isoformat(),
             updated_at=datetime.now(timezone.utc).isoformat()
@@ -414,8 +660,11 @@ def analyze_video_comments(
     video_title: str, 
     comments: List[Dict],
     include_replies: bool = True,
-    max_comments: int = 200,
-    save_to_db: bool = True
+    max_comments: Optional[int] = 200,
+    save_to_db: bool = True,
+    map_reduce: Optional[bool] = None,
+    use_llm: bool = True,
+    max_prompt_tokens: Optional[int] = None
 ) -> CommentSentimentAnalysisResult:
     """
     Analyze video comments and optionally save to database.
@@ -425,8 +674,11 @@ def analyze_video_comments(
         video_title: Title of the video
         comments: List of comment dictionaries
         include_replies: Whether to include replies in analysis
-        max_comments: Maximum number of comments to analyze
+        max_comments: Maximum number of comments to analyze (None for all)
         save_to_db: Whether to save results to database
+        map_reduce: Force (True) or disable (False) chunked map-reduce analysis
+        use_llm: False classifies with the local lexicon only (no AI call)
+        max_prompt_tokens: Token ceiling for the comments sent in a single prompt (map-reduce sends all)
         
     Returns:
         CommentSentimentAnalysisResult with comprehensive analysis
@@ -436,7 +688,10 @@ def analyze_video_comments(
         video_title=video_title,
         comments=comments,
         include_replies=include_replies,
-        max_comments=max_comments
+        max_comments=max_comments,
+        map_reduce=map_reduce,
+        use_llm=use_llm,
+        max_prompt_tokens=max_prompt_tokens
     )
     
     if save_to_db:
@@ -444,6 +699,213 @@ def analyze_video_comments(
     
     return analysis
 
+def analyze_stored_video_comments(
+    video_id: str,
+    video_title: str = None,
+    max_comments: Optional[int] = None,
+    save_to_db: bool = True,
+    sync: bool = True,
+    use_llm: bool = True,
+    comment_count: Optional[int] = None
+) -> CommentSentimentAnalysisResult:
+    """
+    Analyze a video's comments from the local comment store (all of them by default).
+    The store is incrementally synced first (see youtube_comments.sync_video_comments),
+    so repeat analyses don't re-download the comments. Comments that don't fit in one chunk
+    are all analyzed with map-reduce; total_comments_available on the result is the number
+    of stored comment threads, next to total_comments_analyzed.
+    
+    When saved, the video's current comment_count is recorded with the analysis so batch
+    requests can tell when it has gone stale.
+    """
+    from services import youtube_comments
+    
+    if sync:
+        youtube_comments.ensure_video_comments_synced(video_id)
+    
+    comments = db_service.get_stored_video_comments(video_id, limit=max_comments)
+    
+    if not video_title:
+        stored_video = db_service.get_stored_video_with_subscribers(video_id)
+        if stored_video:
+            video_title = stored_video[0]["title"]
+        else:
+            from services.youtube_analytics import get_video_details
+            details = get_video_details(video_id)
+            video_title = details["title"] if details else video_id
+    
+    analysis = analyze_video_comments(
+        video_id=video_id,
+        video_title=video_title,
+        comments=comments,
+        max_comments=max_comments,
+        save_to_db=save_to_db,
+        use_llm=use_llm
+    )
+    
+    if save_to_db:
+        if comment_count is None:
+            comment_count = get_current_comment_counts([video_id]).get(video_id)
+        db_service.save_sentiment_refresh_state(video_id, comment_count, datetime.now(timezone.utc))
+    
+    return analysis
+
+def get_current_comment_counts(video_ids: List[str]) -> Dict[str, int]:
+    """
+    Current comment_count per video: from the local video store when its statistics are
+    fresh, otherwise fetched in videos.list batches of 50 (1 quota unit each).
+    """
+    from services.youtube_analytics import get_videos_by_ids, YOUTUBE_STORE_MAX_AGE_HOURS
+    
+    fresh_after = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=YOUTUBE_STORE_MAX_AGE_HOURS)
+    stored = db_service.get_stored_video_comment_counts(video_ids)
+    counts = {
+        video_id: comment_count
+        for video_id, (comment_count, stats_updated_at) in stored.items()
+        if stats_updated_at and stats_updated_at >= fresh_after
+    }
+    
+    missing = [video_id for video_id in video_ids if video_id not in counts]
+    if missing:
+        try:
+            counts.update({video["video_id"]: video["comment_count"] for video in get_videos_by_ids(missing)})
+        except Exception as e:
+            # Stale stored counts are better than none
+            print(f"Error getting current comment counts: {e}")
+            counts.update({video_id: stored[video_id][0] for video_id in missing if video_id in stored})
+    
+    return counts
+
+def _is_analysis_stale(current_count: Optional[int], analyzed_count: int, min_new_comments: int, growth_ratio: float) -> bool:
+    """Whether enough comments arrived since the analysis: at least min_new_comments and growth_ratio growth."""
+    if current_count is None:
+        return False
+    new_comments = current_count - analyzed_count
+    return new_comments >= min_new_comments and new_comments >= analyzed_count * growth_ratio
+
+def get_sentiment_analyses_batch(
+    video_ids: List[str],
+    min_new_comments: Optional[int] = None,
+    growth_ratio: Optional[float] = None,
+    analyze_missing: bool = True
+) -> Dict[str, Any]:
+    """
+    Stale-while-revalidate sentiment for many videos.
+    Stored analyses are returned immediately; videos whose comment count has grown past the
+    threshold since their analysis (and, with analyze_missing, videos never analyzed) are
+    queued for one background re-analysis job. A video isn't re-queued while a job queued
+    within SENTIMENT_REQUEUE_MINUTES is pending.
+    """
+    min_new_comments = SENTIMENT_REANALYZE_MIN_NEW_COMMENTS if min_new_comments is None else min_new_comments
+    growth_ratio = SENTIMENT_REANALYZE_GROWTH_RATIO if growth_ratio is None else growth_ratio
+    video_ids = list(dict.fromkeys(video_ids))
+    
+    analyses = db_service.get_comment_sentiment_analyses(video_ids)
+    states = db_service.get_sentiment_refresh_states(video_ids)
+    counts = get_current_comment_counts(video_ids)
+    
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    requeue_after = now - timedelta(minutes=SENTIMENT_REQUEUE_MINUTES)
+    
+    videos = []
+    to_queue = []
+    for video_id in video_ids:
+        db_analysis = analyses.get(video_id)
+        state = states.get(video_id)
+        current_count = counts.get(video_id)
+        
+        if db_analysis:
+            # Analyses saved before refresh states existed fall back to the number of comments analyzed
+            analyzed_count = state.comment_count if state and state.comment_count is not None else db_analysis.total_comments_analyzed
+            stale = _is_analysis_stale(current_count, analyzed_count, min_new_comments, growth_ratio)
+        else:
+            # Unknown videos (deleted, private or a bad ID) have no current count and aren't queued
+            analyzed_count = None
+            stale = analyze_missing and current_count is not None
+        
+        already_queued = bool(state and state.queued_at and state.queued_at >= requeue_after)
+        if stale and not already_queued:
+            to_queue.append(video_id)
+        
+        videos.append({
+            "video_id": video_id,
+            "analysis": _db_analysis_to_result(db_analysis) if db_analysis else None,
+            "comment_count": current_count,
+            "analyzed_comment_count": analyzed_count,
+            "stale": stale,
+            "refresh_queued": stale and (already_queued or video_id in to_queue)
+        })
+    
+    job_id = None
+    if to_queue:
+        from services.tasks import reanalyze_comment_sentiment
+        
+        db_service.mark_sentiment_refresh_queued(to_queue, now)
+        job = reanalyze_comment_sentiment.delay(to_queue, {video_id: counts.get(video_id) for video_id in to_queue})
+        job_id = job.id
+    
+    return {"videos": videos, "queued": to_queue, "job_id": job_id}
+
+def reanalyze_videos(video_ids: List[str], comment_counts: Dict[str, int] = None, max_workers: int = None) -> Dict[str, Any]:
+    """
+    Re-analyze several videos from the local comment store concurrently
+    (at most SENTIMENT_BATCH_CONCURRENCY videos at a time).
+    """
+    comment_counts = comment_counts or {}
+    
+    def reanalyze(video_id):
+        try:
+            analysis = analyze_stored_video_comments(video_id, comment_count=comment_counts.get(video_id))
+            return {"video_id": video_id, "total_comments_analyzed": analysis.total_comments_analyzed}
+        except Exception as e:
+            print(f"Error re-analyzing comment sentiment for video {video_id}: {e}")
+            return {"video_id": video_id, "error": str(e)}
+    
+    workers = max(1, min(max_workers or SENTIMENT_BATCH_CONCURRENCY, len(video_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(reanalyze, video_ids))
+    
+    return {
+        "analyzed": sum(1 for result in results if "error" not in result),
+        "failed": sum(1 for result in results if "error" in result),
+        "results": results
+    }
+
+def _db_analysis_to_result(db_analysis) -> CommentSentimentAnalysisResult:
+    """Convert a stored CommentSentimentAnalysis row to the API model."""
+    # Convert database model to API model
+    sentiment_type = SentimentType.POSITIVE if db_analysis.overall_sentiment == DBSentimentType.POSITIVE else \
+                   SentimentType.NEGATIVE if db_analysis.overall_sentiment == DBSentimentType.NEGATIVE else \
+                   SentimentType.NEUTRAL
+    
+    # Convert comment samples
+    top_positive = [CommentSample(**sample) for sample in db_analysis.top_positive_comments or []]
+    top_negative = [CommentSample(**sample) for sample in db_analysis.top_negative_comments or []]
+    most_liked = [CommentSample(**sample) for sample in db_analysis.most_liked_comments or []]
+    
+    return CommentSentimentAnalysisResult(
+        video_id=db_analysis.video_id,
+        video_title=db_analysis.video_title,
+        overall_sentiment=sentiment_type,
+        sentiment_score=db_analysis.sentiment_score,
+        confidence_score=db_analysis.confidence_score,
+        positive_count=db_analysis.positive_count,
+        negative_count=db_analysis.negative_count,
+        neutral_count=db_analysis.neutral_count,
+        total_comments_analyzed=db_analysis.total_comments_analyzed,
+        key_action_items=db_analysis.key_action_items or [],
+        suggestions=db_analysis.suggestions or [],
+        main_themes=db_analysis.main_themes or [],
+        ai_analysis=db_analysis.ai_analysis,
+        top_positive_comments=top_positive,
+        top_negative_comments=top_negative,
+        most_liked_comments=most_liked,
+        analysis_model=db_analysis.analysis_model,
+        processing_time_seconds=db_analysis.processing_time_seconds,
+        created_at=db_analysis.created_at.isoformat() if db_analysis.created_at else None,
+        updated_at=db_analysis.updated_at.isoformat() if db_analysis.updated_at else None
+    )
+
 def get_sentiment_analysis_from_db(video_id: str) -> Optional[CommentSentimentAnalysisResult]:
     """Get existing sentiment analysis from database."""
     try:
@@ -451,38 +913,7 @@ def get_sentiment_analysis_from_db(video_id: str) -> Optional[CommentSentimentAn
         if not db_analysis:
             return None
         
-        # Convert database model to API model
-        sentiment_type = SentimentType.POSITIVE if db_analysis.overall_sentiment == DBSentimentType.POSITIVE else \
-                       SentimentType.NEGATIVE if db_analysis.overall_sentiment == DBSentimentType.NEGATIVE else \
-                       SentimentType.NEUTRAL
-        
-        # Convert comment samples
-        top_positive = [CommentSample(**sample) for sample in db_analysis.top_positive_comments or []]
-        top_negative = [CommentSample(**sample) for sample in db_analysis.top_negative_comments or []]
-        most_liked = [CommentSample(**sample) for sample in db_analysis.most_liked_comments or []]
-        
-        return CommentSentimentAnalysisResult(
-            video_id=db_analysis.video_id,
-            video_title=db_analysis.video_title,
-            overall_sentiment=sentiment_type,
-            sentiment_score=db_analysis.sentiment_score,
-            confidence_score=db_analysis.confidence_score,
-            positive_count=db_analysis.positive_count,
-            negative_count=db_analysis.negative_count,
-            neutral_count=db_analysis.neutral_count,
-            total_comments_analyzed=db_analysis.total_comments_analyzed,
-            key_action_items=db_analysis.key_action_items or [],
-            suggestions=db_analysis.suggestions or [],
-            main_themes=db_analysis.main_themes or [],
-            ai_analysis=db_analysis.ai_analysis,
-            top_positive_comments=top_positive,
-            top_negative_comments=top_negative,
-            most_liked_comments=most_liked,
-            analysis_model=db_analysis.analysis_model,
-            processing_time_seconds=db_analysis.processing_time_seconds,
-            created_at=db_analysis.created_at.isoformat() if db_analysis.created_at else None,
-            updated_at=db_analysis.updated_at.isoformat() if db_analysis.updated_at else None
-        )
+        return _db_analysis_to_result(db_analysis)
     except Exception as e:
         print(f"Error getting sentiment analysis from database: {str(e)}")
         return None
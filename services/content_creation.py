@@ -1,6 +1,12 @@
 from firecrawl import FirecrawlApp
 from dotenv import load_dotenv
 import os
+import re
+import time
+import json
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from crewai import Agent, Task, Crew, LLM
 from models.content import ScrapeURLs, ScrapedData, ContentCreationResult, ContentGenerationRequest, PlatformContentResponse
 from services import database as database_service
@@ -42,14 +48,166 @@ class SummaryResult(BaseModel):
 
 app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
 
-def scrape_website(url: str):
-    scrape_result = app.scrape_url(url, formats=['markdown', 'html'])
-    print(scrape_result)
-    return scrape_result
+# Selected URLs are scraped concurrently (SCRAPE_MAX_WORKERS at a time); a page that takes longer
+# than SCRAPE_TIMEOUT_SECONDS from when its scrape starts is dropped instead of holding up the others
+SCRAPE_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_TIMEOUT_SECONDS", "45"))
+SCRAPE_MAX_WORKERS = int(os.getenv("SCRAPE_MAX_WORKERS", "5"))
+
+# Search results and page scrapes are cached in Postgres; entries older than these are refetched
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "24"))
+SCRAPE_CACHE_TTL_HOURS = float(os.getenv("SCRAPE_CACHE_TTL_HOURS", "72"))
+SEARCH_RESULT_LIMIT = 5
+
+_TRACKING_PARAMETER = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref)$", re.IGNORECASE)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def content_hash(content) -> str:
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def normalize_url(url: str) -> str:
+    """Cache key for a URL: lowercase scheme/host, no default port, fragment or tracking parameters, sorted query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMETER.match(key)
+    ))
+    
+    return urlunsplit((scheme, host, path, query, ""))
+
+def scrape_website(url: str, include_html: bool = False, timeout: float = None, refresh: bool = False):
+    """
+    Scrape a page as markdown (and HTML if requested), served from the scrape cache when a
+    copy younger than SCRAPE_CACHE_TTL_HOURS exists (refresh=True always refetches).
+    Returns {"url", "markdown", "html", "content_hash", "cached", "changed"}; changed is
+    False when a refetch produced the same content as the cached copy.
+    """
+    cache_url = normalize_url(url)
+    
+    if not refresh:
+        cached = database_service.get_web_scrape_cache(cache_url, max_age_hours=SCRAPE_CACHE_TTL_HOURS)
+        if cached and (cached.html is not None or not include_html):
+            return {
+                "url": url,
+                "markdown": cached.markdown,
+                "html": cached.html if include_html else None,
+                "content_hash": cached.content_hash,
+                "cached": True,
+                "changed": False
+            }
+    
+    formats = ['markdown', 'html'] if include_html else ['markdown']
+    timeout = timeout or SCRAPE_TIMEOUT_SECONDS
+    
+    # Firecrawl's own timeout (ms) stops the page load server-side as well
+    scrape_result = app.scrape_url(url, formats=formats, timeout=int(timeout * 1000))
+    markdown = (scrape_result.markdown if scrape_result else None) or ""
+    html = scrape_result.html if scrape_result and include_html else None
+    print(f"Scraped {url}: {len(markdown)} markdown characters")
+    
+    page_hash = content_hash(markdown)
+    previous = database_service.get_web_scrape_cache(cache_url)
+    if markdown:
+        database_service.save_web_scrape_cache(cache_url, markdown, html, page_hash)
+    
+    return {
+        "url": url,
+        "markdown": markdown,
+        "html": html,
+        "content_hash": page_hash,
+        "cached": False,
+        "changed": previous is None or previous.content_hash != page_hash
+    }
 
-def search_website(query: str):
-    search_result = app.search(query, limit=5)
-    return search_result
+def scrape_websites(urls: List[str], include_html: bool = False, timeout: float = None, refresh: bool = False):
+    """
+    Scrape several URLs concurrently. Every page gets the full timeout counted from when its
+    scrape actually starts, so pages queued behind the first SCRAPE_MAX_WORKERS aren't cut short.
+    Returns (url, scrape_result, error) tuples in input order; failed or timed-out pages
+    have scrape_result None and keep the others' results.
+    """
+    if not urls:
+        return []
+    
+    timeout = timeout or SCRAPE_TIMEOUT_SECONDS
+    started_at = {}  # url index -> monotonic time its scrape started
+    
+    def scrape(index, url):
+        started_at[index] = time.monotonic()
+        return scrape_website(url, include_html, timeout, refresh)
+    
+    executor = ThreadPoolExecutor(max_workers=min(SCRAPE_MAX_WORKERS, len(urls)), thread_name_prefix="scrape")
+    try:
+        futures = [executor.submit(scrape, index, url) for index, url in enumerate(urls)]
+        pending = set(range(len(futures)))
+        timed_out = set()
+        
+        while pending:
+            now = time.monotonic()
+            for index in list(pending):
+                if futures[index].done():
+                    pending.discard(index)
+                elif index in started_at and now - started_at[index] >= timeout:
+                    timed_out.add(index)
+                    pending.discard(index)
+            if not pending:
+                break
+            
+            # Wake up when a page finishes or the earliest running page runs out of time
+            deadlines = [started_at[index] + timeout for index in pending if index in started_at]
+            wait([futures[index] for index in pending], timeout=max(0, min(deadlines, default=now + timeout) - now), return_when=FIRST_COMPLETED)
+        
+        results = []
+        for index, (url, future) in enumerate(zip(urls, futures)):
+            if index in timed_out:
+                print(f"Scrape timed out after {timeout}s: {url}")
+                results.append((url, None, f"Timed out after {timeout}s"))
+            elif future.exception():
+                print(f"Scrape failed for {url}: {future.exception()}")
+                results.append((url, None, str(future.exception())))
+            else:
+                results.append((url, future.result(), None))
+        
+        return results
+    finally:
+        # Don't wait for pages that timed out; their threads finish in the background
+        executor.shutdown(wait=False)
+
+def search_website(query: str, refresh: bool = False):
+    """
+    Search results as [{"title", "url", "description"}], served from the search cache when
+    the same normalized query was searched within SEARCH_CACHE_TTL_HOURS.
+    """
+    normalized_query = normalize_query(query)
+    cache_key = content_hash(f"{normalized_query}|{SEARCH_RESULT_LIMIT}")
+    
+    if not refresh:
+        cached = database_service.get_web_search_cache(cache_key, max_age_hours=SEARCH_CACHE_TTL_HOURS)
+        if cached:
+            print(f"Search cache hit for '{normalized_query}'")
+            return cached.results
+    
+    search_result = app.search(query, limit=SEARCH_RESULT_LIMIT)
+    results = [
+        {"title": result.get("title"), "url": result.get("url"), "description": result.get("description")}
+        for result in search_result.data
+    ]
+    
+    database_service.save_web_search_cache(cache_key, normalized_query, results, content_hash(results))
+    return results
 
 def summarize_content(result: List[ScrapedData]):
     summary_agent = Agent(
@@ -95,13 +253,13 @@ def summarize_content(result: List[ScrapedData]):
     
     return crew_result.pydantic
 
-def content_search(query: str) -> ContentCreationResult:
-    search_results_data = search_website(query)
+def content_search(query: str, include_html: bool = False, refresh: bool = False) -> ContentCreationResult:
+    search_results_data = search_website(query, refresh=refresh)
     
     search_context = "\n\n".join(
         [
             f"Title: {result['title']}\nURL: {result['url']}\nDescription: {result['description']}"
-            for result in search_results_data.data
+            for result in search_results_data
         ]
     )
         
@@ -130,15 +288,22 @@ def content_search(query: str) -> ContentCreationResult:
     print(selected_urls)
 
     scraped_content_list = []
-    for url in selected_urls:
-        scrape_result = scrape_website(url)
+    for url, scrape_result, error in scrape_websites(selected_urls, include_html=include_html, refresh=refresh):
         # Check if scraping was successful and the markdown content exists
-        if scrape_result and scrape_result.markdown:
+        if scrape_result and scrape_result["markdown"]:
             print("scraped url: " + url)
             scraped_content_list.append(
-                ScrapedData(url=url, markdown=scrape_result.markdown)
+                ScrapedData(
+                    url=url,
+                    markdown=scrape_result["markdown"],
+                    html=scrape_result["html"]
+                )
             )
-            print("scraped markdown: " + scrape_result.markdown)
+            print("scraped markdown: " + scrape_result["markdown"])
+    
+    if not scraped_content_list:
+        print(f"No content could be scraped from the selected URLs: {selected_urls}")
+        return None
             
     print("Scraped content list:")
     print(scraped_content_list)
@@ -148,7 +313,15 @@ def content_search(query: str) -> ContentCreationResult:
     print("Scraped markdown:")
     print(scraped_markdown)
         
-    summary_result = summarize_content(scraped_markdown)
+    # Unchanged pages give the same markdown, so the earlier summary still applies
+    summary_key = content_hash(scraped_markdown)
+    cached_summary = database_service.get_research_summary_cache(summary_key)
+    if cached_summary:
+        print("Scraped content unchanged, reusing the cached summary")
+        summary_result = SummaryResult(**cached_summary)
+    else:
+        summary_result = summarize_content(scraped_markdown)
+        database_service.save_research_summary_cache(summary_key, summary_result.model_dump())
     
     final_result = ContentCreationResult(
         query=query,
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine, func, case
 from sqlalchemy.orm import sessionmaker, joinedload
-from datetime import datetime, timezone
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timezone, timedelta
 from typing import Optional, List, Dict, Any
 import os
 from dotenv import load_dotenv
@@ -8,7 +9,7 @@ from models.youtube import YouTubeTranscriptionCreate, YouTubeTranscriptionUpdat
 from models.content import ContentCreationResult as ContentCreationResultModel
 from models.calendar import CalendarEventCreate, CalendarEventUpdate
 import uuid 
-from models.db_models import Base, PlatformContent, YouTubeTranscription, YouTubeDescription, ContentResult, InstagramPost, TwitterPost, LinkedinPost, CalendarEvent, InstagramUser, SkoolEvent, CommentSentimentAnalysis, SentimentType, SavedYouTubeChannel
+from models.db_models import Base, PlatformContent, YouTubeTranscription, YouTubeDescription, ContentResult, InstagramPost, TwitterPost, LinkedinPost, CalendarEvent, InstagramUser, SkoolEvent, CommentSentimentAnalysis, SentimentType, SavedYouTubeChannel, MultiChannelAnalysisCache, YouTubeQuotaUsage, YouTubeChannelVideo, YouTubeChannelSyncState, VideoPercentileSketch, YouTubeChannelBaseline, YouTubeComment, YouTubeCommentSyncState, CommentSentimentRefreshState, TranscriptionAudioCache, TranscriptionVideoAlias, VideoIngestionJob, TranscriptionSegmentIndex, WebSearchCache, WebScrapeCache, ResearchSummaryCache
 
 load_dotenv()
 
@@ -63,12 +64,27 @@ def insert_transcription(metadata: YouTubeTranscriptionCreate):
     print(metadata)
 
     try:
+        from services.transcript_segments import SegmentIndex
+        
         yt_trans = YouTubeTranscription(**metadata.model_dump())
         session.add(yt_trans)
+        session.flush()
+        
+        # Columnar copy of the segments for time-range lookups, saved in the same transaction
+        segment_index = SegmentIndex.from_segments(metadata.segments)
+        session.add(TranscriptionSegmentIndex(
+            youtube_transcription_id=yt_trans.id,
+            segment_count=len(segment_index),
+            duration=segment_index.duration,
+            data=segment_index.to_bytes()
+        ))
+        
         session.commit()
+        return yt_trans.id
     except Exception as e:
         print(e)
         session.rollback()
+        return None
     finally:
         session.close()
 
@@ -91,6 +107,7 @@ def delete_transcription(transcription_id: int):
     try:
         obj = session.query(YouTubeTranscription).filter_by(id=transcription_id).first()
         if obj:
+            session.query(TranscriptionSegmentIndex).filter_by(youtube_transcription_id=transcription_id).delete()
             session.delete(obj)
             session.commit()
             return True
@@ -108,9 +125,13 @@ def update_transcription(transcription_id, update_data: YouTubeTranscriptionUpda
         obj = session.query(YouTubeTranscription).filter_by(id=transcription_id).first()
         if not obj:
             return None
-        for key, value in update_data.model_dump(exclude_unset=True).items():
+        changes = update_data.model_dump(exclude_unset=True)
+        for key, value in changes.items():
             if hasattr(obj, key):
                 setattr(obj, key, value)
+        if "segments" in changes:
+            # Rebuilt from the new segments on next access
+            session.query(TranscriptionSegmentIndex).filter_by(youtube_transcription_id=transcription_id).delete()
         session.commit()
         session.refresh(obj)
         return obj
@@ -891,6 +912,21 @@ def get_comment_sentiment_analysis(video_id: str) -> Optional[CommentSentimentAn
     finally:
         session.close()
 
+def get_comment_sentiment_analyses(video_ids: List[str]) -> Dict[str, CommentSentimentAnalysis]:
+    """Get comment sentiment analyses for several videos in one query, keyed by video ID"""
+    if not video_ids:
+        return {}
+    
+    session = SessionLocal()
+    try:
+        analyses = session.query(CommentSentimentAnalysis).filter(CommentSentimentAnalysis.video_id.in_(video_ids)).all()
+        return {analysis.video_id: analysis for analysis in analyses}
+    except Exception as e:
+        print(f"Error getting comment sentiment analyses: {str(e)}")
+        return {}
+    finally:
+        session.close()
+
 def get_all_comment_sentiment_analyses(limit: int = 100) -> List[CommentSentimentAnalysis]:
     """Get all comment sentiment analyses, ordered by creation date"""
     session = SessionLocal()
@@ -980,13 +1016,13 @@ def save_youtube_channel(
     thumbnail_url: str = None,
     tags: List[str] = None,
     notes: str = None,
-    priority: int = 1,
+    priority: int = None,
     max_videos_override: int = None,
     days_back_override: int = None
 ) -> Optional[SavedYouTubeChannel]:
     """
     Save a YouTube channel to the database for persistent monitoring.
-    If channel already exists, update its metadata.
+    If channel already exists, update its metadata. Settings left as None keep their saved values.
     """
     session = SessionLocal()
     try:
@@ -1002,9 +1038,9 @@ def save_youtube_channel(
             existing_channel.thumbnail_url = thumbnail_url or existing_channel.thumbnail_url
             existing_channel.tags = tags or existing_channel.tags
             existing_channel.notes = notes or existing_channel.notes
-            existing_channel.priority = priority
-            existing_channel.max_videos_override = max_videos_override
-            existing_channel.days_back_override = days_back_override
+            existing_channel.priority = priority if priority is not None else existing_channel.priority
+            existing_channel.max_videos_override = max_videos_override if max_videos_override is not None else existing_channel.max_videos_override
+            existing_channel.days_back_override = days_back_override if days_back_override is not None else existing_channel.days_back_override
             existing_channel.updated_at = datetime.now(timezone.utc)
             existing_channel.last_fetched_at = datetime.now(timezone.utc)
             
@@ -1022,7 +1058,7 @@ def save_youtube_channel(
                 thumbnail_url=thumbnail_url,
                 tags=tags,
                 notes=notes,
-                priority=priority,
+                priority=priority if priority is not None else 1,
                 max_videos_override=max_videos_override,
                 days_back_override=days_back_override,
                 last_fetched_at=datetime.now(timezone.utc)
@@ -1117,6 +1153,40 @@ def update_saved_youtube_channel(
     finally:
         session.close()
 
+def update_saved_channels_metadata(metadata_by_channel_id: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Store freshly fetched channel metadata for every saved channel with these channel IDs,
+    leaving user settings (priority, overrides, notes) untouched.
+    """
+    if not metadata_by_channel_id:
+        return 0
+    
+    session = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        channels = session.query(SavedYouTubeChannel).filter(
+            SavedYouTubeChannel.channel_id.in_(list(metadata_by_channel_id))
+        ).all()
+        
+        for channel in channels:
+            metadata = metadata_by_channel_id[channel.channel_id]
+            channel.channel_name = metadata.get("channel_name") or channel.channel_name
+            channel.subscriber_count = metadata.get("subscriber_count", channel.subscriber_count)
+            channel.description = metadata.get("description") or channel.description
+            channel.thumbnail_url = metadata.get("thumbnail_url") or channel.thumbnail_url
+            channel.last_fetched_at = now
+            channel.updated_at = now
+        
+        session.commit()
+        return len(channels)
+        
+    except Exception as e:
+        print(f"Error updating saved channel metadata: {e}")
+        session.rollback()
+        return 0
+    finally:
+        session.close()
+
 def delete_saved_youtube_channel(channel_url: str) -> bool:
     """
     Delete a saved YouTube channel from the database.
@@ -1223,4 +1293,1061 @@ def get_channel_urls_for_analysis(active_only: bool = True) -> List[str]:
         print(f"Error getting channel URLs for analysis: {e}")
         return []
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+# ================================
+# Multi-Channel Analysis Cache Functions
+# ================================
+
+def save_multi_channel_analysis_cache(cache_key: str, parameters: Dict[str, Any], result: Dict[str, Any]) -> Optional[MultiChannelAnalysisCache]:
+    """
+    Save (or replace) a finished multi-channel analysis result keyed by its parameters.
+    """
+    session = SessionLocal()
+    try:
+        cached = session.query(MultiChannelAnalysisCache).filter_by(cache_key=cache_key).first()
+        
+        if cached:
+            cached.parameters = parameters
+            cached.result = result
+            cached.updated_at = datetime.now(timezone.utc)
+        else:
+            cached = MultiChannelAnalysisCache(
+                cache_key=cache_key,
+                parameters=parameters,
+                result=result
+            )
+            session.add(cached)
+        
+        session.commit()
+        session.refresh(cached)
+        return cached
+        
+    except Exception as e:
+        print(f"Error saving multi-channel analysis cache: {e}")
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+def get_multi_channel_analysis_cache(cache_key: str, max_age_minutes: int = None) -> Optional[MultiChannelAnalysisCache]:
+    """
+    Get a cached multi-channel analysis result.
+    If max_age_minutes is given, only results updated within that window are returned.
+    """
+    session = SessionLocal()
+    try:
+        query = session.query(MultiChannelAnalysisCache).filter_by(cache_key=cache_key)
+        
+        if max_age_minutes is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(minutes=max_age_minutes)
+            query = query.filter(MultiChannelAnalysisCache.updated_at >= cutoff)
+        
+        return query.first()
+        
+    except Exception as e:
+        print(f"Error getting multi-channel analysis cache: {e}")
+        return None
+    finally:
+        session.close()
+
+# ================================
+# YouTube API Quota Usage Functions
+# ================================
+
+def get_youtube_quota_usage(quota_day) -> Dict[str, int]:
+    """
+    Get units used per API key fingerprint for a quota day.
+    """
+    session = SessionLocal()
+    try:
+        rows = session.query(YouTubeQuotaUsage).filter_by(quota_day=quota_day).all()
+        return {row.key_fingerprint: row.units_used for row in rows}
+        
+    except Exception as e:
+        print(f"Error getting YouTube quota usage: {e}")
+        return {}
+    finally:
+        session.close()
+
+def increment_youtube_quota_usage(key_fingerprint: str, quota_day, units: int) -> Optional[int]:
+    """
+    Atomically add units to a key's usage for a quota day.
+    Returns the new total (including usage recorded by other processes).
+    """
+    session = SessionLocal()
+    try:
+        statement = pg_insert(YouTubeQuotaUsage).values(
+            key_fingerprint=key_fingerprint,
+            quota_day=quota_day,
+            units_used=units,
+            updated_at=datetime.now(timezone.utc)
+        ).on_conflict_do_update(
+            constraint='uq_youtube_quota_key_day',
+            set_={
+                "units_used": YouTubeQuotaUsage.units_used + units,
+                "updated_at": datetime.now(timezone.utc)
+            }
+        ).returning(YouTubeQuotaUsage.units_used)
+        
+        total_used = session.execute(statement).scalar()
+        session.commit()
+        return total_used
+        
+    except Exception as e:
+        print(f"Error incrementing YouTube quota usage: {e}")
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+# ================================
+# Stored YouTube Channel Video Functions
+# ================================
+
+def _channel_video_to_dict(video: YouTubeChannelVideo) -> Dict[str, Any]:
+    """Convert a stored video into the same dict shape returned by live YouTube analysis."""
+    return {
+        "video_id": video.video_id,
+        "channel_id": video.channel_id,
+        "title": video.title,
+        "description": video.description or "",
+        "published_at": video.published_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "thumbnail": video.thumbnail,
+        "duration": video.duration,
+        "view_count": video.view_count,
+        "like_count": video.like_count,
+        "comment_count": video.comment_count,
+        "video_url": video.video_url,
+        "tags": video.tags or [],
+        "category_id": video.category_id
+    }
+
+def upsert_channel_videos(channel_id: str, videos: List[Dict[str, Any]]) -> int:
+    """
+    Insert or update stored videos for a channel in a single statement.
+    Videos use the dict shape returned by youtube_analytics.get_recent_videos_from_channel.
+    """
+    if not videos:
+        return 0
+    
+    session = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        rows = []
+        for video in videos:
+            published_at = datetime.fromisoformat(video["published_at"].replace("Z", "+00:00")).astimezone(timezone.utc).replace(tzinfo=None)
+            rows.append({
+                "video_id": video["video_id"],
+                "channel_id": channel_id,
+                "title": video["title"],
+                "description": video.get("description"),
+                "published_at": published_at,
+                "thumbnail": video.get("thumbnail"),
+                "duration": video.get("duration"),
+                "video_url": video["video_url"],
+                "tags": video.get("tags", []),
+                "category_id": video.get("category_id"),
+                "view_count": video.get("view_count", 0),
+                "like_count": video.get("like_count", 0),
+                "comment_count": video.get("comment_count", 0),
+                "created_at": now,
+                "stats_updated_at": now
+            })
+        
+        # Postgres rejects an upsert that touches the same row twice
+        rows = list({row["video_id"]: row for row in rows}.values())
+        
+        statement = pg_insert(YouTubeChannelVideo).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["video_id"],
+            set_={
+                column: statement.excluded[column]
+                for column in ("title", "description", "thumbnail", "duration", "tags", "category_id",
+                               "view_count", "like_count", "comment_count", "stats_updated_at")
+            }
+        )
+        session.execute(statement)
+        session.commit()
+        return len(rows)
+        
+    except Exception as e:
+        print(f"Error upserting channel videos: {e}")
+        session.rollback()
+        return 0
+    finally:
+        session.close()
+
+def get_stored_channel_videos(channel_id: str, published_after: datetime = None, limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Get stored videos for a channel, most recent first.
+    """
+    session = SessionLocal()
+    try:
+        query = session.query(YouTubeChannelVideo).filter(YouTubeChannelVideo.channel_id == channel_id)
+        
+        if published_after:
+            query = query.filter(YouTubeChannelVideo.published_at >= published_after)
+        
+        query = query.order_by(YouTubeChannelVideo.published_at.desc())
+        
+        if limit:
+            query = query.limit(limit)
+        
+        return [_channel_video_to_dict(video) for video in query.all()]
+        
+    except Exception as e:
+        print(f"Error getting stored channel videos: {e}")
+        return []
+    finally:
+        session.close()
+
+def get_stored_channel_video_ids(channel_id: str, published_after: datetime) -> List[str]:
+    """
+    Get IDs of stored videos for a channel published after a date (used for stats refresh).
+    """
+    session = SessionLocal()
+    try:
+        rows = session.query(YouTubeChannelVideo.video_id).filter(
+            YouTubeChannelVideo.channel_id == channel_id,
+            YouTubeChannelVideo.published_at >= published_after
+        ).all()
+        return [row[0] for row in rows]
+        
+    except Exception as e:
+        print(f"Error getting stored channel video IDs: {e}")
+        return []
+    finally:
+        session.close()
+
+def get_channel_sync_state(channel_id: str) -> Optional[YouTubeChannelSyncState]:
+    """
+    Get the background refresh state for a channel.
+    """
+    session = SessionLocal()
+    try:
+        return session.query(YouTubeChannelSyncState).filter_by(channel_id=channel_id).first()
+    except Exception as e:
+        print(f"Error getting channel sync state: {e}")
+        return None
+    finally:
+        session.close()
+
+def save_channel_sync_state(channel_id: str, synced_at: datetime, covered_from: datetime, video_count: int) -> Optional[YouTubeChannelSyncState]:
+    """
+    Record a completed background refresh for a channel.
+    """
+    session = SessionLocal()
+    try:
+        state = session.query(YouTubeChannelSyncState).filter_by(channel_id=channel_id).first()
+        
+        if state:
+            state.synced_at = synced_at
+            state.covered_from = min(state.covered_from, covered_from)
+            state.video_count = video_count
+        else:
+            state = YouTubeChannelSyncState(
+                channel_id=channel_id,
+                synced_at=synced_at,
+                covered_from=covered_from,
+                video_count=video_count
+            )
+            session.add(state)
+        
+        session.commit()
+        session.refresh(state)
+        return state
+        
+    except Exception as e:
+        print(f"Error saving channel sync state: {e}")
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+def _channel_subscriber_counts(session):
+    """Subquery of the largest known subscriber count per saved channel ID."""
+    return session.query(
+        SavedYouTubeChannel.channel_id.label("channel_id"),
+        func.max(SavedYouTubeChannel.subscriber_count).label("subscriber_count")
+    ).group_by(SavedYouTubeChannel.channel_id).subquery()
+
+def get_stored_videos_with_subscribers(published_after: datetime = None) -> List[tuple]:
+    """
+    Get all stored videos paired with their channel's subscriber count (None if the channel isn't saved).
+    """
+    session = SessionLocal()
+    try:
+        subscribers = _channel_subscriber_counts(session)
+        query = session.query(YouTubeChannelVideo, subscribers.c.subscriber_count).outerjoin(
+            subscribers, subscribers.c.channel_id == YouTubeChannelVideo.channel_id
+        )
+        
+        if published_after:
+            query = query.filter(YouTubeChannelVideo.published_at >= published_after)
+        
+        return [(_channel_video_to_dict(video), subscriber_count) for video, subscriber_count in query.yield_per(1000)]
+    except Exception as e:
+        print(f"Error getting stored videos with subscribers: {e}")
+        return []
+    finally:
+        session.close()
+
+def get_stored_video_with_subscribers(video_id: str) -> Optional[tuple]:
+    """
+    Get a single stored video paired with its channel's subscriber count.
+    """
+    session = SessionLocal()
+    try:
+        subscribers = _channel_subscriber_counts(session)
+        row = session.query(YouTubeChannelVideo, subscribers.c.subscriber_count).outerjoin(
+            subscribers, subscribers.c.channel_id == YouTubeChannelVideo.channel_id
+        ).filter(YouTubeChannelVideo.video_id == video_id).first()
+        
+        if not row:
+            return None
+        video, subscriber_count = row
+        return _channel_video_to_dict(video), subscriber_count
+    except Exception as e:
+        print(f"Error getting stored video with subscribers: {e}")
+        return None
+    finally:
+        session.close()
+
+def replace_video_percentile_index(rows: List[Dict[str, Any]]) -> int:
+    """
+    Atomically replace the whole percentile index with freshly built sketches.
+    """
+    session = SessionLocal()
+    try:
+        built_at = datetime.now(timezone.utc)
+        session.query(VideoPercentileSketch).delete()
+        session.add_all([VideoPercentileSketch(built_at=built_at, **row) for row in rows])
+        session.commit()
+        return len(rows)
+    except Exception as e:
+        print(f"Error replacing video percentile index: {e}")
+        session.rollback()
+        return 0
+    finally:
+        session.close()
+
+def get_video_percentile_index() -> List[VideoPercentileSketch]:
+    """
+    Get every sketch in the percentile index.
+    """
+    session = SessionLocal()
+    try:
+        return session.query(VideoPercentileSketch).all()
+    except Exception as e:
+        print(f"Error getting video percentile index: {e}")
+        return []
+    finally:
+        session.close()
+
+def get_channel_baseline(channel_id: str, analysis_days: int, baseline_days: int) -> Optional[YouTubeChannelBaseline]:
+    """
+    Get a channel's persisted outlier baseline for one window.
+    """
+    session = SessionLocal()
+    try:
+        return session.query(YouTubeChannelBaseline).filter_by(
+            channel_id=channel_id, analysis_days=analysis_days, baseline_days=baseline_days
+        ).first()
+    except Exception as e:
+        print(f"Error getting channel baseline: {e}")
+        return None
+    finally:
+        session.close()
+
+def get_channel_baselines(channel_id: str) -> List[YouTubeChannelBaseline]:
+    """
+    Get every persisted outlier baseline window for a channel.
+    """
+    session = SessionLocal()
+    try:
+        return session.query(YouTubeChannelBaseline).filter_by(channel_id=channel_id).all()
+    except Exception as e:
+        print(f"Error getting channel baselines: {e}")
+        return []
+    finally:
+        session.close()
+
+def save_channel_baseline(channel_id: str, analysis_days: int, baseline_days: int, stats: Dict[str, Any], members: Dict[str, Any]) -> bool:
+    """
+    Insert or replace a channel's outlier baseline for one window.
+    """
+    session = SessionLocal()
+    try:
+        statement = pg_insert(YouTubeChannelBaseline).values(
+            channel_id=channel_id,
+            analysis_days=analysis_days,
+            baseline_days=baseline_days,
+            stats=stats,
+            members=members,
+            updated_at=datetime.now(timezone.utc)
+        )
+        statement = statement.on_conflict_do_update(
+            constraint="uq_channel_baseline_window",
+            set_={
+                "stats": statement.excluded.stats,
+                "members": statement.excluded.members,
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+        session.execute(statement)
+        session.commit()
+        return True
+        
+    except Exception as e:
+        print(f"Error saving channel baseline: {e}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+def _parse_youtube_timestamp(value: str) -> Optional[datetime]:
+    """Parse a YouTube API timestamp into a naive UTC datetime."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc).replace(tzinfo=None)
+
+COMMENT_UPSERT_BATCH_SIZE = 1000  # 11 parameters per row; Postgres allows 65535 per statement
+
+def upsert_youtube_comments(comments: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    Insert or update stored comments and replies, in batches of COMMENT_UPSERT_BATCH_SIZE
+    rows within one transaction.
+    Comments use the flat dict shape built by youtube_comments.sync_video_comments.
+    Returns the number of rows written, or None if nothing was stored because of an error.
+    """
+    if not comments:
+        return 0
+    
+    session = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        rows = []
+        for comment in comments:
+            rows.append({
+                "comment_id": comment["comment_id"],
+                "video_id": comment["video_id"],
+                "parent_id": comment.get("parent_id"),
+                "author": comment.get("author"),
+                "text": comment.get("text") or "",
+                "like_count": comment.get("like_count", 0),
+                "published_at": _parse_youtube_timestamp(comment["published_at"]),
+                "edited_at": _parse_youtube_timestamp(comment.get("updated_at")),
+                "can_reply": comment.get("can_reply"),
+                "total_reply_count": comment.get("total_reply_count", 0),
+                "synced_at": now
+            })
+        
+        # Postgres rejects an upsert that touches the same row twice
+        rows = list({row["comment_id"]: row for row in rows}.values())
+        
+        for start in range(0, len(rows), COMMENT_UPSERT_BATCH_SIZE):
+            statement = pg_insert(YouTubeComment).values(rows[start:start + COMMENT_UPSERT_BATCH_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=["comment_id"],
+                set_={
+                    column: statement.excluded[column]
+                    for column in ("author", "text", "like_count", "edited_at", "can_reply", "total_reply_count", "synced_at")
+                }
+            )
+            session.execute(statement)
+        session.commit()
+        return len(rows)
+        
+    except Exception as e:
+        print(f"Error upserting YouTube comments: {e}")
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+def get_latest_comment_published_at(video_id: str) -> Optional[datetime]:
+    """
+    Get the publish time of the newest stored top-level comment for a video.
+    """
+    session = SessionLocal()
+    try:
+        return session.query(func.max(YouTubeComment.published_at)).filter(
+            YouTubeComment.video_id == video_id,
+            YouTubeComment.parent_id.is_(None)
+        ).scalar()
+    except Exception as e:
+        print(f"Error getting latest comment time: {e}")
+        return None
+    finally:
+        session.close()
+
+def get_stored_video_comments(video_id: str, limit: int = None, include_replies: bool = True) -> List[Dict[str, Any]]:
+    """
+    Get stored comment threads for a video, newest first, with their replies nested.
+    Threads use the same dict shape returned by the YouTube comments API parsing.
+    """
+    session = SessionLocal()
+    try:
+        query = session.query(YouTubeComment).filter(
+            YouTubeComment.video_id == video_id,
+            YouTubeComment.parent_id.is_(None)
+        ).order_by(YouTubeComment.published_at.desc())
+        
+        if limit:
+            query = query.limit(limit)
+        
+        threads = query.all()
+        
+        replies_by_parent = {}
+        if include_replies and threads:
+            replies = session.query(YouTubeComment).filter(
+                YouTubeComment.parent_id.in_([thread.comment_id for thread in threads])
+            ).order_by(YouTubeComment.published_at.asc()).all()
+            
+            for reply in replies:
+                replies_by_parent.setdefault(reply.parent_id, []).append({
+                    "reply_id": reply.comment_id,
+                    "text": reply.text,
+                    "author": reply.author,
+                    "like_count": reply.like_count,
+                    "published_at": reply.published_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "parent_id": reply.parent_id
+                })
+        
+        comments = []
+        for thread in threads:
+            thread_replies = replies_by_parent.get(thread.comment_id, [])
+            comments.append({
+                "comment_id": thread.comment_id,
+                "text": thread.text,
+                "author": thread.author,
+                "like_count": thread.like_count,
+                "published_at": thread.published_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "can_reply": thread.can_reply,
+                "replies": thread_replies,
+                "reply_count": len(thread_replies)
+            })
+        
+        return comments
+        
+    except Exception as e:
+        print(f"Error getting stored video comments: {e}")
+        return []
+    finally:
+        session.close()
+
+def get_comment_sync_state(video_id: str) -> Optional[YouTubeCommentSyncState]:
+    """
+    Get the comment sync state for a video.
+    """
+    session = SessionLocal()
+    try:
+        return session.query(YouTubeCommentSyncState).filter_by(video_id=video_id).first()
+    except Exception as e:
+        print(f"Error getting comment sync state: {e}")
+        return None
+    finally:
+        session.close()
+
+def save_comment_sync_state(video_id: str, synced_at: datetime) -> Optional[YouTubeCommentSyncState]:
+    """
+    Record a completed comment sync for a video, with the number of comments now stored.
+    """
+    session = SessionLocal()
+    try:
+        comment_count = session.query(func.count(YouTubeComment.id)).filter(YouTubeComment.video_id == video_id).scalar() or 0
+        state = session.query(YouTubeCommentSyncState).filter_by(video_id=video_id).first()
+        
+        if state:
+            state.synced_at = synced_at
+            state.comment_count = comment_count
+        else:
+            state = YouTubeCommentSyncState(
+                video_id=video_id,
+                synced_at=synced_at,
+                comment_count=comment_count
+            )
+            session.add(state)
+        
+        session.commit()
+        session.refresh(state)
+        return state
+        
+    except Exception as e:
+        print(f"Error saving comment sync state: {e}")
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+def get_stored_video_comment_counts(video_ids: List[str]) -> Dict[str, tuple]:
+    """
+    Get the stored comment count and statistics time of videos in the local store.
+    Returns {video_id: (comment_count, stats_updated_at)} for the videos that are stored.
+    """
+    if not video_ids:
+        return {}
+    
+    session = SessionLocal()
+    try:
+        rows = session.query(
+            YouTubeChannelVideo.video_id,
+            YouTubeChannelVideo.comment_count,
+            YouTubeChannelVideo.stats_updated_at
+        ).filter(YouTubeChannelVideo.video_id.in_(video_ids)).all()
+        return {video_id: (comment_count, stats_updated_at) for video_id, comment_count, stats_updated_at in rows}
+        
+    except Exception as e:
+        print(f"Error getting stored video comment counts: {e}")
+        return {}
+    finally:
+        session.close()
+
+def get_sentiment_refresh_states(video_ids: List[str]) -> Dict[str, CommentSentimentRefreshState]:
+    """
+    Get sentiment re-analysis state for several videos, keyed by video ID.
+    """
+    if not video_ids:
+        return {}
+    
+    session = SessionLocal()
+    try:
+        states = session.query(CommentSentimentRefreshState).filter(CommentSentimentRefreshState.video_id.in_(video_ids)).all()
+        return {state.video_id: state for state in states}
+    except Exception as e:
+        print(f"Error getting sentiment refresh states: {e}")
+        return {}
+    finally:
+        session.close()
+
+def mark_sentiment_refresh_queued(video_ids: List[str], queued_at: datetime) -> bool:
+    """
+    Record that a background sentiment re-analysis was queued for videos.
+    """
+    if not video_ids:
+        return True
+    
+    session = SessionLocal()
+    try:
+        statement = pg_insert(CommentSentimentRefreshState).values([
+            {"video_id": video_id, "queued_at": queued_at} for video_id in set(video_ids)
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=["video_id"],
+            set_={"queued_at": statement.excluded.queued_at}
+        )
+        session.execute(statement)
+        session.commit()
+        return True
+        
+    except Exception as e:
+        print(f"Error marking sentiment refresh queued: {e}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+def save_sentiment_refresh_state(video_id: str, comment_count: Optional[int], analyzed_at: datetime) -> bool:
+    """
+    Record the comment count a saved sentiment analysis was based on and clear its queued flag.
+    """
+    session = SessionLocal()
+    try:
+        statement = pg_insert(CommentSentimentRefreshState).values(
+            video_id=video_id,
+            comment_count=comment_count,
+            analyzed_at=analyzed_at,
+            queued_at=None
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["video_id"],
+            set_={
+                "comment_count": statement.excluded.comment_count,
+                "analyzed_at": statement.excluded.analyzed_at,
+                "queued_at": None
+            }
+        )
+        session.execute(statement)
+        session.commit()
+        return True
+        
+    except Exception as e:
+        print(f"Error saving sentiment refresh state: {e}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+def _cached_transcription_dict(entry: TranscriptionAudioCache) -> Dict[str, Any]:
+    return {
+        "audio_hash": entry.audio_hash,
+        "transcription": entry.transcription,
+        "segments": entry.segments
+    }
+
+def get_cached_transcription(audio_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a cached transcription by the hash of its normalized audio.
+    """
+    session = SessionLocal()
+    try:
+        entry = session.query(TranscriptionAudioCache).filter_by(audio_hash=audio_hash).first()
+        return _cached_transcription_dict(entry) if entry else None
+    except Exception as e:
+        print(f"Error getting cached transcription: {e}")
+        return None
+    finally:
+        session.close()
+
+def get_cached_transcription_by_alias(alias: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a cached transcription through a video ID (or local file) alias.
+    """
+    session = SessionLocal()
+    try:
+        entry = session.query(TranscriptionAudioCache).join(
+            TranscriptionVideoAlias, TranscriptionVideoAlias.audio_hash == TranscriptionAudioCache.audio_hash
+        ).filter(TranscriptionVideoAlias.alias == alias).first()
+        return _cached_transcription_dict(entry) if entry else None
+    except Exception as e:
+        print(f"Error getting cached transcription by alias: {e}")
+        return None
+    finally:
+        session.close()
+
+def save_cached_transcription(audio_hash: str, transcription: str, segments: List[Dict[str, Any]], aliases: List[str] = None) -> bool:
+    """
+    Cache a transcription under its audio hash and point the given aliases at it.
+    An existing entry for the hash is kept; aliases are moved to the new hash.
+    """
+    session = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        
+        statement = pg_insert(TranscriptionAudioCache).values(
+            audio_hash=audio_hash,
+            transcription=transcription,
+            segments=segments,
+            created_at=now
+        ).on_conflict_do_nothing(index_elements=["audio_hash"])
+        session.execute(statement)
+        
+        for alias in set(aliases or []):
+            statement = pg_insert(TranscriptionVideoAlias).values(alias=alias, audio_hash=audio_hash, created_at=now)
+            statement = statement.on_conflict_do_update(
+                index_elements=["alias"],
+                set_={"audio_hash": statement.excluded.audio_hash, "created_at": statement.excluded.created_at}
+            )
+            session.execute(statement)
+        
+        session.commit()
+        return True
+        
+    except Exception as e:
+        print(f"Error saving cached transcription: {e}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+INGESTION_JOB_FIELDS = (
+    "job_id", "source_type", "source", "channel_id", "describe", "status", "current_stage", "completed_stages",
+    "error", "workspace_path", "media_path", "audio_path", "transcription", "segments", "description",
+    "youtube_transcription_id", "youtube_description_id", "created_at", "updated_at"
+)
+
+def _ingestion_job_dict(job: VideoIngestionJob) -> Dict[str, Any]:
+    return {field: getattr(job, field) for field in INGESTION_JOB_FIELDS}
+
+def create_ingestion_job(source_type: str, source: str, channel_id: str = None, describe: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Create a queued video ingestion job.
+    """
+    session = SessionLocal()
+    try:
+        job = VideoIngestionJob(
+            source_type=source_type,
+            source=source,
+            channel_id=channel_id,
+            describe=describe,
+            status="queued",
+            completed_stages=[]
+        )
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        return _ingestion_job_dict(job)
+    except Exception as e:
+        print(f"Error creating ingestion job: {e}")
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+def get_ingestion_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a video ingestion job with its stage outputs.
+    """
+    session = SessionLocal()
+    try:
+        job = session.query(VideoIngestionJob).filter_by(job_id=job_id).first()
+        return _ingestion_job_dict(job) if job else None
+    except Exception as e:
+        print(f"Error getting ingestion job: {e}")
+        return None
+    finally:
+        session.close()
+
+def get_active_ingestion_job(source_type: str, source: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the latest queued or running ingestion job for a source, if any.
+    """
+    session = SessionLocal()
+    try:
+        job = session.query(VideoIngestionJob).filter(
+            VideoIngestionJob.source_type == source_type,
+            VideoIngestionJob.source == source,
+            VideoIngestionJob.status.in_(["queued", "running"])
+        ).order_by(VideoIngestionJob.created_at.desc()).first()
+        return _ingestion_job_dict(job) if job else None
+    except Exception as e:
+        print(f"Error getting active ingestion job: {e}")
+        return None
+    finally:
+        session.close()
+
+def get_ingestion_failures(source_type: str, source: str) -> Optional[Dict[str, Any]]:
+    """
+    Number of failed ingestion jobs for a source and when the latest one failed.
+    """
+    session = SessionLocal()
+    try:
+        count, last_failed_at = session.query(
+            func.count(VideoIngestionJob.job_id),
+            func.max(VideoIngestionJob.updated_at)
+        ).filter(
+            VideoIngestionJob.source_type == source_type,
+            VideoIngestionJob.source == source,
+            VideoIngestionJob.status == "failed"
+        ).one()
+        return {"count": count, "last_failed_at": last_failed_at}
+    except Exception as e:
+        print(f"Error getting ingestion failures: {e}")
+        return None
+    finally:
+        session.close()
+
+def update_ingestion_job(job_id: str, **fields) -> bool:
+    """
+    Update a video ingestion job's progress and stage outputs.
+    """
+    session = SessionLocal()
+    try:
+        job = session.query(VideoIngestionJob).filter_by(job_id=job_id).first()
+        if not job:
+            return False
+        
+        for key, value in fields.items():
+            if key in INGESTION_JOB_FIELDS:
+                setattr(job, key, value)
+        job.updated_at = datetime.now(timezone.utc)
+        
+        session.commit()
+        return True
+    except Exception as e:
+        print(f"Error updating ingestion job: {e}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+def get_transcription_segment_index(transcription_id: int) -> Optional[bytes]:
+    """
+    Get the stored columnar segment index of a transcription.
+    """
+    session = SessionLocal()
+    try:
+        entry = session.query(TranscriptionSegmentIndex).filter_by(youtube_transcription_id=transcription_id).first()
+        return entry.data if entry else None
+    except Exception as e:
+        print(f"Error getting transcription segment index: {e}")
+        return None
+    finally:
+        session.close()
+
+def save_transcription_segment_index(transcription_id: int, data: bytes, segment_count: int, duration: float) -> bool:
+    """
+    Insert or replace the columnar segment index of a transcription.
+    """
+    session = SessionLocal()
+    try:
+        statement = pg_insert(TranscriptionSegmentIndex).values(
+            youtube_transcription_id=transcription_id,
+            segment_count=segment_count,
+            duration=duration,
+            data=data,
+            created_at=datetime.now(timezone.utc)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["youtube_transcription_id"],
+            set_={column: statement.excluded[column] for column in ("segment_count", "duration", "data", "created_at")}
+        )
+        session.execute(statement)
+        session.commit()
+        return True
+    except Exception as e:
+        print(f"Error saving transcription segment index: {e}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+# ================================
+# Web Research Cache Functions
+# ================================
+
+def get_web_search_cache(cache_key: str, max_age_hours: float = None) -> Optional[WebSearchCache]:
+    """
+    Get cached search results, optionally only if fetched within max_age_hours.
+    """
+    session = SessionLocal()
+    try:
+        query = session.query(WebSearchCache).filter_by(cache_key=cache_key)
+        
+        if max_age_hours is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+            query = query.filter(WebSearchCache.updated_at >= cutoff)
+        
+        return query.first()
+        
+    except Exception as e:
+        print(f"Error getting web search cache: {e}")
+        return None
+    finally:
+        session.close()
+
+def save_web_search_cache(cache_key: str, query: str, results: List[Dict[str, Any]], content_hash: str) -> Optional[WebSearchCache]:
+    """
+    Save (or replace) the results of a search.
+    """
+    session = SessionLocal()
+    try:
+        cached = session.query(WebSearchCache).filter_by(cache_key=cache_key).first()
+        
+        if cached:
+            cached.results = results
+            cached.content_hash = content_hash
+            cached.updated_at = datetime.now(timezone.utc)
+        else:
+            cached = WebSearchCache(
+                cache_key=cache_key,
+                query=query,
+                results=results,
+                content_hash=content_hash
+            )
+            session.add(cached)
+        
+        session.commit()
+        session.refresh(cached)
+        return cached
+        
+    except Exception as e:
+        print(f"Error saving web search cache: {e}")
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+def get_web_scrape_cache(url: str, max_age_hours: float = None) -> Optional[WebScrapeCache]:
+    """
+    Get a cached page scrape by normalized URL, optionally only if fetched within max_age_hours.
+    """
+    session = SessionLocal()
+    try:
+        query = session.query(WebScrapeCache).filter_by(url=url)
+        
+        if max_age_hours is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+            query = query.filter(WebScrapeCache.updated_at >= cutoff)
+        
+        return query.first()
+        
+    except Exception as e:
+        print(f"Error getting web scrape cache: {e}")
+        return None
+    finally:
+        session.close()
+
+def save_web_scrape_cache(url: str, markdown: str, html: Optional[str], content_hash: str) -> Optional[WebScrapeCache]:
+    """
+    Save (or refresh) a page scrape. changed_at only moves when the content hash changes.
+    """
+    session = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        cached = session.query(WebScrapeCache).filter_by(url=url).first()
+        
+        if cached:
+            if cached.content_hash != content_hash:
+                cached.changed_at = now
+            cached.markdown = markdown
+            cached.html = html
+            cached.content_hash = content_hash
+            cached.updated_at = now
+        else:
+            cached = WebScrapeCache(
+                url=url,
+                markdown=markdown,
+                html=html,
+                content_hash=content_hash,
+                updated_at=now,
+                changed_at=now
+            )
+            session.add(cached)
+        
+        session.commit()
+        session.refresh(cached)
+        return cached
+        
+    except Exception as e:
+        print(f"Error saving web scrape cache: {e}")
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+def get_research_summary_cache(content_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the summary previously generated for exactly this scraped content.
+    """
+    session = SessionLocal()
+    try:
+        cached = session.query(ResearchSummaryCache).filter_by(content_hash=content_hash).first()
+        return cached.summary if cached else None
+    except Exception as e:
+        print(f"Error getting research summary cache: {e}")
+        return None
+    finally:
+        session.close()
+
+def save_research_summary_cache(content_hash: str, summary: Dict[str, Any]) -> bool:
+    """
+    Remember the summary generated for a piece of scraped content.
+    """
+    session = SessionLocal()
+    try:
+        statement = pg_insert(ResearchSummaryCache).values(
+            content_hash=content_hash,
+            summary=summary,
+            created_at=datetime.now(timezone.utc)
+        ).on_conflict_do_nothing(index_elements=["content_hash"])
+        session.execute(statement)
+        session.commit()
+        return True
+    except Exception as e:
+        print(f"Error saving research summary cache: {e}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
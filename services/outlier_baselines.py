@@ -0,0 +1,217 @@
+"""
+Rolling outlier baselines backed by running statistics.
+
+A channel's baseline is the set of its videos published inside the baseline window
+(by default days 15-28). Mean and variance of each metric are kept with Welford's
+algorithm, which supports O(1) add and remove, so a new video or a fresh statistics
+snapshot only adjusts the baseline instead of recomputing it from history.
+
+Baselines are persisted per channel and window in youtube_channel_baselines together
+with the metric values each member video contributed, and are updated whenever videos
+are written to the local store.
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from services import database as db_service
+from services.youtube_analytics import (
+    get_video_details,
+    _calculate_video_metrics,
+    _get_days_since_published,
+    _analyze_single_video_outlier,
+    DEFAULT_ANALYSIS_DAYS,
+    DEFAULT_BASELINE_DAYS,
+    MIN_BASELINE_VIDEOS,
+)
+
+BASELINE_METRICS = ["views_per_day", "engagement_rate", "like_ratio", "comment_ratio"]
+
+class RunningStats:
+    """
+    Welford running mean/variance with O(1) add and remove.
+    """
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value: float):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / (self.count - 1)
+        self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+        self.count -= 1
+
+    @property
+    def std_dev(self) -> float:
+        """Sample standard deviation (matches statistics.stdev)."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RunningStats":
+        return cls(data.get("count", 0), data.get("mean", 0.0), data.get("m2", 0.0))
+
+class ChannelBaseline:
+    """
+    Running baseline statistics for one channel and one (analysis_days, baseline_days) window.
+    Members remember the metric values they contributed so they can be removed exactly.
+    """
+
+    def __init__(self, channel_id: str, analysis_days: int = DEFAULT_ANALYSIS_DAYS, baseline_days: int = DEFAULT_BASELINE_DAYS,
+                 stats: Dict = None, members: Dict = None):
+        self.channel_id = channel_id
+        self.analysis_days = analysis_days
+        self.baseline_days = baseline_days
+        self.stats = {metric: RunningStats.from_dict((stats or {}).get(metric, {})) for metric in BASELINE_METRICS}
+        self.members = members or {}
+
+    def in_window(self, video: Dict, current_time: datetime) -> bool:
+        days = _get_days_since_published(video, current_time)
+        return self.analysis_days <= days < self.analysis_days + self.baseline_days
+
+    def _remove_member(self, video_id: str):
+        member = self.members.pop(video_id, None)
+        if member:
+            for metric in BASELINE_METRICS:
+                self.stats[metric].remove(member[metric])
+
+    def apply_snapshot(self, video: Dict, current_time: datetime):
+        """Add, replace or drop a video's contribution based on its latest statistics. O(1)."""
+        self._remove_member(video["video_id"])
+
+        if self.in_window(video, current_time):
+            metrics = _calculate_video_metrics(video, current_time)
+            member = {metric: metrics[metric] for metric in BASELINE_METRICS}
+            member["published_at"] = video["published_at"]
+            self.members[video["video_id"]] = member
+            for metric in BASELINE_METRICS:
+                self.stats[metric].add(member[metric])
+
+    def expire(self, current_time: datetime):
+        """Drop members that have aged out of the baseline window."""
+        for video_id, member in list(self.members.items()):
+            if _get_days_since_published(member, current_time) >= self.analysis_days + self.baseline_days:
+                self._remove_member(video_id)
+
+    @property
+    def video_count(self) -> int:
+        return len(self.members)
+
+    def statistics(self) -> Dict:
+        """Baseline statistics in the shape used by the outlier analysis."""
+        return {
+            **{metric: {"mean": self.stats[metric].mean, "std_dev": self.stats[metric].std_dev} for metric in BASELINE_METRICS},
+            "baseline_video_count": self.video_count
+        }
+
+    @classmethod
+    def from_videos(cls, channel_id: str, videos: List[Dict], current_time: datetime,
+                    analysis_days: int = DEFAULT_ANALYSIS_DAYS, baseline_days: int = DEFAULT_BASELINE_DAYS) -> "ChannelBaseline":
+        baseline = cls(channel_id, analysis_days, baseline_days)
+        for video in videos:
+            baseline.apply_snapshot(video, current_time)
+        return baseline
+
+def _save(baseline: ChannelBaseline):
+    db_service.save_channel_baseline(
+        baseline.channel_id,
+        baseline.analysis_days,
+        baseline.baseline_days,
+        {metric: stats.to_dict() for metric, stats in baseline.stats.items()},
+        baseline.members
+    )
+
+def load_channel_baseline(channel_id: str, analysis_days: int = DEFAULT_ANALYSIS_DAYS, baseline_days: int = DEFAULT_BASELINE_DAYS,
+                          build_missing: bool = True) -> Optional[ChannelBaseline]:
+    """
+    Load a channel's persisted baseline for a window, expiring aged-out members.
+    A missing baseline is bootstrapped once from the local video store when build_missing is set.
+    """
+    current_time = datetime.now()
+    row = db_service.get_channel_baseline(channel_id, analysis_days, baseline_days)
+
+    if row:
+        baseline = ChannelBaseline(channel_id, analysis_days, baseline_days, row.stats, row.members)
+        baseline.expire(current_time)
+        return baseline
+
+    if not build_missing:
+        return None
+
+    window_start = current_time - timedelta(days=analysis_days + baseline_days + 1)
+    stored_videos = db_service.get_stored_channel_videos(channel_id, published_after=window_start)
+    if not stored_videos:
+        return None
+
+    baseline = ChannelBaseline.from_videos(channel_id, stored_videos, current_time, analysis_days, baseline_days)
+    _save(baseline)
+    return baseline
+
+def update_channel_baselines(channel_id: str, videos: List[Dict]):
+    """
+    Apply fresh video snapshots to every persisted baseline of a channel.
+    Called after videos are written to the local store; windows that have never been
+    used are bootstrapped from the store on first load instead.
+    """
+    if not videos:
+        return
+
+    current_time = datetime.now()
+    for row in db_service.get_channel_baselines(channel_id):
+        baseline = ChannelBaseline(channel_id, row.analysis_days, row.baseline_days, row.stats, row.members)
+        baseline.expire(current_time)
+        for video in videos:
+            baseline.apply_snapshot(video, current_time)
+        _save(baseline)
+
+def check_video_outlier(video: Dict, channel_id: str, analysis_days: int = DEFAULT_ANALYSIS_DAYS,
+                        baseline_days: int = DEFAULT_BASELINE_DAYS) -> Dict:
+    """
+    Classify a single video against its channel's persisted baseline - no history scan.
+    """
+    baseline = load_channel_baseline(channel_id, analysis_days, baseline_days)
+
+    if not baseline or baseline.video_count < MIN_BASELINE_VIDEOS:
+        count = baseline.video_count if baseline else 0
+        return {
+            "video_id": video.get("video_id"),
+            "channel_id": channel_id,
+            "error": f"Not enough baseline videos ({count}). Need at least {MIN_BASELINE_VIDEOS} videos from days {analysis_days + 1}-{analysis_days + baseline_days}."
+        }
+
+    result = _analyze_single_video_outlier(video, baseline.statistics(), datetime.now())
+    result["channel_id"] = channel_id
+    result["baseline_video_count"] = baseline.video_count
+    return result
+
+def get_video_outlier(video_id: str, analysis_days: int = DEFAULT_ANALYSIS_DAYS, baseline_days: int = DEFAULT_BASELINE_DAYS) -> Optional[Dict]:
+    """
+    Outlier check for one video by ID. Uses the stored snapshot when available, otherwise
+    fetches the video (1 quota unit).
+    """
+    stored = db_service.get_stored_video_with_subscribers(video_id)
+    if stored:
+        video = stored[0]
+    else:
+        video = get_video_details(video_id)
+        if not video:
+            return None
+        video["video_id"] = video_id
+
+    return check_video_outlier(video, video["channel_id"], analysis_days, baseline_days)
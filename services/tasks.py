@@ -1,26 +1,68 @@
 import os
 import datetime
-from celery import Celery
+from celery import Celery, chain
 from celery.schedules import crontab
 from dotenv import load_dotenv
 # from services import database as database_service
 # from services import youtube as youtube_service
 from services import telegram as telegram_service
 from services import calendar as calendar_service
+from services import database as database_service
+from services import youtube_analytics
 
 load_dotenv()
 
 celery_app = Celery(
     "worker",
     broker=os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0"),
+    backend=os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/1"),
 )
 
+# Video ingestion stages: ffmpeg work (audio extraction, hashing, chunk cutting) goes to a
+# CPU-bound queue, downloads and API calls to a network-bound one, so each can get its own
+# worker pool and concurrency. The local transcription backend is CPU-bound too, so workers
+# consuming the IO queue need the CPU for it when TRANSCRIPTION_BACKEND=local.
+INGEST_MEDIA_QUEUE = os.getenv("INGEST_MEDIA_QUEUE", "ingest_media")
+INGEST_IO_QUEUE = os.getenv("INGEST_IO_QUEUE", "ingest_io")
+
+celery_app.conf.task_routes = {
+    'ingest_download': {'queue': INGEST_IO_QUEUE},
+    'ingest_extract': {'queue': INGEST_MEDIA_QUEUE},
+    'ingest_transcribe': {'queue': INGEST_IO_QUEUE},
+    'ingest_describe': {'queue': INGEST_IO_QUEUE},
+    'ingest_persist': {'queue': INGEST_IO_QUEUE},
+}
+
+# Polls the channel's uploads playlist (1 quota unit) for videos that haven't been ingested yet
+VIDEO_CHECK_CHANNEL_ID = os.getenv("VIDEO_CHECK_CHANNEL_ID", "UCrnqntHQ4oNe7HJtfiAMQ2g")
+VIDEO_CHECK_INTERVAL_MINUTES = float(os.getenv("VIDEO_CHECK_INTERVAL_MINUTES", "30"))
+VIDEO_CHECK_LOOKBACK_DAYS = int(os.getenv("VIDEO_CHECK_LOOKBACK_DAYS", "3"))
+# A video whose ingestion failed is retried after VIDEO_CHECK_RETRY_HOURS, doubling after each
+# further failure, and given up on after VIDEO_CHECK_MAX_ATTEMPTS failed jobs
+VIDEO_CHECK_RETRY_HOURS = float(os.getenv("VIDEO_CHECK_RETRY_HOURS", "1"))
+VIDEO_CHECK_MAX_ATTEMPTS = int(os.getenv("VIDEO_CHECK_MAX_ATTEMPTS", "3"))
+
+YOUTUBE_REFRESH_INTERVAL_HOURS = float(os.getenv("YOUTUBE_REFRESH_INTERVAL_HOURS", "6"))
+PERCENTILE_INDEX_REBUILD_HOURS = float(os.getenv("PERCENTILE_INDEX_REBUILD_HOURS", "24"))
+
 # Beat schedule to check the DB every minute
 celery_app.conf.beat_schedule = {
     'send-telegram-message': {
         'task': 'send_telegram_message',
         'schedule': crontab(hour=6, minute=0),
     },
+    'refresh-saved-youtube-channels': {
+        'task': 'refresh_saved_youtube_channels',
+        'schedule': datetime.timedelta(hours=YOUTUBE_REFRESH_INTERVAL_HOURS),
+    },
+    'rebuild-video-percentile-index': {
+        'task': 'rebuild_video_percentile_index',
+        'schedule': datetime.timedelta(hours=PERCENTILE_INDEX_REBUILD_HOURS),
+    },
+    'check-latest-youtube-video': {
+        'task': 'check_latest_youtube_video',
+        'schedule': datetime.timedelta(minutes=VIDEO_CHECK_INTERVAL_MINUTES),
+    },
 }
 
 @celery_app.task(name='send_telegram_message')
@@ -40,21 +82,164 @@ def send_telegram_message():
         print(f"❌ Failed to send Telegram message: {e}")
         return f"Failed to send Telegram message: {e}"
 
-# @celery_app.task(name='check_latest_youtube_video')
-# def check_latest_youtube_video():
-#     try:
-#         channel_id = youtube_service.get_channel_id("tylerreedai")
-#         latest_youtube_video = youtube_service.get_latest_videos("UCrnqntHQ4oNe7HJtfiAMQ2g", 1)
-#         check_exists = database_service.video_exists(latest_youtube_video[0]['video_id'])
+@celery_app.task(bind=True, name='analyze_multiple_channels')
+def analyze_multiple_channels_task(self, parameters, cache_key):
+    """Run the multi-channel analysis pipeline, reporting per-channel progress and caching the result."""
+    channel_progress = []
+    
+    def report_progress(stage, completed, total, channel_data):
+        channel_progress.append({
+            "stage": stage,
+            "url": channel_data.get("url"),
+            "channel_name": channel_data.get("channel_name"),
+            "video_count": len(channel_data.get("videos", [])),
+            "error": channel_data.get("error")
+        })
+        self.update_state(state='PROGRESS', meta={
+            "stage": stage,
+            "completed": completed,
+            "total": total,
+            "channels": channel_progress
+        })
+    
+    try:
+        result = youtube_analytics.run_multi_channel_analysis(
+            progress_callback=report_progress,
+            **parameters
+        )
+        database_service.save_multi_channel_analysis_cache(cache_key, parameters, result)
+        return {"cache_key": cache_key, "channels": channel_progress}
+    except Exception as e:
+        print(f"❌ Multi-channel analysis failed: {e}")
+        raise
+
+@celery_app.task(name='refresh_saved_youtube_channels')
+def refresh_saved_youtube_channels():
+    """Incrementally refresh saved channels into the local video store used by /multi-channel/analyze."""
+    try:
+        results = youtube_analytics.refresh_saved_channels()
+        print(f"Refreshed {results['refreshed']} saved channels ({results['failed']} failed, {results['skipped']} skipped)")
+        return results
+    except Exception as e:
+        print(f"❌ Saved channel refresh failed: {e}")
+        return f"Saved channel refresh failed: {e}"
+
+@celery_app.task(name='rebuild_video_percentile_index')
+def rebuild_video_percentile_index():
+    """Rebuild the cross-channel percentile index from the local video store."""
+    try:
+        from services import video_percentiles
+        
+        results = video_percentiles.build_percentile_index()
+        print(f"Rebuilt percentile index: {results['videos_indexed']} videos in {results['buckets']} buckets")
+        return results
+    except Exception as e:
+        print(f"❌ Percentile index rebuild failed: {e}")
+        return f"Percentile index rebuild failed: {e}"
+
+@celery_app.task(name='reanalyze_comment_sentiment')
+def reanalyze_comment_sentiment(video_ids, comment_counts=None):
+    """Re-run comment sentiment analysis for videos whose saved analysis went stale."""
+    try:
+        from services import comment_sentiment_analysis
         
-#         print(f"Check video exists in database already: {check_exists}")
+        results = comment_sentiment_analysis.reanalyze_videos(video_ids, comment_counts)
+        print(f"Re-analyzed comment sentiment for {results['analyzed']} videos ({results['failed']} failed)")
+        return results
+    except Exception as e:
+        print(f"❌ Comment sentiment re-analysis failed: {e}")
+        return f"Comment sentiment re-analysis failed: {e}"
+
+def _run_ingestion_stage(job_id, stage, backend=None):
+    from services import video_ingestion
+    
+    video_ingestion.run_ingestion_stage(job_id, stage, backend=backend)
+    return job_id
+
+@celery_app.task(name='ingest_download')
+def ingest_download(job_id):
+    return _run_ingestion_stage(job_id, "download")
+
+@celery_app.task(name='ingest_extract')
+def ingest_extract(job_id, backend=None):
+    return _run_ingestion_stage(job_id, "extract", backend=backend)
+
+@celery_app.task(name='ingest_transcribe')
+def ingest_transcribe(job_id, backend=None):
+    return _run_ingestion_stage(job_id, "transcribe", backend=backend)
+
+@celery_app.task(name='ingest_describe')
+def ingest_describe(job_id):
+    return _run_ingestion_stage(job_id, "describe")
+
+@celery_app.task(name='ingest_persist')
+def ingest_persist(job_id):
+    return _run_ingestion_stage(job_id, "persist")
+
+INGESTION_STAGE_TASKS = {
+    "download": ingest_download,
+    "extract": ingest_extract,
+    "transcribe": ingest_transcribe,
+    "describe": ingest_describe,
+    "persist": ingest_persist,
+}
+
+def start_video_ingestion(job, backend=None):
+    """
+    Queue the chain of a job's remaining stages. Returns the job's stages that were queued.
+    backend picks the transcription backend (default TRANSCRIPTION_BACKEND on the worker).
+    """
+    from services import video_ingestion
+    
+    stages = video_ingestion.pending_stages(job)
+    if not stages:
+        return []
+    
+    database_service.update_ingestion_job(job["job_id"], status="queued", error=None)
+    chain(*(
+        INGESTION_STAGE_TASKS[stage].si(job["job_id"], backend) if stage in ("extract", "transcribe") else INGESTION_STAGE_TASKS[stage].si(job["job_id"])
+        for stage in stages
+    )).apply_async()
+    return stages
+
+def _ingestion_backing_off(video_id):
+    """Whether a video's earlier ingestion failures mean it shouldn't be queued again yet."""
+    failures = database_service.get_ingestion_failures("youtube", video_id)
+    if failures is None:
+        return True  # Don't risk re-queuing a failing video every interval
+    if not failures["count"]:
+        return False
+    if failures["count"] >= VIDEO_CHECK_MAX_ATTEMPTS:
+        return True
+    
+    retry_after = datetime.timedelta(hours=VIDEO_CHECK_RETRY_HOURS * 2 ** (failures["count"] - 1))
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return failures["last_failed_at"] is not None and now - failures["last_failed_at"] < retry_after
+
+@celery_app.task(name='check_latest_youtube_video')
+def check_latest_youtube_video():
+    """
+    Queue ingestion for recent uploads that have no transcription and no ingestion job yet.
+    Videos whose ingestion failed are retried with backoff (see VIDEO_CHECK_RETRY_HOURS).
+    """
+    try:
+        since = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - datetime.timedelta(days=VIDEO_CHECK_LOOKBACK_DAYS)
+        video_ids = youtube_analytics.get_channel_upload_ids_since(VIDEO_CHECK_CHANNEL_ID, since, max_results=10)
         
-#         if not check_exists:
-#             youtube_transcription_create = youtube_service.process_video(latest_youtube_video[0], channel_id)
-#             database_service.insert_transcription(youtube_transcription_create)
-#             print(f"Inserted transcription for {latest_youtube_video[0]['title']} into database")
+        queued = []
+        for video_id in video_ids:
+            if database_service.video_exists(video_id) or database_service.get_active_ingestion_job("youtube", video_id):
+                continue
+            if _ingestion_backing_off(video_id):
+                continue
             
-#         return f"DB checked successfully at {datetime.datetime.now()}"
-#     except Exception as e:
-#         print(f"❌ DB check failed: {e}")
-#         return f"DB check failed: {e}"
+            job = database_service.create_ingestion_job("youtube", video_id, channel_id=VIDEO_CHECK_CHANNEL_ID)
+            if job:
+                start_video_ingestion(job)
+                queued.append(video_id)
+        
+        print(f"Checked {len(video_ids)} recent uploads, queued ingestion for {len(queued)}")
+        return {"checked": len(video_ids), "queued": queued}
+    except Exception as e:
+        print(f"❌ Video check failed: {e}")
+        return f"Video check failed: {e}"
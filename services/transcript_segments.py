@@ -0,0 +1,168 @@
+"""
+Columnar transcript segments with binary-search time lookups.
+
+Segments are held as packed float arrays of start and end times plus one text block with
+per-segment character offsets, instead of a list of {start, end, text} dicts. Finding the
+segments (or text) between two timestamps is a bisect over the arrays followed by a single
+slice of the text block, so it costs O(log n) plus the size of the result.
+
+The binary form (to_bytes/from_bytes) is what gets stored next to a transcription:
+    header: magic, version, segment count
+    starts, ends: float64 x count
+    offsets: uint32 x (count + 1), character offsets into the text block
+    text: UTF-8, segment texts joined by a single space
+"""
+
+import sys
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+_MAGIC = b"TSEG"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+_SEPARATOR = " "
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+class SegmentIndex:
+    def __init__(self, starts: array, ends: array, offsets: array, text: str):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.text = text
+
+        # Running maximum of end times: segments can overlap slightly, and this keeps the
+        # "first segment that ends after t" search a bisect even then
+        self._max_ends = array("d")
+        latest_end = float("-inf")
+        for end in ends:
+            latest_end = max(latest_end, end)
+            self._max_ends.append(latest_end)
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict]) -> "SegmentIndex":
+        """Build from Whisper-style segment dicts (ordered by start time)."""
+        ordered = sorted(segments or [], key=lambda segment: float(segment["start"]))
+
+        starts = array("d")
+        ends = array("d")
+        offsets = array("I")
+        texts = []
+        position = 0
+        for segment in ordered:
+            text = (segment.get("text") or "").strip()
+            starts.append(float(segment["start"]))
+            ends.append(float(segment["end"]))
+            offsets.append(position)
+            texts.append(text)
+            position += len(text) + len(_SEPARATOR)
+        offsets.append(position)
+
+        return cls(starts, ends, offsets, _SEPARATOR.join(texts))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SegmentIndex":
+        magic, version, count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a segment index (or an unsupported version)")
+
+        position = _HEADER.size
+        starts = _from_little_endian("d", data[position:position + 8 * count])
+        position += 8 * count
+        ends = _from_little_endian("d", data[position:position + 8 * count])
+        position += 8 * count
+        offsets = _from_little_endian("I", data[position:position + 4 * (count + 1)])
+        position += 4 * (count + 1)
+
+        return cls(starts, ends, offsets, data[position:].decode("utf-8"))
+
+    def to_bytes(self) -> bytes:
+        return b"".join((
+            _HEADER.pack(_MAGIC, _VERSION, len(self.starts)),
+            _to_little_endian(self.starts),
+            _to_little_endian(self.ends),
+            _to_little_endian(self.offsets),
+            self.text.encode("utf-8")
+        ))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        return self._max_ends[-1] if len(self) else 0.0
+
+    def _segment_text(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1] - len(_SEPARATOR)]
+
+    def segment(self, index: int) -> Dict:
+        return {"start": self.starts[index], "end": self.ends[index], "text": self._segment_text(index)}
+
+    def range_indices(self, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Index range [lo, hi) of the segments overlapping the time range [start, end).
+        Either bound may be None for the start or end of the transcript.
+        """
+        lo = 0 if start is None else bisect_right(self._max_ends, start)
+        hi = len(self) if end is None else bisect_left(self.starts, end)
+        return lo, max(lo, hi)
+
+    def segments_between(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict]:
+        """Segments overlapping [start, end)."""
+        lo, hi = self.range_indices(start, end)
+        return [
+            self.segment(index) for index in range(lo, hi)
+            if start is None or self.ends[index] > start  # Overlapping segments can end before start
+        ]
+
+    def text_between(self, start: Optional[float] = None, end: Optional[float] = None) -> str:
+        """
+        Text of the segments overlapping [start, end), the same segments segments_between
+        returns. One slice of the text block unless an overlapping segment inside the range
+        ends before start and has to be left out.
+        """
+        lo, hi = self.range_indices(start, end)
+        if lo == hi:
+            return ""
+        if start is None or all(self.ends[index] > start for index in range(lo, hi)):
+            return self.text[self.offsets[lo]:self.offsets[hi] - len(_SEPARATOR)]
+        return _SEPARATOR.join(self._segment_text(index) for index in range(lo, hi) if self.ends[index] > start)
+
+    def segment_at(self, timestamp: float) -> Optional[Dict]:
+        """The segment being spoken at timestamp, if any."""
+        index = bisect_right(self.starts, timestamp) - 1
+        if index >= 0 and self.ends[index] > timestamp:
+            return self.segment(index)
+        return None
+
+def load_segment_index(transcription_id: int) -> Optional[SegmentIndex]:
+    """
+    Segment index of a saved transcription. Transcriptions saved before the index existed
+    (or whose segments were edited) are indexed from their JSON segments on first access.
+    """
+    from services import database as database_service
+
+    data = database_service.get_transcription_segment_index(transcription_id)
+    if data:
+        return SegmentIndex.from_bytes(data)
+
+    transcription = database_service.get_transcription_by_id(transcription_id)
+    if not transcription:
+        return None
+
+    index = SegmentIndex.from_segments(transcription.segments)
+    database_service.save_transcription_segment_index(transcription_id, index.to_bytes(), len(index), index.duration)
+    return index
@@ -0,0 +1,284 @@
+"""
+Watched-folder ingestion for exported videos.
+
+Watches LOCAL_VIDEO_DIR (inotify where available, otherwise directory polling), waits
+until a new video file has stopped changing for VIDEO_WATCH_STABLE_SECONDS, and queues a
+staged ingestion job for it (services/video_ingestion.py). Files with the same size and
+content hash as an already queued file are recorded as duplicates instead of being
+transcribed again; the content hash is only computed when sizes collide.
+
+Every handled file is recorded in a JSON manifest (name, size, mtime, hash, job id), so a
+restart only stats the folder: files whose size and mtime match the manifest are skipped
+without hashing or re-queuing. On the first start (no manifest yet) the files already in
+the folder are recorded as a baseline instead of being queued, and files that already
+have a transcription are never queued.
+
+Run with:
+    python -m services.video_folder_watcher
+"""
+
+import os
+import json
+import time
+import hashlib
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+load_dotenv()
+
+LOCAL_VIDEO_DIR = os.getenv("LOCAL_VIDEO_DIR", "/app/videos")
+VIDEO_WATCH_MANIFEST = os.getenv("VIDEO_WATCH_MANIFEST", "/app/watcher/manifest.json")
+VIDEO_WATCH_MODE = os.getenv("VIDEO_WATCH_MODE", "auto")  # auto, inotify or poll
+
+# A file counts as fully written once its size and mtime haven't changed for this long
+VIDEO_WATCH_STABLE_SECONDS = float(os.getenv("VIDEO_WATCH_STABLE_SECONDS", "30"))
+VIDEO_WATCH_POLL_SECONDS = float(os.getenv("VIDEO_WATCH_POLL_SECONDS", "10"))
+# inotify can miss events on some bind mounts; rescan the folder this often anyway
+VIDEO_WATCH_RESCAN_SECONDS = float(os.getenv("VIDEO_WATCH_RESCAN_SECONDS", "600"))
+VIDEO_WATCH_DESCRIBE = os.getenv("VIDEO_WATCH_DESCRIBE", "true").lower() == "true"
+# Record existing files without queuing them: "auto" only when there is no manifest yet, or true/false
+VIDEO_WATCH_BASELINE = os.getenv("VIDEO_WATCH_BASELINE", "auto").lower()
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".m4v", ".webm", ".avi"}
+PARTIAL_SUFFIXES = (".part", ".tmp", ".crdownload", ".download")
+HASH_BLOCK_SIZE = 1024 * 1024
+
+def is_video_file(name):
+    if name.startswith(".") or name.lower().endswith(PARTIAL_SUFFIXES):
+        return False
+    return os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+
+def file_content_hash(path):
+    """SHA-256 of a file, read in blocks so large videos aren't loaded into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class VideoFolderWatcher:
+    def __init__(self, directory=LOCAL_VIDEO_DIR, manifest_path=VIDEO_WATCH_MANIFEST, enqueue=None, is_transcribed=None):
+        self.directory = directory
+        self.manifest_path = manifest_path
+        self.enqueue = enqueue or _enqueue_ingestion
+        self.is_transcribed = is_transcribed or _already_transcribed
+        self.manifest_existed = os.path.exists(manifest_path)
+        self.manifest = self._load_manifest()
+        self.pending = {}  # name -> (size, mtime, monotonic time the file was last seen changing)
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error loading watch manifest, starting empty: {e}")
+            return {}
+
+    def _save_manifest(self):
+        # Write-then-rename so a crash never leaves a truncated manifest behind
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        temporary_path = f"{self.manifest_path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temporary_path, self.manifest_path)
+
+    def _is_recorded(self, name, stat):
+        entry = self.manifest.get(name)
+        return entry is not None and entry["size"] == stat.st_size and entry["mtime"] == int(stat.st_mtime)
+
+    def observe(self, name):
+        """Note a file that may be new or still being written."""
+        if not is_video_file(name):
+            return
+
+        try:
+            stat = os.stat(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            self.pending.pop(name, None)
+            return
+
+        if self._is_recorded(name, stat):
+            self.pending.pop(name, None)
+            return
+
+        previous = self.pending.get(name)
+        if previous is None or previous[:2] != (stat.st_size, stat.st_mtime):
+            self.pending[name] = (stat.st_size, stat.st_mtime, time.monotonic())
+
+    def scan(self):
+        """Stat every file in the folder (no hashing); new or changed files become pending."""
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        self.observe(entry.name)
+        except FileNotFoundError:
+            print(f"Watched folder not found: {self.directory}")
+
+    def record_baseline(self):
+        """Record every video currently in the folder as handled, without queuing anything."""
+        recorded = 0
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.is_file() or not is_video_file(entry.name) or entry.name in self.manifest:
+                        continue
+                    stat = entry.stat()
+                    self.manifest[entry.name] = {
+                        "size": stat.st_size,
+                        "mtime": int(stat.st_mtime),
+                        "sha256": None,
+                        "recorded_at": datetime.now(timezone.utc).isoformat(),
+                        "status": "baseline"
+                    }
+                    recorded += 1
+        except FileNotFoundError:
+            print(f"Watched folder not found: {self.directory}")
+            return 0
+
+        self._save_manifest()
+        print(f"Recorded {recorded} existing files as baseline (not queued)")
+        return recorded
+
+    def _should_record_baseline(self):
+        if VIDEO_WATCH_BASELINE == "auto":
+            return not self.manifest_existed
+        return VIDEO_WATCH_BASELINE == "true"
+
+    def _find_duplicate(self, name, size):
+        """Manifest entry with the same size and content as the file, if any."""
+        same_size = [other for other, entry in self.manifest.items() if entry["size"] == size and other != name]
+        if not same_size:
+            return None, None
+
+        content_hash = file_content_hash(os.path.join(self.directory, name))
+        for other in same_size:
+            entry = self.manifest[other]
+            if entry.get("sha256") is None:
+                other_path = os.path.join(self.directory, other)
+                if not os.path.exists(other_path):
+                    continue
+                entry["sha256"] = file_content_hash(other_path)
+            if entry["sha256"] == content_hash:
+                return other, content_hash
+
+        return None, content_hash
+
+    def process_pending(self):
+        """Queue files that have stopped changing."""
+        now = time.monotonic()
+        for name in list(self.pending):
+            self.observe(name)  # Refresh size/mtime; drops files that vanished
+            if name not in self.pending:
+                continue
+
+            size, mtime, changed_at = self.pending[name]
+            if now - changed_at < VIDEO_WATCH_STABLE_SECONDS:
+                continue
+
+            try:
+                duplicate_of, content_hash = self._find_duplicate(name, size)
+                entry = {
+                    "size": size,
+                    "mtime": int(mtime),
+                    "sha256": content_hash,
+                    "recorded_at": datetime.now(timezone.utc).isoformat()
+                }
+
+                if duplicate_of:
+                    print(f"Skipping {name}: same content as {duplicate_of}")
+                    entry.update(status="duplicate", duplicate_of=duplicate_of)
+                elif self.is_transcribed(name):
+                    print(f"Skipping {name}: already transcribed")
+                    entry.update(status="transcribed")
+                else:
+                    job_id = self.enqueue(name)
+                    print(f"Queued ingestion for {name} (job {job_id})")
+                    entry.update(status="queued", job_id=job_id)
+
+                self.manifest[name] = entry
+                self._save_manifest()
+                del self.pending[name]
+            except Exception as e:
+                # Left pending, so it is retried on the next pass
+                print(f"❌ Failed to queue {name}: {e}")
+
+    def _use_inotify(self):
+        if VIDEO_WATCH_MODE == "poll":
+            return False
+        if not INOTIFY_AVAILABLE:
+            if VIDEO_WATCH_MODE == "inotify":
+                print("inotify_simple is not installed, falling back to polling")
+            return False
+        return True
+
+    def run(self):
+        """Watch the folder until interrupted."""
+        if self._should_record_baseline():
+            self.record_baseline()
+        self.scan()
+
+        inotify = None
+        if self._use_inotify():
+            try:
+                inotify = INotify()
+                inotify.add_watch(self.directory, flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO)
+            except OSError as e:
+                print(f"inotify unavailable for {self.directory}, falling back to polling: {e}")
+                inotify = None
+
+        print(f"Watching {self.directory} ({'inotify' if inotify else 'polling'}), manifest {self.manifest_path}")
+
+        last_scan = time.monotonic()
+        while True:
+            if inotify:
+                for event in inotify.read(timeout=int(VIDEO_WATCH_POLL_SECONDS * 1000)):
+                    if event.name:
+                        self.observe(event.name)
+                rescan_interval = VIDEO_WATCH_RESCAN_SECONDS
+            else:
+                time.sleep(VIDEO_WATCH_POLL_SECONDS)
+                rescan_interval = 0
+
+            if time.monotonic() - last_scan >= rescan_interval:
+                self.scan()
+                last_scan = time.monotonic()
+
+            self.process_pending()
+
+def _already_transcribed(filename):
+    """Whether a local export already has a saved or cached transcription."""
+    from services import database as database_service
+    from services import youtube_transcription
+
+    if database_service.video_exists(filename):
+        return True
+    alias = youtube_transcription.local_video_alias(os.path.join(LOCAL_VIDEO_DIR, filename))
+    return database_service.get_cached_transcription_by_alias(alias) is not None
+
+def _enqueue_ingestion(filename):
+    """Queue a staged ingestion job for a local export (or reuse the active one). Returns the job id."""
+    from services import database as database_service
+    from services.tasks import start_video_ingestion
+
+    active_job = database_service.get_active_ingestion_job("local", filename)
+    if active_job:
+        return active_job["job_id"]
+
+    job = database_service.create_ingestion_job("local", filename, describe=VIDEO_WATCH_DESCRIBE)
+    if not job:
+        raise RuntimeError("Failed to create ingestion job")
+
+    start_video_ingestion(job)
+    return job["job_id"]
+
+if __name__ == "__main__":
+    VideoFolderWatcher().run()
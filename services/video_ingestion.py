@@ -0,0 +1,213 @@
+"""
+Staged video ingestion: download -> extract -> transcribe -> describe -> persist.
+
+Each stage runs as its own Celery task (see services/tasks.py) and stores its output on the
+job row before the next one starts, so a failed job is resumed from the first stage that
+hasn't completed instead of starting over. Intermediate media lives in a per-job directory
+under INGEST_WORKSPACE_ROOT, which must be shared by every worker that runs these stages.
+"""
+
+import os
+import json
+import shutil
+import asyncio
+from services import database as database_service
+from services import youtube_transcription
+from models.youtube import YouTubeTranscriptionCreate, YouTubeDescriptionCreate
+
+INGESTION_STAGES = ("download", "extract", "transcribe", "describe", "persist")
+SOURCE_TYPES = ("youtube", "local")
+
+# Per-job working directories (downloaded media, extracted audio); removed once transcribed
+INGEST_WORKSPACE_ROOT = os.getenv("INGEST_WORKSPACE_ROOT", "/app/ingest")
+
+def pending_stages(job):
+    """Stages of a job that haven't completed yet, in order."""
+    return [stage for stage in INGESTION_STAGES if stage not in (job.get("completed_stages") or [])]
+
+def _source_alias(job):
+    # Same keys transcribe_video/transcribe_local_video use for the transcription cache
+    if job["source_type"] == "youtube":
+        return job["source"]
+    return youtube_transcription.local_video_alias(job["media_path"])
+
+def _download_stage(job):
+    """Fetch the source media into the job workspace (local files are used in place)."""
+    workspace = os.path.join(INGEST_WORKSPACE_ROOT, job["job_id"])
+    os.makedirs(workspace, exist_ok=True)
+    
+    if job["source_type"] == "local":
+        media_path = os.path.join(youtube_transcription.LOCAL_VIDEO_DIR, job["source"])
+        if not os.path.isfile(media_path):
+            raise FileNotFoundError(f"Local video not found: {media_path}")
+        
+        cached = database_service.get_cached_transcription_by_alias(youtube_transcription.local_video_alias(media_path))
+        if cached:
+            return {"workspace_path": workspace, "media_path": media_path, "transcription": cached["transcription"], "segments": cached["segments"]}
+        return {"workspace_path": workspace, "media_path": media_path}
+    
+    # Already transcribed: later stages see the transcription and skip their work
+    cached = database_service.get_cached_transcription_by_alias(job["source"])
+    if cached:
+        return {"workspace_path": workspace, "transcription": cached["transcription"], "segments": cached["segments"]}
+    
+    media_path = youtube_transcription.download_youtube_audio(f"https://www.youtube.com/watch?v={job['source']}", workspace)
+    return {"workspace_path": workspace, "media_path": media_path}
+
+def _chunk_manifest_path(job):
+    return os.path.join(job["workspace_path"], "chunks.json")
+
+def _extract_stage(job, backend=None):
+    """
+    Extract mono 16 kHz speech audio, hash it and cut it into transcription chunks (all
+    ffmpeg), so the transcribe stage only waits on the backend. Same audio transcribed
+    before is taken from the transcription cache here.
+    """
+    if job["transcription"] is not None:
+        return {}
+    
+    media_path = job["media_path"]
+    if job["source_type"] == "youtube" and not (media_path and os.path.exists(media_path)):
+        # Removed by an earlier attempt whose output was never saved; fetch it again
+        os.makedirs(job["workspace_path"], exist_ok=True)
+        media_path = youtube_transcription.download_youtube_audio(f"https://www.youtube.com/watch?v={job['source']}", job["workspace_path"])
+    
+    audio_path = youtube_transcription.extract_audio(media_path, job["workspace_path"])
+    
+    audio_hash = youtube_transcription.hash_audio(audio_path)
+    cached = database_service.get_cached_transcription(audio_hash)
+    if cached:
+        print(f"Transcription cache hit for {_source_alias(job)} (audio {audio_hash[:12]})")
+        database_service.save_cached_transcription(audio_hash, cached["transcription"], cached["segments"], aliases=[_source_alias(job)])
+        outputs = {"audio_path": audio_path, "transcription": cached["transcription"], "segments": cached["segments"]}
+    else:
+        chunks = youtube_transcription.prepare_transcription_chunks(audio_path, backend)
+        with open(_chunk_manifest_path(job), "w") as f:
+            json.dump({"audio_hash": audio_hash, "chunks": chunks}, f)
+        outputs = {"audio_path": audio_path}
+    
+    # Downloaded media is only an intermediate, removed once everything above succeeded so a
+    # failed attempt can be re-run; local exports are left alone
+    if job["source_type"] == "youtube" and os.path.exists(media_path):
+        os.remove(media_path)
+    
+    return outputs
+
+def _transcribe_stage(job, backend=None):
+    """Transcribe the chunks cut by the extract stage with the chosen backend and cache the result."""
+    if job["transcription"] is None:
+        with open(_chunk_manifest_path(job)) as f:
+            manifest = json.load(f)
+        
+        text, segments = youtube_transcription.transcribe_chunks(manifest["chunks"], backend)
+        database_service.save_cached_transcription(manifest["audio_hash"], text, segments, aliases=[_source_alias(job)])
+        outputs = {"transcription": text, "segments": segments}
+    else:
+        outputs = {}
+    
+    if job["workspace_path"]:
+        shutil.rmtree(job["workspace_path"], ignore_errors=True)
+    
+    return outputs
+
+def _describe_stage(job):
+    """Generate the description and chapters from the timestamped segments."""
+    if not job["describe"] or job["description"] is not None:
+        return {}
+    
+    from ai_agents.youtube import youtube_agent_runner
+    
+    output = asyncio.run(youtube_agent_runner(job["segments"]))
+    return {"description": {"description": output.description, "chapters": output.chapters}}
+
+def _persist_stage(job):
+    """Save the transcription (and description) rows used by the rest of the app."""
+    outputs = {}
+    
+    transcription_id = job["youtube_transcription_id"]
+    if transcription_id is None:
+        transcription_id = database_service.insert_transcription(YouTubeTranscriptionCreate(
+            video_id=job["source"],
+            channel_id=job["channel_id"] or '',
+            transcription=job["transcription"],
+            segments=job["segments"],
+            used=False
+        ))
+        if transcription_id is None:
+            raise RuntimeError("Failed to save transcription")
+        
+        # Recorded right away so a retry doesn't insert the transcription twice
+        database_service.update_ingestion_job(job["job_id"], youtube_transcription_id=transcription_id)
+        outputs["youtube_transcription_id"] = transcription_id
+    
+    if job["description"] and job["youtube_description_id"] is None:
+        saved_description = database_service.save_youtube_description(YouTubeDescriptionCreate(
+            youtube_transcription_id=transcription_id,
+            video_id=job["source"],
+            description=job["description"]["description"],
+            chapters=job["description"]["chapters"]
+        ))
+        outputs["youtube_description_id"] = saved_description.id
+    
+    return outputs
+
+_STAGE_FUNCTIONS = {
+    "download": _download_stage,
+    "extract": _extract_stage,
+    "transcribe": _transcribe_stage,
+    "describe": _describe_stage,
+    "persist": _persist_stage,
+}
+
+def run_ingestion_stage(job_id, stage, backend=None):
+    """
+    Run one stage of a job and persist its output. backend only applies to the extract stage
+    (which cuts the audio the way the backend wants it) and the transcribe stage.
+    Stages that already completed are skipped, so re-queued chains are safe. A failing stage
+    marks the job failed and re-raises, which stops the Celery chain.
+    """
+    job = database_service.get_ingestion_job(job_id)
+    if not job:
+        raise ValueError(f"Ingestion job not found: {job_id}")
+    
+    if stage not in pending_stages(job):
+        return job
+    
+    database_service.update_ingestion_job(job_id, status="running", current_stage=stage, error=None)
+    
+    try:
+        if stage in ("extract", "transcribe"):
+            outputs = _STAGE_FUNCTIONS[stage](job, backend)
+        else:
+            outputs = _STAGE_FUNCTIONS[stage](job)
+    except Exception as e:
+        print(f"❌ Ingestion job {job_id} failed at {stage}: {e}")
+        database_service.update_ingestion_job(job_id, status="failed", error=f"{stage}: {e}")
+        raise
+    
+    completed_stages = (job["completed_stages"] or []) + [stage]
+    status = "completed" if not pending_stages({"completed_stages": completed_stages}) else "running"
+    
+    if not database_service.update_ingestion_job(job_id, status=status, completed_stages=completed_stages, **outputs):
+        raise RuntimeError(f"Failed to save {stage} output for ingestion job {job_id}")
+    
+    job.update(outputs, status=status, completed_stages=completed_stages)
+    return job
+
+def job_status(job):
+    """Public view of a job (stage outputs like paths and full text left out)."""
+    return {
+        "job_id": job["job_id"],
+        "source_type": job["source_type"],
+        "source": job["source"],
+        "status": job["status"],
+        "current_stage": job["current_stage"],
+        "completed_stages": job["completed_stages"] or [],
+        "pending_stages": pending_stages(job),
+        "error": job["error"],
+        "youtube_transcription_id": job["youtube_transcription_id"],
+        "youtube_description_id": job["youtube_description_id"],
+        "description": job["description"],
+        "created_at": job["created_at"].isoformat() if job["created_at"] else None,
+        "updated_at": job["updated_at"].isoformat() if job["updated_at"] else None
+    }
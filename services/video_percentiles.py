@@ -0,0 +1,206 @@
+"""
+Cross-channel percentile index for video performance.
+
+Videos in the local store (youtube_channel_videos) are grouped by category and channel
+subscriber band, and for each metric computed by youtube_analytics._calculate_video_metrics
+an equi-depth quantile sketch is built. Looking up a video's percentile rank is then a
+binary search over the sketch instead of a rerun of the multi-channel analysis.
+
+The index is rebuilt periodically by the Celery beat task in services/tasks.py.
+"""
+
+import os
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from services import database as db_service
+from services.youtube_analytics import _calculate_video_metrics, get_video_details
+
+# Metrics (from _calculate_video_metrics) covered by the index
+INDEXED_METRICS = ["views_per_day", "engagement_rate", "like_ratio"]
+
+# Lower bound of each subscriber band, ascending
+SUBSCRIBER_BANDS = [
+    (0, "under_10k"),
+    (10_000, "10k_100k"),
+    (100_000, "100k_1m"),
+    (1_000_000, "1m_plus"),
+]
+
+ALL = "all"
+
+SKETCH_SIZE = int(os.getenv("PERCENTILE_SKETCH_SIZE", "200"))  # Quantile points kept per bucket
+MIN_BUCKET_SAMPLES = int(os.getenv("PERCENTILE_MIN_BUCKET_SAMPLES", "30"))  # Smaller buckets fall back to broader ones
+PERCENTILE_INDEX_WINDOW_DAYS = int(os.getenv("PERCENTILE_INDEX_WINDOW_DAYS", "90"))
+INDEX_RELOAD_SECONDS = 600
+
+def subscriber_band(subscriber_count: Optional[int]) -> str:
+    """Map a subscriber count to its band name. Unknown channel sizes only count towards the 'all' band."""
+    if subscriber_count is None:
+        return ALL
+    band = SUBSCRIBER_BANDS[0][1]
+    for lower_bound, name in SUBSCRIBER_BANDS:
+        if subscriber_count >= lower_bound:
+            band = name
+    return band
+
+class QuantileSketch:
+    """
+    Fixed-size equi-depth summary of a distribution.
+    Stores up to `size` sorted quantile points; rank lookups are O(log size).
+    """
+
+    def __init__(self, quantiles: List[float], count: int):
+        self.quantiles = quantiles
+        self.count = count
+
+    @classmethod
+    def from_values(cls, values: List[float], size: int = SKETCH_SIZE) -> "QuantileSketch":
+        ordered = sorted(values)
+        if len(ordered) <= size:
+            return cls(ordered, len(ordered))
+
+        # Evenly spaced order statistics, always keeping the min and max
+        step = (len(ordered) - 1) / (size - 1)
+        quantiles = [ordered[round(i * step)] for i in range(size)]
+        return cls(quantiles, len(ordered))
+
+    def percentile(self, value: float) -> float:
+        """Percentile rank (0-100) of a value against the summarized distribution."""
+        points = self.quantiles
+        if not points:
+            return 0.0
+        if len(points) == 1:
+            return 50.0 if value == points[0] else (100.0 if value > points[0] else 0.0)
+
+        # Midpoint rank for ties, linear interpolation between neighbouring quantile points
+        lower = bisect_left(points, value)
+        upper = bisect_right(points, value)
+        if lower != upper:
+            position = (lower + upper - 1) / 2
+        elif lower == 0:
+            return 0.0
+        elif lower == len(points):
+            return 100.0
+        else:
+            left, right = points[lower - 1], points[lower]
+            position = (lower - 1) + (value - left) / (right - left)
+
+        return round(100.0 * position / (len(points) - 1), 1)
+
+def build_percentile_index(window_days: int = PERCENTILE_INDEX_WINDOW_DAYS) -> Dict:
+    """
+    Rebuild the percentile index from stored video metrics and persist it.
+    Each video contributes to its (category, band) bucket plus the (all, band), (category, all)
+    and (all, all) fallback buckets.
+    """
+    started = time.time()
+    current_time = datetime.now()
+    published_after = current_time - timedelta(days=window_days)
+
+    samples: Dict[tuple, Dict[str, List[float]]] = {}
+    video_count = 0
+
+    for video, subscriber_count in db_service.get_stored_videos_with_subscribers(published_after):
+        metrics = _calculate_video_metrics(video, current_time)
+        category = video.get("category_id") or ALL
+        band = subscriber_band(subscriber_count)
+        video_count += 1
+
+        for bucket in {(category, band), (ALL, band), (category, ALL), (ALL, ALL)}:
+            bucket_samples = samples.setdefault(bucket, {metric: [] for metric in INDEXED_METRICS})
+            for metric in INDEXED_METRICS:
+                bucket_samples[metric].append(metrics[metric])
+
+    rows = []
+    for (category, band), metric_values in samples.items():
+        for metric, values in metric_values.items():
+            sketch = QuantileSketch.from_values(values)
+            rows.append({
+                "category_id": category,
+                "subscriber_band": band,
+                "metric": metric,
+                "sample_count": sketch.count,
+                "quantiles": sketch.quantiles
+            })
+
+    db_service.replace_video_percentile_index(rows)
+    _index_cache["loaded_at"] = 0  # Force a reload on next lookup
+
+    return {
+        "videos_indexed": video_count,
+        "buckets": len(samples),
+        "window_days": window_days,
+        "build_time_seconds": round(time.time() - started, 2)
+    }
+
+_index_cache = {"loaded_at": 0, "sketches": {}, "built_at": None}
+
+def _load_index() -> Dict:
+    """Load the persisted index into memory, reloading at most every INDEX_RELOAD_SECONDS."""
+    if time.time() - _index_cache["loaded_at"] > INDEX_RELOAD_SECONDS:
+        sketches = {}
+        built_at = None
+        for row in db_service.get_video_percentile_index():
+            sketches[(row.category_id, row.subscriber_band, row.metric)] = QuantileSketch(row.quantiles, row.sample_count)
+            built_at = row.built_at
+        _index_cache.update(loaded_at=time.time(), sketches=sketches, built_at=built_at)
+    return _index_cache
+
+def _find_sketch(sketches: Dict, category: str, band: str, metric: str):
+    """Most specific bucket with enough samples: (category, band) -> (all, band) -> (category, all) -> (all, all)."""
+    fallback = None
+    for bucket in [(category, band), (ALL, band), (category, ALL), (ALL, ALL)]:
+        sketch = sketches.get((*bucket, metric))
+        if sketch is None:
+            continue
+        if sketch.count >= MIN_BUCKET_SAMPLES:
+            return bucket, sketch
+        fallback = fallback or (bucket, sketch)
+    return fallback or (None, None)
+
+def get_metric_percentiles(video: Dict, subscriber_count: Optional[int]) -> Dict:
+    """Percentile ranks of a video dict's metrics against the index."""
+    index = _load_index()
+    metrics = _calculate_video_metrics(video, datetime.now())
+    category = video.get("category_id") or ALL
+    band = subscriber_band(subscriber_count)
+
+    percentiles = {}
+    for metric in INDEXED_METRICS:
+        bucket, sketch = _find_sketch(index["sketches"], category, band, metric)
+        percentiles[metric] = {
+            "value": round(metrics[metric], 3),
+            "percentile": sketch.percentile(metrics[metric]) if sketch else None,
+            "bucket": {"category_id": bucket[0], "subscriber_band": bucket[1]} if bucket else None,
+            "sample_count": sketch.count if sketch else 0
+        }
+
+    return {
+        "category_id": category,
+        "subscriber_band": band,
+        "index_built_at": index["built_at"].isoformat() if index["built_at"] else None,
+        "percentiles": percentiles
+    }
+
+def get_video_percentiles(video_id: str) -> Optional[Dict]:
+    """
+    Look up a video's percentile ranks. Uses the local store when the video is there,
+    otherwise fetches the video (and channel size) from the API.
+    """
+    stored = db_service.get_stored_video_with_subscribers(video_id)
+    if stored:
+        video, subscriber_count = stored
+    else:
+        video = get_video_details(video_id)
+        if not video:
+            return None
+        video["video_id"] = video_id
+        saved_channel = db_service.get_saved_youtube_channel(channel_id=video["channel_id"])
+        subscriber_count = saved_channel.subscriber_count if saved_channel else None
+
+    result = get_metric_percentiles(video, subscriber_count)
+    result.update({"video_id": video_id, "title": video.get("title")})
+    return result
@@ -1,14 +1,37 @@
-from googleapiclient.discovery import build
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import dateutil.parser
+from services.youtube_quota import quota_manager, QuotaExceededError
 
 load_dotenv()
 
-API_KEY = os.getenv("YOUTUBE_API_KEY")
-youtube = build("youtube", "v3", developerKey=API_KEY)
+MULTI_CHANNEL_MAX_WORKERS = int(os.getenv("MULTI_CHANNEL_MAX_WORKERS", "4"))
+
+# Local video store kept up to date by the scheduled refresh (services/tasks.py)
+YOUTUBE_REFRESH_WINDOW_DAYS = int(os.getenv("YOUTUBE_REFRESH_WINDOW_DAYS", "28"))
+YOUTUBE_STORE_MAX_AGE_HOURS = float(os.getenv("YOUTUBE_STORE_MAX_AGE_HOURS", "12"))
+REFRESH_OVERLAP = timedelta(hours=1)  # Re-check uploads slightly older than the last refresh
+
+# How long saved channel metadata (name, subscribers, thumbnail) is served without a channels.list call, per priority tier
+CHANNEL_METADATA_TTL_HOURS = {1: 12, 2: 24, 3: 48, 4: 96, 5: 168}
+DEFAULT_CHANNEL_METADATA_TTL_HOURS = 24
+
+# Outlier analysis compares the last `analysis_days` against the `baseline_days` before them
+DEFAULT_ANALYSIS_DAYS = 14
+DEFAULT_BASELINE_DAYS = 14
+MIN_BASELINE_VIDEOS = 3
+
+# outlier_type -> outlier_summary key
+OUTLIER_SUMMARY_KEYS = {"viral_hit": "viral_hits", "underperformer": "underperformers"}
+
+# Quota-tracked client: charges the shared budget, rotates API keys and is safe to use from worker threads
+youtube = quota_manager.client()
+
+# Minimum cost of fetching one channel's recent videos (search.list + videos.list)
+CHANNEL_FETCH_COST = quota_manager.cost_of("youtube.search.list") + quota_manager.cost_of("youtube.videos.list")
 
 def get_latest_videos(channel_id, max_results=1):
     """Get the latest videos from a channel."""
@@ -53,7 +76,7 @@ def _parse_channel_url(url):
     
     # URL patterns with their types
     patterns = [
-        (r'youtube\.com/channel/([UC][a-zA-Z0-9_-]{22})', 'channel_id'),
+        (r'youtube\.com/channel/(UC[a-zA-Z0-9_-]{22})', 'channel_id'),
         (r'youtube\.com/@([a-zA-Z0-9_.-]+)', 'handle'),
         (r'youtube\.com/user/([a-zA-Z0-9_.-]+)', 'username'),
         (r'youtube\.com/c/([a-zA-Z0-9_.-]+)', 'custom'),
@@ -150,9 +173,11 @@ def _setup_multi_channel_analysis(channel_urls, days_back, use_saved_channels):
     from datetime import datetime, timedelta
     from services import database as db_service
     
-    # Get saved channels if none provided
+    # Get saved channels if none provided (already ordered by priority)
     if not channel_urls and use_saved_channels:
         channel_urls = db_service.get_channel_urls_for_analysis(active_only=True)
+    elif channel_urls:
+        channel_urls = _order_channels_by_priority(channel_urls)
         
     # Return early if no channels
     if not channel_urls:
@@ -186,7 +211,83 @@ def _setup_multi_channel_analysis(channel_urls, days_back, use_saved_channels):
     
     return channel_urls, results
 
-def _process_single_channel(url, cutoff_date, max_videos_per_channel, save_channels):
+def _order_channels_by_priority(channel_urls):
+    """Order channel URLs by saved priority (1=highest) so quota is spent on important channels first."""
+    from services import database as db_service
+    
+    priorities = {
+        channel.channel_url: channel.priority
+        for channel in db_service.get_saved_youtube_channels(active_only=False)
+    }
+    # Unsaved channels get the default priority; sort is stable so request order breaks ties
+    return sorted(channel_urls, key=lambda url: priorities.get(url, 1))
+
+def _saved_channel_metadata(saved_channel):
+    """Build channel metadata from a saved channel row (no API call)."""
+    return {
+        "channel_name": saved_channel.channel_name,
+        "description": saved_channel.description or "",
+        "thumbnail_url": saved_channel.thumbnail_url,
+        "subscriber_count": saved_channel.subscriber_count or 0
+    }
+
+def _is_metadata_fresh(saved_channel):
+    """Check whether a saved channel's metadata is still inside the TTL for its priority tier."""
+    if not saved_channel.last_fetched_at:
+        return False
+    
+    fetched_at = saved_channel.last_fetched_at
+    if fetched_at.tzinfo:
+        fetched_at = fetched_at.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    ttl_hours = CHANNEL_METADATA_TTL_HOURS.get(saved_channel.priority, DEFAULT_CHANNEL_METADATA_TTL_HOURS)
+    return fetched_at >= datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=ttl_hours)
+
+def refresh_stale_channel_metadata(channel_urls=None):
+    """
+    Batch-refresh metadata for saved channels whose TTL has expired (one channels.list call per 50 channels).
+    Limited to `channel_urls` when given. Returns the number of channels refreshed.
+    """
+    from services import database as db_service
+    
+    saved_channels = db_service.get_saved_youtube_channels(active_only=False)
+    if channel_urls is not None:
+        requested = set(channel_urls)
+        saved_channels = [channel for channel in saved_channels if channel.channel_url in requested]
+    
+    stale_ids = list(dict.fromkeys(channel.channel_id for channel in saved_channels if not _is_metadata_fresh(channel)))
+    
+    # Serve stale metadata rather than spend a low budget on it
+    if not stale_ids or quota_manager.is_budget_low():
+        return 0
+    
+    try:
+        metadata_by_id = get_channels_metadata(stale_ids)
+    except QuotaExceededError as e:
+        print(f"Skipping channel metadata refresh: {e}")
+        return 0
+    
+    return db_service.update_saved_channels_metadata(metadata_by_id)
+
+def _get_fresh_stored_videos(channel_id, cutoff_date, max_results):
+    """
+    Get videos from the local store if the background refresh covers the requested window and ran recently.
+    Returns None when the store can't answer the request.
+    """
+    from services import database as db_service
+    
+    sync_state = db_service.get_channel_sync_state(channel_id)
+    
+    if not sync_state:
+        return None
+    if sync_state.synced_at < datetime.now() - timedelta(hours=YOUTUBE_STORE_MAX_AGE_HOURS):
+        return None
+    if sync_state.covered_from > cutoff_date:
+        return None
+    
+    return db_service.get_stored_channel_videos(channel_id, published_after=cutoff_date, limit=max_results)
+
+def _process_single_channel(url, cutoff_date, max_videos_per_channel, save_channels, use_local_store=False):
     """Process a single YouTube channel and return its data."""
     from datetime import datetime
     from services import database as db_service
@@ -201,8 +302,33 @@ def _process_single_channel(url, cutoff_date, max_videos_per_channel, save_chann
     }
     
     try:
-        # Extract channel ID from URL
-        channel_id = extract_channel_id_from_url(url)
+        saved_channel = db_service.get_saved_youtube_channel(channel_url=url)
+        
+        # Serve saved channels from the local store kept up to date by the background refresh
+        if use_local_store and saved_channel:
+            stored_videos = _get_fresh_stored_videos(saved_channel.channel_id, cutoff_date, max_videos_per_channel)
+            if stored_videos is not None:
+                channel_data.update(_saved_channel_metadata(saved_channel))
+                channel_data.update({
+                    "channel_id": saved_channel.channel_id,
+                    "videos": stored_videos,
+                    "video_count": len(stored_videos),
+                    "saved_to_db": True,
+                    "metadata_source": "cache",
+                    "video_source": "store"
+                })
+                if save_channels:
+                    _update_channel_analysis_stats(url, len(stored_videos))
+                return channel_data
+        
+        # Skip channels we can no longer afford; lower-priority channels are processed last
+        if not quota_manager.can_afford(CHANNEL_FETCH_COST):
+            channel_data["error"] = f"Skipped {url}: YouTube API quota budget exhausted"
+            channel_data["quota_skipped"] = True
+            return channel_data
+        
+        # Extract channel ID from URL (saved channels already know theirs - resolving a handle costs 100 units)
+        channel_id = saved_channel.channel_id if saved_channel else extract_channel_id_from_url(url)
         
         if not channel_id:
             channel_data["error"] = f"Could not extract channel ID from URL: {url}"
@@ -210,8 +336,13 @@ def _process_single_channel(url, cutoff_date, max_videos_per_channel, save_chann
         
         channel_data["channel_id"] = channel_id
         
-        # Get channel metadata
-        channel_metadata = get_channel_metadata(channel_id)
+        # Serve metadata from the saved row while it is fresh (or when the budget runs low)
+        if saved_channel and (_is_metadata_fresh(saved_channel) or quota_manager.is_budget_low()):
+            channel_metadata = _saved_channel_metadata(saved_channel)
+            channel_data["metadata_source"] = "cache"
+        else:
+            channel_metadata = get_channel_metadata(channel_id)
+            channel_data["metadata_source"] = "api"
         
         if not channel_metadata:
             channel_data["error"] = f"Channel not found: {channel_id}"
@@ -220,9 +351,11 @@ def _process_single_channel(url, cutoff_date, max_videos_per_channel, save_chann
         # Add metadata to channel data
         channel_data.update(channel_metadata)
         
-        # Save channel to database if requested
-        if save_channels:
+        # Save channel to database if requested (nothing new to save when served from cache)
+        if save_channels and channel_data["metadata_source"] == "api":
             _save_channel_to_database(url, channel_id, channel_metadata, channel_data)
+        elif saved_channel:
+            channel_data["saved_to_db"] = True
         
         # Get videos from this channel
         videos = get_recent_videos_from_channel(
@@ -233,11 +366,17 @@ def _process_single_channel(url, cutoff_date, max_videos_per_channel, save_chann
         
         channel_data["videos"] = videos
         channel_data["video_count"] = len(videos)
+        channel_data["video_source"] = "api"
         
-        # Update channel stats if saved
+        # Update channel stats if saved, keeping the local store current with what we just fetched
         if save_channels and channel_data.get("saved_to_db"):
+            db_service.upsert_channel_videos(channel_id, videos)
+            _update_outlier_baselines(channel_id, videos)
             _update_channel_analysis_stats(url, len(videos))
     
+    except QuotaExceededError as e:
+        channel_data["error"] = f"Skipped {url}: {str(e)}"
+        channel_data["quota_skipped"] = True
     except Exception as e:
         channel_data["error"] = f"Error processing channel {url}: {str(e)}"
     
@@ -287,7 +426,7 @@ def _compile_channel_summary(channel_urls, results):
     }
     return results
 
-def get_videos_from_multiple_channels(channel_urls=None, days_back=14, max_videos_per_channel=50, save_channels=True, use_saved_channels=True):
+def get_videos_from_multiple_channels(channel_urls=None, days_back=14, max_videos_per_channel=50, save_channels=True, use_saved_channels=True, progress_callback=None, use_local_store=False):
     """
     Get videos from multiple YouTube channels within a specified date range.
     If no channel_urls provided, uses saved channels from database.
@@ -298,6 +437,8 @@ def get_videos_from_multiple_channels(channel_urls=None, days_back=14, max_video
         max_videos_per_channel (int): Maximum videos to fetch per channel
         save_channels (bool): Whether to save channels to database for future use
         use_saved_channels (bool): Whether to use saved channels if no URLs provided
+        progress_callback (callable): Optional callback(completed, total, channel_data) called after each channel
+        use_local_store (bool): Read saved channels from the locally refreshed video store when it is fresh
     
     Returns:
         dict: Results with channel info and videos
@@ -313,13 +454,16 @@ def get_videos_from_multiple_channels(channel_urls=None, days_back=14, max_video
     if channel_urls is None:
         return results
     
+    # Refresh expired saved metadata in batches instead of one channels.list call per channel
+    refresh_stale_channel_metadata(channel_urls)
+    
     # Calculate cutoff date for video filtering
     cutoff_date = datetime.now() - timedelta(days=days_back)
     
     # Process each channel
-    for url in channel_urls:
+    for index, url in enumerate(channel_urls):
         channel_data = _process_single_channel(
-            url, cutoff_date, max_videos_per_channel, save_channels
+            url, cutoff_date, max_videos_per_channel, save_channels, use_local_store
         )
         
         # Add video count to total
@@ -327,6 +471,9 @@ def get_videos_from_multiple_channels(channel_urls=None, days_back=14, max_video
             results["total_videos"] += len(channel_data.get("videos", []))
         
         results["channels"].append(channel_data)
+        
+        if progress_callback:
+            progress_callback(index + 1, len(channel_urls), channel_data)
     
     # Compile and return final results
     return _compile_channel_summary(channel_urls, results)
@@ -351,37 +498,83 @@ def get_channel_metadata(channel_id):
         if not channel_response.get("items"):
             return None
         
-        channel_info = channel_response["items"][0]
-        snippet = channel_info["snippet"]
-        statistics = channel_info["statistics"]
-        
-        metadata = {
-            "channel_name": snippet["title"],
-            "description": snippet.get("description", "")[:1000],  # Limit description length
-            "thumbnail_url": snippet["thumbnails"]["medium"]["url"] if "medium" in snippet["thumbnails"] else snippet["thumbnails"]["default"]["url"],
-            "subscriber_count": int(statistics.get("subscriberCount", 0)),
-            "video_count": int(statistics.get("videoCount", 0)),
-            "view_count": int(statistics.get("viewCount", 0)),
-            "custom_url": snippet.get("customUrl", ""),
-            "country": snippet.get("country", ""),
-            "published_at": snippet.get("publishedAt", "")
-        }
-        
-        # Add branding info if available
-        if "brandingSettings" in channel_info:
-            branding = channel_info["brandingSettings"]
-            if "channel" in branding:
-                metadata.update({
-                    "keywords": branding["channel"].get("keywords", ""),
-                    "banner_url": branding.get("image", {}).get("bannerExternalUrl", "")
-                })
-        
-        return metadata
+        return _parse_channel_item(channel_response["items"][0])
         
+    except QuotaExceededError:
+        raise
     except Exception as e:
         print(f"Error getting channel metadata for {channel_id}: {e}")
         return None
 
+def _parse_channel_item(channel_info):
+    """Convert a channels.list item into the channel metadata dict."""
+    snippet = channel_info["snippet"]
+    statistics = channel_info["statistics"]
+    
+    metadata = {
+        "channel_name": snippet["title"],
+        "description": snippet.get("description", "")[:1000],  # Limit description length
+        "thumbnail_url": snippet["thumbnails"]["medium"]["url"] if "medium" in snippet["thumbnails"] else snippet["thumbnails"]["default"]["url"],
+        "subscriber_count": int(statistics.get("subscriberCount", 0)),
+        "video_count": int(statistics.get("videoCount", 0)),
+        "view_count": int(statistics.get("viewCount", 0)),
+        "custom_url": snippet.get("customUrl", ""),
+        "country": snippet.get("country", ""),
+        "published_at": snippet.get("publishedAt", "")
+    }
+    
+    # Add branding info if available
+    if "brandingSettings" in channel_info:
+        branding = channel_info["brandingSettings"]
+        if "channel" in branding:
+            metadata.update({
+                "keywords": branding["channel"].get("keywords", ""),
+                "banner_url": branding.get("image", {}).get("bannerExternalUrl", "")
+            })
+    
+    return metadata
+
+def get_channels_metadata(channel_ids):
+    """
+    Get metadata for many channels, 50 ids per channels.list call (1 quota unit each).
+    Returns {channel_id: metadata}; channels that don't exist are left out.
+    """
+    metadata_by_id = {}
+    
+    for start in range(0, len(channel_ids), 50):
+        try:
+            response = youtube.channels().list(
+                part="snippet,statistics,brandingSettings",
+                id=",".join(channel_ids[start:start + 50])
+            ).execute()
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            print(f"Error getting channel metadata batch: {e}")
+            continue
+        
+        for channel_info in response.get("items", []):
+            metadata_by_id[channel_info["id"]] = _parse_channel_item(channel_info)
+    
+    return metadata_by_id
+
+def _parse_video_item(video):
+    """Convert a videos.list item into the video dict used throughout the analysis."""
+    return {
+        "video_id": video["id"],
+        "title": video["snippet"]["title"],
+        "description": video["snippet"]["description"][:500] + "..." if len(video["snippet"]["description"]) > 500 else video["snippet"]["description"],
+        "published_at": video["snippet"]["publishedAt"],
+        "thumbnail": video["snippet"]["thumbnails"]["medium"]["url"] if "medium" in video["snippet"]["thumbnails"] else video["snippet"]["thumbnails"]["default"]["url"],
+        "duration": video["contentDetails"]["duration"],
+        "view_count": int(video["statistics"].get("viewCount", 0)),
+        "like_count": int(video["statistics"].get("likeCount", 0)),
+        "comment_count": int(video["statistics"].get("commentCount", 0)),
+        "video_url": f"https://www.youtube.com/watch?v={video['id']}",
+        "tags": video["snippet"].get("tags", [])[:10],  # Limit tags
+        "category_id": video["snippet"]["categoryId"]
+    }
+
 def get_recent_videos_from_channel(channel_id, cutoff_date, max_results=50):
     """
     Get recent videos from a single channel within the cutoff date.
@@ -416,27 +609,15 @@ def get_recent_videos_from_channel(channel_id, cutoff_date, max_results=50):
             published_date = dateutil.parser.parse(video["snippet"]["publishedAt"]).replace(tzinfo=None)
             
             if published_date >= cutoff_date:
-                video_data = {
-                    "video_id": video["id"],
-                    "title": video["snippet"]["title"],
-                    "description": video["snippet"]["description"][:500] + "..." if len(video["snippet"]["description"]) > 500 else video["snippet"]["description"],
-                    "published_at": video["snippet"]["publishedAt"],
-                    "thumbnail": video["snippet"]["thumbnails"]["medium"]["url"] if "medium" in video["snippet"]["thumbnails"] else video["snippet"]["thumbnails"]["default"]["url"],
-                    "duration": video["contentDetails"]["duration"],
-                    "view_count": int(video["statistics"].get("viewCount", 0)),
-                    "like_count": int(video["statistics"].get("likeCount", 0)),
-                    "comment_count": int(video["statistics"].get("commentCount", 0)),
-                    "video_url": f"https://www.youtube.com/watch?v={video['id']}",
-                    "tags": video["snippet"].get("tags", [])[:10],  # Limit tags
-                    "category_id": video["snippet"]["categoryId"]
-                }
-                videos.append(video_data)
+                videos.append(_parse_video_item(video))
         
         # Sort by publish date (most recent first)
         videos.sort(key=lambda x: x["published_at"], reverse=True)
         
         return videos
         
+    except QuotaExceededError:
+        raise
     except Exception as e:
         print(f"Error getting videos from channel {channel_id}: {e}")
         return []
@@ -475,43 +656,51 @@ def get_video_details(video_id):
         print(f"Error getting video details for {video_id}: {str(e)}")
         return None
 
-def _prepare_outlier_analysis_data(channel_urls, use_saved_channels, video_data):
+def _prepare_outlier_analysis_data(channel_urls, use_saved_channels, video_data, progress_callback=None, use_local_store=False,
+                                   analysis_days=DEFAULT_ANALYSIS_DAYS, baseline_days=DEFAULT_BASELINE_DAYS):
     """Prepare and validate data for outlier analysis."""
     from datetime import datetime, timedelta
     import dateutil.parser
     
+    window_days = analysis_days + baseline_days
+    
     # Use provided video data or fetch new data if none provided
     if video_data is None:
         video_data = get_videos_from_multiple_channels(
             channel_urls=channel_urls,
-            days_back=28,
+            days_back=window_days,
             max_videos_per_channel=100,
             save_channels=True,
-            use_saved_channels=use_saved_channels
+            use_saved_channels=use_saved_channels,
+            progress_callback=progress_callback,
+            use_local_store=use_local_store
         )
     else:
-        # Check if we have enough baseline data (videos older than 14 days)
+        # Check if we have enough baseline data (videos older than the analysis window)
         current_time = datetime.now()
-        cutoff_14_days = current_time - timedelta(days=14)
         
         needs_baseline_data = False
         for channel in video_data.get("channels", []):
             if channel.get("videos"):
                 baseline_count = sum(1 for video in channel["videos"] 
-                                   if _get_days_since_published(video, current_time) >= 14)
-                if baseline_count < 3:
+                                   if _get_days_since_published(video, current_time) >= analysis_days)
+                if baseline_count < MIN_BASELINE_VIDEOS:
                     needs_baseline_data = True
                     break
         
-        # Fetch 28 days if we need more baseline data
-        if needs_baseline_data:
-            print("DEBUG: Provided video_data lacks sufficient baseline data, fetching 28 days...")
+        # Fetch the full window if we need more baseline data (skipped when the quota budget runs low)
+        if needs_baseline_data and quota_manager.is_budget_low():
+            print(f"DEBUG: Skipping {window_days}-day baseline refetch, YouTube API quota budget is low")
+        elif needs_baseline_data:
+            print(f"DEBUG: Provided video_data lacks sufficient baseline data, fetching {window_days} days...")
             video_data = get_videos_from_multiple_channels(
                 channel_urls=channel_urls,
-                days_back=28,
+                days_back=window_days,
                 max_videos_per_channel=100,
                 save_channels=True,
-                use_saved_channels=use_saved_channels
+                use_saved_channels=use_saved_channels,
+                progress_callback=progress_callback,
+                use_local_store=use_local_store
             )
     
     return video_data
@@ -525,20 +714,23 @@ def _get_days_since_published(video, current_time):
     except:
         return 0
 
-def _separate_videos_by_period(videos, current_time):
-    """Separate videos into baseline (15-28 days) and analysis (1-14 days) periods."""
+def _separate_videos_by_period(videos, current_time, analysis_days=DEFAULT_ANALYSIS_DAYS, baseline_days=DEFAULT_BASELINE_DAYS):
+    """Separate videos into baseline (default days 15-28) and analysis (default days 1-14) periods."""
     baseline_videos = []
     analysis_videos = []
     
     for video in videos:
         days_since_published = _get_days_since_published(video, current_time)
-        if days_since_published >= 14:
-            baseline_videos.append(video)
-        else:
+        if days_since_published < analysis_days:
             analysis_videos.append(video)
+        elif days_since_published < analysis_days + baseline_days:
+            baseline_videos.append(video)
     
     return baseline_videos, analysis_videos
 
+def _outlier_period_description(analysis_days, baseline_days):
+    return f"Last {analysis_days} days vs Days {analysis_days + 1}-{analysis_days + baseline_days} baseline"
+
 def _calculate_video_metrics(video, current_time):
     """Calculate key metrics for a video."""
     days_since_published = max(1, _get_days_since_published(video, current_time))
@@ -558,21 +750,19 @@ def _calculate_video_metrics(video, current_time):
     }
 
 def _calculate_baseline_statistics(baseline_videos, current_time):
-    """Calculate baseline statistics from historical videos."""
+    """Calculate baseline statistics from historical videos in a single pass (Welford running statistics)."""
     import statistics
+    from services.outlier_baselines import RunningStats, BASELINE_METRICS
     
+    running_stats = {metric: RunningStats() for metric in BASELINE_METRICS}
     baseline_views_per_day = []
-    baseline_engagement_rates = []
-    baseline_like_ratios = []
-    baseline_comment_ratios = []
     
     for video in baseline_videos:
         try:
             metrics = _calculate_video_metrics(video, current_time)
+            for metric in BASELINE_METRICS:
+                running_stats[metric].add(metrics[metric])
             baseline_views_per_day.append(metrics["views_per_day"])
-            baseline_engagement_rates.append(metrics["engagement_rate"])
-            baseline_like_ratios.append(metrics["like_ratio"])
-            baseline_comment_ratios.append(metrics["comment_ratio"])
         except Exception as e:
             print(f"Error processing baseline video {video.get('video_id', 'unknown')}: {e}")
             continue
@@ -580,26 +770,13 @@ def _calculate_baseline_statistics(baseline_videos, current_time):
     if not baseline_views_per_day:
         return None
     
-    return {
-        "views_per_day": {
-            "mean": statistics.mean(baseline_views_per_day),
-            "median": statistics.median(baseline_views_per_day),
-            "std_dev": statistics.stdev(baseline_views_per_day) if len(baseline_views_per_day) > 1 else 0
-        },
-        "engagement_rate": {
-            "mean": statistics.mean(baseline_engagement_rates),
-            "std_dev": statistics.stdev(baseline_engagement_rates) if len(baseline_engagement_rates) > 1 else 0
-        },
-        "like_ratio": {
-            "mean": statistics.mean(baseline_like_ratios),
-            "std_dev": statistics.stdev(baseline_like_ratios) if len(baseline_like_ratios) > 1 else 0
-        },
-        "comment_ratio": {
-            "mean": statistics.mean(baseline_comment_ratios),
-            "std_dev": statistics.stdev(baseline_comment_ratios) if len(baseline_comment_ratios) > 1 else 0
-        },
-        "baseline_video_count": len(baseline_videos)
+    baseline_stats = {
+        metric: {"mean": stats.mean, "std_dev": stats.std_dev}
+        for metric, stats in running_stats.items()
     }
+    baseline_stats["views_per_day"]["median"] = statistics.median(baseline_views_per_day)
+    baseline_stats["baseline_video_count"] = len(baseline_videos)
+    return baseline_stats
 
 def _classify_outlier_type(views_z_score):
     """Classify outlier type and confidence level based on z-score."""
@@ -701,14 +878,106 @@ def _compile_outlier_results(analysis_results):
     
     return analysis_results
 
-def analyze_video_outliers(channel_urls=None, use_saved_channels=True, video_data=None):
+def _get_persisted_baseline_statistics(channel_id, analysis_days, baseline_days):
+    """Baseline statistics from the channel's persisted running baseline, or None if it is too small."""
+    from services.outlier_baselines import load_channel_baseline
+    
+    if not channel_id:
+        return None
+    
+    try:
+        baseline = load_channel_baseline(channel_id, analysis_days, baseline_days)
+    except Exception as e:
+        print(f"Error loading persisted baseline for {channel_id}: {e}")
+        return None
+    
+    if not baseline or baseline.video_count < MIN_BASELINE_VIDEOS:
+        return None
+    return baseline.statistics()
+
+def _update_outlier_baselines(channel_id, videos):
+    """Feed freshly stored video snapshots into the channel's running baselines."""
+    from services.outlier_baselines import update_channel_baselines
+    
+    try:
+        update_channel_baselines(channel_id, videos)
+    except Exception as e:
+        print(f"Error updating outlier baselines for {channel_id}: {e}")
+
+def _analyze_channel_outliers(channel, current_time, analysis_days=DEFAULT_ANALYSIS_DAYS, baseline_days=DEFAULT_BASELINE_DAYS):
+    """Run outlier analysis for a single channel's videos. Returns None if the channel has nothing to analyze."""
+    if channel.get("error") or not channel.get("videos"):
+        return None
+        
+    # Setup channel analysis structure
+    channel_analysis = {
+        "channel_id": channel["channel_id"],
+        "channel_name": channel["channel_name"],
+        "channel_url": channel["url"],
+        "subscriber_count": channel.get("subscriber_count", 0),
+        "videos_analyzed": [],
+        "baseline_stats": {},
+        "outlier_summary": {
+            "viral_hits": 0,
+            "underperformers": 0,
+            "trending_up": 0,
+            "trending_down": 0,
+            "normal": 0
+        }
+    }
+    
+    # Separate videos into baseline and analysis periods
+    baseline_videos, analysis_videos = _separate_videos_by_period(channel["videos"], current_time, analysis_days, baseline_days)
+    
+    if len(baseline_videos) >= MIN_BASELINE_VIDEOS:
+        baseline_stats = _calculate_baseline_statistics(baseline_videos, current_time)
+    else:
+        # Fall back to the channel's persisted running baseline before giving up
+        baseline_stats = _get_persisted_baseline_statistics(channel.get("channel_id"), analysis_days, baseline_days)
+        if not baseline_stats:
+            channel_analysis["error"] = (
+                f"Not enough baseline videos ({len(baseline_videos)}). "
+                f"Need at least {MIN_BASELINE_VIDEOS} videos from days {analysis_days + 1}-{analysis_days + baseline_days}."
+            )
+            return channel_analysis
+        channel_analysis["baseline_source"] = "store"
+    
+    
+    if not baseline_stats:
+        channel_analysis["error"] = "Could not calculate baseline statistics"
+        return channel_analysis
+    
+    channel_analysis["baseline_stats"] = baseline_stats
+    
+    # Analyze each video from the analysis window
+    for video in analysis_videos:
+        try:
+            video_analysis = _analyze_single_video_outlier(video, baseline_stats, current_time)
+            outlier_type = video_analysis["outlier_analysis"]["outlier_type"]
+            
+            channel_analysis["videos_analyzed"].append(video_analysis)
+            channel_analysis["outlier_summary"][OUTLIER_SUMMARY_KEYS.get(outlier_type, outlier_type)] += 1
+            
+        except Exception as e:
+            print(f"Error analyzing video {video.get('video_id', 'unknown')}: {e}")
+            continue
+    
+    return channel_analysis
+
+def analyze_video_outliers(channel_urls=None, use_saved_channels=True, video_data=None, progress_callback=None, use_local_store=False,
+                           analysis_days=DEFAULT_ANALYSIS_DAYS, baseline_days=DEFAULT_BASELINE_DAYS):
     """
-    Analyze video outliers by comparing last 14 days against previous 14 days baseline.
+    Analyze video outliers by comparing the last `analysis_days` against the `baseline_days` before them
+    (default: last 14 days against the previous 14 days).
     
     Args:
         channel_urls (list): List of YouTube channel URLs (if None, uses saved channels)
         use_saved_channels (bool): Whether to use saved channels if no URLs provided
-        video_data (dict): Pre-fetched video data to analyze (if None, will fetch 28 days of data)
+        video_data (dict): Pre-fetched video data to analyze (if None, will fetch analysis + baseline days of data)
+        progress_callback (callable): Optional per-channel callback used if data has to be (re)fetched
+        use_local_store (bool): Read (re)fetched data from the local video store when it is fresh
+        analysis_days (int): Length of the analysis window (days 1-N)
+        baseline_days (int): Length of the baseline window that follows it
     
     Returns:
         dict: Outlier analysis results with channel data and outlier classifications
@@ -716,7 +985,8 @@ def analyze_video_outliers(channel_urls=None, use_saved_channels=True, video_dat
     from datetime import datetime, timedelta
     
     # Prepare and validate data
-    video_data = _prepare_outlier_analysis_data(channel_urls, use_saved_channels, video_data)
+    video_data = _prepare_outlier_analysis_data(channel_urls, use_saved_channels, video_data, progress_callback, use_local_store,
+                                                analysis_days, baseline_days)
     
     if not video_data.get("channels"):
         return {
@@ -735,8 +1005,8 @@ def analyze_video_outliers(channel_urls=None, use_saved_channels=True, video_dat
             "total_videos_analyzed": 0,
             "total_outliers_found": 0,
             "analysis_period": {
-                "baseline_period": "Days 15-28",
-                "analysis_period": "Days 1-14",
+                "baseline_period": f"Days {analysis_days + 1}-{analysis_days + baseline_days}",
+                "analysis_period": f"Days 1-{analysis_days}",
                 "current_time": current_time.isoformat()
             }
         }
@@ -744,59 +1014,342 @@ def analyze_video_outliers(channel_urls=None, use_saved_channels=True, video_dat
     
     # Process each channel
     for channel in video_data["channels"]:
-        if channel.get("error") or not channel.get("videos"):
-            continue
-            
-        # Setup channel analysis structure
-        channel_analysis = {
-            "channel_id": channel["channel_id"],
-            "channel_name": channel["channel_name"],
-            "channel_url": channel["url"],
-            "subscriber_count": channel.get("subscriber_count", 0),
-            "videos_analyzed": [],
-            "baseline_stats": {},
-            "outlier_summary": {
-                "viral_hits": 0,
-                "underperformers": 0,
-                "trending_up": 0,
-                "trending_down": 0,
-                "normal": 0
-            }
+        channel_analysis = _analyze_channel_outliers(channel, current_time, analysis_days, baseline_days)
+        if channel_analysis is not None:
+            analysis_results["channels"].append(channel_analysis)
+    
+    # Compile final results with summary statistics
+    return _compile_outlier_results(analysis_results) 
+
+def get_multi_channel_analysis_cache_key(channel_urls=None, days_back=14, max_videos_per_channel=50, save_channels=True, use_saved_channels=True, use_local_store=False,
+                                        analysis_days=DEFAULT_ANALYSIS_DAYS, baseline_days=DEFAULT_BASELINE_DAYS):
+    """
+    Build a stable cache key for a multi-channel analysis request.
+    Saved channels are resolved first so the key changes when the saved list changes.
+    """
+    import hashlib
+    import json
+    from services import database as db_service
+    
+    if not channel_urls and use_saved_channels:
+        channel_urls = db_service.get_channel_urls_for_analysis(active_only=True)
+    
+    key_data = {
+        "channel_urls": sorted(url.strip() for url in (channel_urls or [])),
+        "days_back": days_back,
+        "max_videos_per_channel": max_videos_per_channel,
+        "use_local_store": use_local_store,
+        "analysis_days": analysis_days,
+        "baseline_days": baseline_days
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+def run_multi_channel_analysis(channel_urls=None, days_back=14, max_videos_per_channel=50, save_channels=True, use_saved_channels=True, progress_callback=None, use_local_store=False,
+                               analysis_days=DEFAULT_ANALYSIS_DAYS, baseline_days=DEFAULT_BASELINE_DAYS):
+    """
+    Run the full multi-channel pipeline: fetch videos, then run outlier analysis on the fetched data.
+    
+    Args:
+        progress_callback (callable): Optional callback(stage, completed, total, channel_data)
+    
+    Returns:
+        dict: Combined video data, outlier analysis and analysis metadata
+    """
+    def _stage_callback(stage):
+        if not progress_callback:
+            return None
+        return lambda completed, total, channel_data: progress_callback(stage, completed, total, channel_data)
+    
+    # Get video data from channels
+    video_results = get_videos_from_multiple_channels(
+        channel_urls=channel_urls,
+        days_back=days_back,
+        max_videos_per_channel=max_videos_per_channel,
+        save_channels=save_channels,
+        use_saved_channels=use_saved_channels,
+        progress_callback=_stage_callback("fetching_videos"),
+        use_local_store=use_local_store
+    )
+    
+    # Perform outlier analysis using the already-fetched video data
+    # This avoids double API calls and saves ~50% quota usage
+    outlier_results = analyze_video_outliers(
+        channel_urls=channel_urls,
+        use_saved_channels=use_saved_channels,
+        video_data=video_results,
+        progress_callback=_stage_callback("fetching_baseline"),
+        use_local_store=use_local_store,
+        analysis_days=analysis_days,
+        baseline_days=baseline_days
+    )
+    
+    return {
+        "video_data": video_results,
+        "outlier_analysis": outlier_results,
+        "analysis_metadata": {
+            "days_back_requested": days_back,
+            "max_videos_per_channel": max_videos_per_channel,
+            "save_channels": save_channels,
+            "use_saved_channels": use_saved_channels,
+            "use_local_store": use_local_store,
+            "outlier_analysis_period": _outlier_period_description(analysis_days, baseline_days)
         }
+    }
+
+def _process_channel_for_stream(url, cutoff_date, max_videos_per_channel, save_channels, use_local_store=False,
+                                analysis_days=DEFAULT_ANALYSIS_DAYS, baseline_days=DEFAULT_BASELINE_DAYS):
+    """Fetch a single channel and run its outlier analysis, fetching the full baseline window if needed."""
+    channel_data = _process_single_channel(url, cutoff_date, max_videos_per_channel, save_channels, use_local_store)
+    
+    if channel_data.get("error") or not channel_data.get("videos"):
+        return channel_data, None
+    
+    current_time = datetime.now()
+    outlier_channel = channel_data
+    
+    # Mirror _prepare_outlier_analysis_data, but only refetch the channel that lacks baseline data
+    baseline_count = sum(1 for video in channel_data["videos"]
+                         if _get_days_since_published(video, current_time) >= analysis_days)
+    if baseline_count < MIN_BASELINE_VIDEOS:
+        baseline_cutoff = current_time - timedelta(days=analysis_days + baseline_days)
+        stored_videos = _get_fresh_stored_videos(channel_data["channel_id"], baseline_cutoff, 100) if use_local_store else None
         
-        # Separate videos into baseline and analysis periods
-        baseline_videos, analysis_videos = _separate_videos_by_period(channel["videos"], current_time)
-        
-        # Check for sufficient baseline data
-        if len(baseline_videos) < 3:
-            channel_analysis["error"] = f"Not enough baseline videos ({len(baseline_videos)}). Need at least 3 videos from days 15-28."
-            analysis_results["channels"].append(channel_analysis)
-            continue
+        if stored_videos is not None:
+            outlier_channel = dict(channel_data, videos=stored_videos)
+        elif not quota_manager.is_budget_low():
+            outlier_channel = dict(channel_data, videos=get_recent_videos_from_channel(
+                channel_data["channel_id"],
+                baseline_cutoff,
+                100
+            ))
+    
+    channel_analysis = _analyze_channel_outliers(outlier_channel, current_time, analysis_days, baseline_days)
+    if channel_analysis and channel_analysis["videos_analyzed"]:
+        channel_analysis["videos_analyzed"].sort(
+            key=lambda x: abs(x["outlier_analysis"]["views_z_score"]),
+            reverse=True
+        )
+    
+    return channel_data, channel_analysis
+
+def iter_multi_channel_analysis(channel_urls=None, days_back=14, max_videos_per_channel=50, save_channels=True, use_saved_channels=True, use_local_store=False, max_workers=None,
+                                analysis_days=DEFAULT_ANALYSIS_DAYS, baseline_days=DEFAULT_BASELINE_DAYS):
+    """
+    Streaming variant of run_multi_channel_analysis.
+    Channels are processed concurrently and a record is yielded as soon as each channel completes,
+    followed by a final summary record.
+    
+    Yields:
+        dict: {"type": "channel", ...} per channel, then one {"type": "summary", ...}
+    """
+    channel_urls, results = _setup_multi_channel_analysis(
+        channel_urls, days_back, use_saved_channels
+    )
+    
+    analysis_metadata = {
+        "days_back_requested": days_back,
+        "max_videos_per_channel": max_videos_per_channel,
+        "save_channels": save_channels,
+        "use_saved_channels": use_saved_channels,
+        "use_local_store": use_local_store,
+        "outlier_analysis_period": _outlier_period_description(analysis_days, baseline_days)
+    }
+    
+    # Nothing to analyze
+    if channel_urls is None:
+        yield {
+            "type": "summary",
+            "video_summary": results["summary"],
+            "outlier_summary": {},
+            "analysis_metadata": analysis_metadata,
+            "message": results["message"]
+        }
+        return
+    
+    refresh_stale_channel_metadata(channel_urls)
+    
+    cutoff_date = datetime.now() - timedelta(days=days_back)
+    
+    outlier_results = {
+        "channels": [],
+        "analysis_summary": {
+            "total_channels": len(channel_urls),
+            "channels_with_outliers": 0,
+            "total_videos_analyzed": 0,
+            "total_outliers_found": 0,
+            "analysis_period": {
+                "baseline_period": f"Days {analysis_days + 1}-{analysis_days + baseline_days}",
+                "analysis_period": f"Days 1-{analysis_days}",
+                "current_time": datetime.now().isoformat()
+            }
+        }
+    }
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers or MULTI_CHANNEL_MAX_WORKERS)
+    futures = {
+        executor.submit(_process_channel_for_stream, url, cutoff_date, max_videos_per_channel, save_channels, use_local_store,
+                        analysis_days, baseline_days): url
+        for url in channel_urls
+    }
+    
+    try:
+        for completed, future in enumerate(as_completed(futures), start=1):
+            url = futures[future]
+            try:
+                channel_data, channel_analysis = future.result()
+            except Exception as e:
+                channel_data = {"url": url, "channel_id": None, "channel_name": None, "videos": [],
+                                "error": f"Error processing channel {url}: {str(e)}", "saved_to_db": False}
+                channel_analysis = None
+            
+            if not channel_data.get("error"):
+                results["total_videos"] += len(channel_data.get("videos", []))
+            results["channels"].append(channel_data)
+            
+            if channel_analysis is not None:
+                outlier_results["channels"].append(channel_analysis)
+            
+            yield {
+                "type": "channel",
+                "completed": completed,
+                "total": len(channel_urls),
+                "url": url,
+                "video_data": channel_data,
+                "outlier_analysis": channel_analysis
+            }
+    finally:
+        # Stop queued channels if the client disconnects mid-stream
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    yield {
+        "type": "summary",
+        "video_summary": _compile_channel_summary(channel_urls, results)["summary"],
+        "outlier_summary": _compile_outlier_results(outlier_results)["analysis_summary"],
+        "date_range": results["date_range"],
+        "analysis_metadata": analysis_metadata
+    }
+
+def get_videos_by_ids(video_ids):
+    """Get full video data for a list of video IDs, 50 per videos.list call (1 quota unit each)."""
+    videos = []
+    for start in range(0, len(video_ids), 50):
+        response = youtube.videos().list(
+            part="snippet,statistics,contentDetails",
+            id=",".join(video_ids[start:start + 50])
+        ).execute()
+        videos.extend(_parse_video_item(item) for item in response.get("items", []))
+    return videos
+
+def get_channel_upload_ids_since(channel_id, since, max_results=500):
+    """
+    Get IDs of uploads published after `since`, newest first.
+    Pages through the channel's uploads playlist (1 quota unit per page) instead of search.list (100 units).
+    """
+    uploads_playlist_id = "UU" + channel_id[2:]
+    video_ids = []
+    page_token = None
+    
+    while len(video_ids) < max_results:
+        response = youtube.playlistItems().list(
+            part="contentDetails",
+            playlistId=uploads_playlist_id,
+            maxResults=50,
+            pageToken=page_token
+        ).execute()
         
-        # Calculate baseline statistics
-        baseline_stats = _calculate_baseline_statistics(baseline_videos, current_time)
+        reached_older_uploads = False
+        for item in response.get("items", []):
+            published_at = item["contentDetails"].get("videoPublishedAt")
+            if not published_at:
+                continue  # Private or deleted video
+            if dateutil.parser.parse(published_at).replace(tzinfo=None) < since:
+                reached_older_uploads = True
+                break
+            video_ids.append(item["contentDetails"]["videoId"])
         
-        if not baseline_stats:
-            channel_analysis["error"] = "Could not calculate baseline statistics"
-            analysis_results["channels"].append(channel_analysis)
+        page_token = response.get("nextPageToken")
+        if reached_older_uploads or not page_token:
+            break
+    
+    return video_ids[:max_results]
+
+def refresh_saved_channel(saved_channel, window_days=YOUTUBE_REFRESH_WINDOW_DAYS):
+    """
+    Incrementally refresh one saved channel into the local video store.
+    Only uploads newer than the last analysis/refresh are fetched; stored videos inside the
+    window get a statistics update (skipped when the quota budget runs low).
+    """
+    from services import database as db_service
+    
+    now = datetime.now()
+    window_start = now - timedelta(days=window_days)
+    channel_id = saved_channel.channel_id
+    sync_state = db_service.get_channel_sync_state(channel_id)
+    
+    # First refresh backfills the whole window; later ones start at the older of the two watermarks
+    if sync_state:
+        watermarks = [sync_state.synced_at]
+        if saved_channel.last_analyzed_at:
+            watermarks.append(saved_channel.last_analyzed_at.replace(tzinfo=None))
+        since = max(window_start, min(watermarks) - REFRESH_OVERLAP)
+    else:
+        since = window_start
+    
+    new_video_ids = get_channel_upload_ids_since(channel_id, since)
+    
+    stats_video_ids = []
+    stats_skipped = quota_manager.is_budget_low()
+    if not stats_skipped:
+        new_ids = set(new_video_ids)
+        stats_video_ids = [video_id for video_id in db_service.get_stored_channel_video_ids(channel_id, window_start)
+                           if video_id not in new_ids]
+    
+    videos = get_videos_by_ids(new_video_ids + stats_video_ids)
+    db_service.upsert_channel_videos(channel_id, videos)
+    _update_outlier_baselines(channel_id, videos)
+    
+    stored_count = len(db_service.get_stored_channel_video_ids(channel_id, window_start))
+    db_service.save_channel_sync_state(channel_id, now, since, stored_count)
+    db_service.update_saved_youtube_channel(saved_channel.channel_url, last_analyzed_at=now)
+    
+    return {
+        "channel_url": saved_channel.channel_url,
+        "channel_id": channel_id,
+        "fetched_since": since.isoformat(),
+        "new_videos": len(new_video_ids),
+        "stats_refreshed": len(stats_video_ids),
+        "stats_skipped": stats_skipped,
+        "stored_videos": stored_count
+    }
+
+def refresh_saved_channels(window_days=YOUTUBE_REFRESH_WINDOW_DAYS):
+    """
+    Refresh all active saved channels in priority order.
+    Stops early once the quota budget can no longer pay for a channel.
+    """
+    from services import database as db_service
+    
+    results = {"channels": [], "refreshed": 0, "failed": 0, "skipped": 0}
+    minimum_cost = quota_manager.cost_of("youtube.playlistItems.list") + quota_manager.cost_of("youtube.videos.list")
+    saved_channels = db_service.get_saved_youtube_channels(active_only=True)
+    
+    results["metadata_refreshed"] = refresh_stale_channel_metadata([channel.channel_url for channel in saved_channels])
+    
+    for saved_channel in saved_channels:
+        if not quota_manager.can_afford(minimum_cost):
+            results["skipped"] += 1
+            results["channels"].append({"channel_url": saved_channel.channel_url, "skipped": "quota budget exhausted"})
             continue
         
-        channel_analysis["baseline_stats"] = baseline_stats
-        
-        # Analyze each video from the last 14 days
-        for video in analysis_videos:
-            try:
-                video_analysis = _analyze_single_video_outlier(video, baseline_stats, current_time)
-                outlier_type = video_analysis["outlier_analysis"]["outlier_type"]
-                
-                channel_analysis["videos_analyzed"].append(video_analysis)
-                channel_analysis["outlier_summary"][outlier_type] += 1
-                
-            except Exception as e:
-                print(f"Error analyzing video {video.get('video_id', 'unknown')}: {e}")
-                continue
-        
-        analysis_results["channels"].append(channel_analysis)
+        try:
+            results["channels"].append(refresh_saved_channel(saved_channel, window_days))
+            results["refreshed"] += 1
+        except QuotaExceededError as e:
+            results["skipped"] += 1
+            results["channels"].append({"channel_url": saved_channel.channel_url, "skipped": str(e)})
+        except Exception as e:
+            print(f"Error refreshing channel {saved_channel.channel_url}: {e}")
+            results["failed"] += 1
+            results["channels"].append({"channel_url": saved_channel.channel_url, "error": str(e)})
     
-    # Compile final results with summary statistics
-    return _compile_outlier_results(analysis_results) 
\ No newline at end of file
+    return results
@@ -0,0 +1,231 @@
+"""
+Record/replay layer for YouTube Data API responses.
+
+YOUTUBE_API_MODE selects how the googleapiclient 'youtube' services are built:
+  live   - normal API calls (default)
+  record - normal API calls, every response is also written to the cassette
+  replay - responses are served from the cassette, no network or API keys needed
+
+Cassettes are JSON files (YOUTUBE_CASSETTE_PATH) keyed by the API method and its
+parameters. Replayed publishedAt timestamps are shifted by the time elapsed since
+recording so date-window filters behave as they did when the cassette was made,
+and YOUTUBE_REPLAY_LATENCY_MS adds artificial per-call latency for benchmarks.
+"""
+
+import os
+import json
+import time
+import atexit
+import copy
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_MODES = ("live", "record", "replay")
+
+# Parameters derived from the current time - ignored when matching requests so a cassette keeps replaying
+IGNORED_PARAMS = {"publishedAfter", "publishedBefore"}
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when the cassette has no response for a request."""
+    pass
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def _format_timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _shift_timestamps(data, delta):
+    """Copy of a response with every publishedAt moved forward by delta."""
+    if isinstance(data, dict):
+        shifted = {}
+        for key, value in data.items():
+            if key == "publishedAt" and isinstance(value, str):
+                try:
+                    value = _format_timestamp(_parse_timestamp(value) + delta)
+                except ValueError:
+                    pass
+            else:
+                value = _shift_timestamps(value, delta)
+            shifted[key] = value
+        return shifted
+    if isinstance(data, list):
+        return [_shift_timestamps(item, delta) for item in data]
+    return data
+
+class Cassette:
+    """
+    Thread-safe store of recorded API responses.
+    """
+
+    def __init__(self, path: str, latency_ms: float = 0, shift_times: bool = True):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.shift_times = shift_times
+        self.recorded_at = datetime.now(timezone.utc)
+        self.interactions: Dict[str, dict] = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def request_key(chain) -> str:
+        """Stable key for a call chain such as [("search", (), {}), ("list", (), {...})]."""
+        parts = []
+        for name, args, kwargs in chain:
+            params = {key: value for key, value in kwargs.items() if key not in IGNORED_PARAMS}
+            parts.append([name, list(args), params])
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    @staticmethod
+    def method_id(chain) -> str:
+        return "youtube." + ".".join(name for name, _, _ in chain)
+
+    def load(self):
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        self.recorded_at = _parse_timestamp(data["recorded_at"])
+        self.interactions = data.get("interactions", {})
+
+    def save(self):
+        """Write the cassette to disk if anything was recorded."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump({"recorded_at": _format_timestamp(self.recorded_at), "interactions": self.interactions}, f)
+            self._dirty = False
+
+    def record(self, chain, response: dict):
+        with self._lock:
+            self.interactions[self.request_key(chain)] = response
+            self.calls[self.method_id(chain)] += 1
+            self._dirty = True
+
+    def replay(self, chain) -> dict:
+        key = self.request_key(chain)
+        with self._lock:
+            response = self.interactions.get(key)
+            self.calls[self.method_id(chain)] += 1
+
+        if response is None:
+            raise CassetteMissError(f"No recorded response for {self.method_id(chain)}: {key}")
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        if self.shift_times:
+            return _shift_timestamps(response, datetime.now(timezone.utc) - self.recorded_at)
+        return copy.deepcopy(response)
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+
+_config = {
+    "mode": os.getenv("YOUTUBE_API_MODE", "live").lower(),
+    "path": os.getenv("YOUTUBE_CASSETTE_PATH", "cassettes/youtube.json"),
+    "latency_ms": float(os.getenv("YOUTUBE_REPLAY_LATENCY_MS", "0")),
+    "cassette": None
+}
+_config_lock = threading.Lock()
+
+def api_mode() -> str:
+    return _config["mode"]
+
+def configure(mode: str = None, path: str = None, latency_ms: float = None) -> Optional[Cassette]:
+    """Switch mode/cassette at runtime (used by benchmarks). Saves the previous cassette if it was recording."""
+    if mode and mode not in API_MODES:
+        raise ValueError(f"Unknown YouTube API mode: {mode} (expected one of {', '.join(API_MODES)})")
+
+    with _config_lock:
+        if _config["cassette"] is not None:
+            _config["cassette"].save()
+        if mode:
+            _config["mode"] = mode
+        if path:
+            _config["path"] = path
+        if latency_ms is not None:
+            _config["latency_ms"] = latency_ms
+        _config["cassette"] = None
+
+    return active_cassette()
+
+def active_cassette() -> Optional[Cassette]:
+    """The cassette for the current mode (None in live mode)."""
+    if _config["mode"] == "live":
+        return None
+    with _config_lock:
+        if _config["cassette"] is None:
+            _config["cassette"] = Cassette(_config["path"], latency_ms=_config["latency_ms"])
+        return _config["cassette"]
+
+def _save_on_exit():
+    if _config["cassette"] is not None:
+        _config["cassette"].save()
+
+atexit.register(_save_on_exit)
+
+class _CassetteCall:
+    """Records a call chain and resolves it through the cassette on execute()."""
+
+    def __init__(self, service, chain):
+        self._service = service
+        self._chain = chain
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            return _CassetteCall(self._service, self._chain + [(name, args, kwargs)])
+        return call
+
+    def execute(self, *args, **kwargs):
+        cassette = active_cassette()
+
+        if self._service is None:
+            if cassette is None:
+                raise CassetteMissError("YouTube API replay client used while YOUTUBE_API_MODE is live")
+            return cassette.replay(self._chain)
+
+        target = self._service
+        for name, call_args, call_kwargs in self._chain:
+            target = getattr(target, name)(*call_args, **call_kwargs)
+        response = target.execute(*args, **kwargs)
+
+        if cassette is not None:
+            cassette.record(self._chain, response)
+        return response
+
+class CassetteYouTube:
+    """
+    Stand-in for a googleapiclient 'youtube' service: records through `service`,
+    or replays from the cassette when `service` is None.
+    """
+
+    def __init__(self, service=None):
+        self._service = service
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            return _CassetteCall(self._service, [(name, args, kwargs)])
+        return call
+
+def wrap_service(build_service: Callable):
+    """Build a youtube service according to the current API mode."""
+    mode = api_mode()
+    if mode == "replay":
+        return CassetteYouTube()
+    if mode == "record":
+        return CassetteYouTube(build_service())
+    return build_service()
@@ -1,95 +1,231 @@
 from googleapiclient.discovery import build
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from services.youtube_quota import quota_manager, oauth_quota_manager
+from services import youtube_cassette
+from services import database as db_service
 
 load_dotenv()
 
-API_KEY = os.getenv("YOUTUBE_API_KEY")
-youtube = build("youtube", "v3", developerKey=API_KEY)
+# Quota-tracked API-key client (see services/youtube_quota.py)
+youtube = quota_manager.client()
 
 # YouTube OAuth Configuration
 SCOPES = ["https://www.googleapis.com/auth/youtube.readonly"]
 CLIENT_SECRETS_FILE = "credentials/client_secrets.json"
 CLIENT_TOKEN_FILE = "credentials/token.json"
 
+# Authorized credentials are loaded once per process and refreshed shortly before they expire
+OAUTH_REFRESH_MARGIN = timedelta(minutes=5)
+
+_oauth_lock = threading.Lock()
+_oauth_state = {"credentials": None, "generation": 0}
+_oauth_thread_local = threading.local()
+
+# Comment sync: threads/replies per page (API maximum) and how long a sync is reused by reads
+COMMENT_SYNC_PAGE_SIZE = 100
+COMMENT_SYNC_MAX_AGE_MINUTES = int(os.getenv("COMMENT_SYNC_MAX_AGE_MINUTES", "15"))
+
+# Latest videos: comment fetches running at once, and uploads pages scanned for non-short videos
+COMMENT_FETCH_MAX_WORKERS = int(os.getenv("COMMENT_FETCH_MAX_WORKERS", "4"))
+LATEST_VIDEOS_MAX_PAGES = 5
+
+def _needs_refresh(creds):
+    """Check whether credentials are invalid or about to expire."""
+    if not creds.valid:
+        return True
+    if creds.expiry is None:
+        return False
+    return creds.expiry - OAUTH_REFRESH_MARGIN <= datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _get_oauth_credentials():
+    """
+    Get the process-wide OAuth credentials.
+    token.json is read once; refreshes are single-flight - one thread refreshes while the others wait and reuse the result.
+    """
+    creds = _oauth_state["credentials"]
+    if creds is not None and not _needs_refresh(creds):
+        return creds
+    
+    with _oauth_lock:
+        # Another thread may have loaded or refreshed the credentials while we waited
+        creds = _oauth_state["credentials"]
+        if creds is not None and not _needs_refresh(creds):
+            return creds
+        
+        if creds is None and os.path.exists(CLIENT_TOKEN_FILE):
+            creds = Credentials.from_authorized_user_file(CLIENT_TOKEN_FILE, SCOPES)
+        
+        # If there are no (valid) credentials available, let the user log in
+        if not creds or _needs_refresh(creds):
+            if creds and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                # Check if credentials file exists
+                if not os.path.exists(CLIENT_SECRETS_FILE):
+                    raise Exception(
+                        "YouTube OAuth credentials not found. Please add youtube_credentials.json file.\n"
+                        "This should be downloaded from Google Cloud Console > APIs & Services > Credentials"
+                    )
+                
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    CLIENT_SECRETS_FILE, SCOPES)
+                creds = flow.run_local_server(port=0)
+            
+            # Save the credentials for the next run
+            with open(CLIENT_TOKEN_FILE, 'w') as token:
+                token.write(creds.to_json())
+        
+        if creds is not _oauth_state["credentials"]:
+            _oauth_state["credentials"] = creds
+            _oauth_state["generation"] += 1
+        
+        return creds
+
 def get_youtube_oauth_service():
     """Get YouTube service with OAuth authentication for comment operations."""
-    creds = None
+    # Replayed responses need no credentials
+    if youtube_cassette.api_mode() == "replay":
+        return oauth_quota_manager.track(youtube_cassette.CassetteYouTube())
     
-    # Check if token.json exists
-    if os.path.exists(CLIENT_TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(CLIENT_TOKEN_FILE, SCOPES)
+    creds = _get_oauth_credentials()
     
-    # If there are no (valid) credentials available, let the user log in
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # Check if credentials file exists
-            if not os.path.exists(CLIENT_SECRETS_FILE):
-                raise Exception(
-                    "YouTube OAuth credentials not found. Please add youtube_credentials.json file.\n"
-                    "This should be downloaded from Google Cloud Console > APIs & Services > Credentials"
-                )
-            
-            flow = InstalledAppFlow.from_client_secrets_file(
-                CLIENT_SECRETS_FILE, SCOPES)
-            creds = flow.run_local_server(port=0)
-        
-        # Save the credentials for the next run
-        with open('credentials/token.json', 'w') as token:
-            token.write(creds.to_json())
+    # One discovery build per thread (httplib2 isn't thread-safe); all threads share the credentials,
+    # so a refresh is picked up without rebuilding
+    service = getattr(_oauth_thread_local, "service", None)
+    if service is None or _oauth_thread_local.generation != _oauth_state["generation"]:
+        service = youtube_cassette.wrap_service(lambda: build('youtube', 'v3', credentials=creds))
+        _oauth_thread_local.service = service
+        _oauth_thread_local.generation = _oauth_state["generation"]
     
-    return build('youtube', 'v3', credentials=creds)
+    return oauth_quota_manager.track(service)
 
-def get_video_comments(video_id, max_results=100):
-    """Get comments from a YouTube video with replies."""
-    try:
-        service = get_youtube_oauth_service()
+def _comment_row(video_id, comment, parent_id=None):
+    """Flatten a comment resource into the dict shape stored in youtube_comments."""
+    snippet = comment["snippet"]
+    return {
+        "comment_id": comment["id"],
+        "video_id": video_id,
+        "parent_id": parent_id,
+        "author": snippet.get("authorDisplayName"),
+        "text": snippet.get("textDisplay", ""),
+        "like_count": snippet.get("likeCount", 0),
+        "published_at": snippet["publishedAt"],
+        "updated_at": snippet.get("updatedAt")
+    }
+
+def _parse_published_at(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc).replace(tzinfo=None)
+
+def _get_all_replies(service, parent_id):
+    """Page through every reply of a thread (commentThreads only inlines up to 5)."""
+    replies = []
+    page_token = None
+    
+    while True:
+        params = {"part": "snippet", "parentId": parent_id, "maxResults": COMMENT_SYNC_PAGE_SIZE}
+        if page_token:
+            params["pageToken"] = page_token
         
-        request = service.commentThreads().list(
-            part="snippet,replies",
-            videoId=video_id,
-            maxResults=max_results,
-            order="time"
-        )
+        response = service.comments().list(**params).execute()
+        replies.extend(response.get("items", []))
         
-        response = request.execute()
-        comments = []
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return replies
+
+def sync_video_comments(video_id, full=False):
+    """
+    Incrementally sync a video's comment threads and replies into the local store.
+    Threads are paged newest first and paging stops at the newest top-level comment already
+    stored, so a repeat sync usually costs a single API call. Replies added to older threads
+    and updated like counts are only picked up by a full sync.
+    """
+    newest_stored = None if full else db_service.get_latest_comment_published_at(video_id)
+    service = get_youtube_oauth_service()
+    
+    rows = []
+    page_token = None
+    reached_stored = False
+    
+    while not reached_stored:
+        params = {"part": "snippet,replies", "videoId": video_id, "maxResults": COMMENT_SYNC_PAGE_SIZE, "order": "time"}
+        if page_token:
+            params["pageToken"] = page_token
+        
+        response = service.commentThreads().list(**params).execute()
         
         for item in response.get("items", []):
-            comment = item["snippet"]["topLevelComment"]["snippet"]
+            top_level = item["snippet"]["topLevelComment"]
             
-            # Parse replies if they exist
-            replies = []
-            if "replies" in item:
-                for reply_item in item["replies"]["comments"]:
-                    reply_snippet = reply_item["snippet"]
-                    replies.append({
-                        "reply_id": reply_item["id"],
-                        "text": reply_snippet["textDisplay"],
-                        "author": reply_snippet["authorDisplayName"],
-                        "like_count": reply_snippet["likeCount"],
-                        "published_at": reply_snippet["publishedAt"],
-                        "parent_id": reply_snippet["parentId"]
-                    })
+            # Same-second comments are re-fetched rather than risk skipping one; the upsert dedupes them
+            if newest_stored and _parse_published_at(top_level["snippet"]["publishedAt"]) < newest_stored:
+                reached_stored = True
+                break
             
-            comments.append({
-                "comment_id": item["snippet"]["topLevelComment"]["id"],
-                "text": comment["textDisplay"],
-                "author": comment["authorDisplayName"],
-                "like_count": comment["likeCount"],
-                "published_at": comment["publishedAt"],
-                "can_reply": item["snippet"]["canReply"],
-                "replies": replies,
-                "reply_count": len(replies)
-            })
-        
-        return comments
+            total_reply_count = item["snippet"].get("totalReplyCount", 0)
+            row = _comment_row(video_id, top_level)
+            row["can_reply"] = item["snippet"].get("canReply")
+            row["total_reply_count"] = total_reply_count
+            rows.append(row)
+            
+            replies = item.get("replies", {}).get("comments", [])
+            if total_reply_count > len(replies):
+                replies = _get_all_replies(service, top_level["id"])
+            rows.extend(_comment_row(video_id, reply, top_level["id"]) for reply in replies)
+        
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+    
+    stored = db_service.upsert_youtube_comments(rows)
+    if stored is None:
+        # Not recorded as synced, so the next request retries instead of serving an empty store
+        raise RuntimeError(f"Failed to store {len(rows)} comments for video {video_id}")
+    state = db_service.save_comment_sync_state(video_id, datetime.now())
+    
+    return {
+        "video_id": video_id,
+        "full_sync": full or newest_stored is None,
+        "comments_fetched": len(rows),
+        "comments_stored": stored,
+        "total_stored": state.comment_count if state else None
+    }
+
+def ensure_video_comments_synced(video_id, max_age_minutes=None):
+    """
+    Sync a video's comments unless the last sync is recent enough.
+    If the sync fails but comments are already stored, the stored copy is served.
+    """
+    if max_age_minutes is None:
+        max_age_minutes = COMMENT_SYNC_MAX_AGE_MINUTES
+    
+    state = db_service.get_comment_sync_state(video_id)
+    if state and state.synced_at >= datetime.now() - timedelta(minutes=max_age_minutes):
+        return None
+    
+    try:
+        return sync_video_comments(video_id)
+    except Exception as e:
+        if state is None:
+            raise
+        print(f"Error syncing comments for video {video_id}, serving stored comments: {e}")
+        return None
+
+def get_video_comments(video_id, max_results=100, sync=True):
+    """Get comments from a YouTube video with replies, served from the local comment store."""
+    try:
+        if sync:
+            ensure_video_comments_synced(video_id)
+        
+        return db_service.get_stored_video_comments(video_id, limit=max_results)
         
     except Exception as e:
         print(f"Error getting comments: {e}")
@@ -181,80 +317,98 @@ def create_and_pin_comment(video_id, comment_text):
         print(f"Error creating and pinning comment: {e}")
         raise
 
+def _parse_detailed_video(item):
+    """Convert a videos.list item into the detailed video dict used for comment creation."""
+    return {
+        "video_id": item["id"],
+        "title": item["snippet"]["title"],
+        "description": item["snippet"]["description"],
+        "published_at": item["snippet"]["publishedAt"],
+        "thumbnail": item["snippet"]["thumbnails"]["high"]["url"] if "high" in item["snippet"]["thumbnails"] else item["snippet"]["thumbnails"]["default"]["url"],
+        "channel_id": item["snippet"]["channelId"],
+        "channel_title": item["snippet"]["channelTitle"],
+        "duration": item["contentDetails"]["duration"],
+        "view_count": int(item["statistics"].get("viewCount", 0)),
+        "like_count": int(item["statistics"].get("likeCount", 0)),
+        "comment_count": int(item["statistics"].get("commentCount", 0)),
+        "tags": item["snippet"].get("tags", []),
+        "category_id": item["snippet"]["categoryId"],
+        "video_url": f"https://www.youtube.com/watch?v={item['id']}"
+    }
+
+def _get_latest_channel_videos(channel_id, max_results, exclude_shorts):
+    """
+    Page through the channel's uploads playlist (1 quota unit per page, vs 100 for search.list),
+    fetch details per page and drop shorts by parsed duration until max_results videos are kept.
+    """
+    uploads_playlist_id = "UU" + channel_id[2:]
+    page_size = 50 if exclude_shorts else min(50, max_results)
+    videos = []
+    page_token = None
+    
+    for _ in range(LATEST_VIDEOS_MAX_PAGES):
+        playlist_response = youtube.playlistItems().list(
+            part="contentDetails",
+            playlistId=uploads_playlist_id,
+            maxResults=page_size,
+            pageToken=page_token
+        ).execute()
+        
+        video_ids = [item["contentDetails"]["videoId"] for item in playlist_response.get("items", [])]
+        if video_ids:
+            videos_response = youtube.videos().list(
+                part="snippet,statistics,contentDetails",
+                id=",".join(video_ids)
+            ).execute()
+            
+            # Keep playlist (newest first) order; private or deleted videos have no details
+            details = {item["id"]: item for item in videos_response.get("items", [])}
+            for video_id in video_ids:
+                if video_id not in details:
+                    continue
+                video_data = _parse_detailed_video(details[video_id])
+                
+                # Only include videos 60 seconds or longer when excluding shorts
+                if exclude_shorts and parse_youtube_duration(video_data["duration"]) < 60:
+                    continue
+                
+                videos.append(video_data)
+                if len(videos) >= max_results:
+                    return videos
+        
+        page_token = playlist_response.get("nextPageToken")
+        if not page_token:
+            break
+    
+    return videos
+
+def _add_video_comments(video_data, comment_limit):
+    """Attach comments to a video, recording the error instead of raising."""
+    try:
+        comments = get_video_comments(video_data["video_id"], comment_limit)
+        video_data["comments"] = comments
+        video_data["comments_retrieved"] = len(comments)
+    except Exception as e:
+        print(f"Error getting comments for video {video_data['video_id']}: {e}")
+        video_data["comments"] = []
+        video_data["comments_retrieved"] = 0
+        video_data["comments_error"] = str(e)
+    return video_data
+
 def get_latest_videos_detailed(channel_id, max_results=10, exclude_shorts=False, include_comments=False, comment_limit=20):
-    """Get the latest videos from a channel with detailed information needed for comment creation."""
+    """
+    Get the latest videos from a channel with detailed information needed for comment creation.
+    Shorts are filtered out before any comments are fetched; comments for the remaining videos
+    are fetched concurrently (at most COMMENT_FETCH_MAX_WORKERS at a time).
+    """
     try:
-        # If excluding shorts, fetch more videos to account for filtering
-        fetch_count = max_results * 3 if exclude_shorts else max_results
-        
-        # Use OAuth service if comments are requested, otherwise use regular service
-        service = get_youtube_oauth_service() if include_comments else youtube
-        
-        # First, get the video IDs from search
-        search_request = service.search().list(
-            part="snippet",
-            channelId=channel_id,
-            order="date",
-            type="video",
-            maxResults=fetch_count
-        )
-        search_response = search_request.execute()
-        
-        # Extract video IDs
-        video_ids = []
-        for item in search_response.get("items", []):
-            video_ids.append(item["id"]["videoId"])
+        videos = _get_latest_channel_videos(channel_id, max_results, exclude_shorts)
         
-        if not video_ids:
-            return []
-        
-        # Now get detailed information for each video
-        videos_request = service.videos().list(
-            part="snippet,statistics,contentDetails",
-            id=",".join(video_ids)
-        )
-        videos_response = videos_request.execute()
-        
-        videos = []
-        for item in videos_response.get("items", []):
-            video_data = {
-                "video_id": item["id"],
-                "title": item["snippet"]["title"],
-                "description": item["snippet"]["description"],
-                "published_at": item["snippet"]["publishedAt"],
-                "thumbnail": item["snippet"]["thumbnails"]["high"]["url"] if "high" in item["snippet"]["thumbnails"] else item["snippet"]["thumbnails"]["default"]["url"],
-                "channel_id": item["snippet"]["channelId"],
-                "channel_title": item["snippet"]["channelTitle"],
-                "duration": item["contentDetails"]["duration"],
-                "view_count": int(item["statistics"].get("viewCount", 0)),
-                "like_count": int(item["statistics"].get("likeCount", 0)),
-                "comment_count": int(item["statistics"].get("commentCount", 0)),
-                "tags": item["snippet"].get("tags", []),
-                "category_id": item["snippet"]["categoryId"],
-                "video_url": f"https://www.youtube.com/watch?v={item['id']}"
-            }
-            
-            # Add comments if requested
-            if include_comments:
-                try:
-                    comments = get_video_comments(item["id"], comment_limit)
-                    video_data["comments"] = comments
-                    video_data["comments_retrieved"] = len(comments)
-                except Exception as e:
-                    print(f"Error getting comments for video {item['id']}: {e}")
-                    video_data["comments"] = []
-                    video_data["comments_retrieved"] = 0
-                    video_data["comments_error"] = str(e)
-            
-            # Filter out shorts if requested
-            if exclude_shorts:
-                duration_seconds = parse_youtube_duration(video_data["duration"])
-                if duration_seconds >= 60:  # Only include videos 60 seconds or longer
-                    videos.append(video_data)
-                    if len(videos) >= max_results:
-                        break
-            else:
-                videos.append(video_data)
+        # Add comments if requested
+        if include_comments and videos:
+            workers = min(COMMENT_FETCH_MAX_WORKERS, len(videos))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda video_data: _add_video_comments(video_data, comment_limit), videos))
         
         return videos
         
@@ -0,0 +1,285 @@
+"""
+YouTube Data API quota accounting.
+
+Every YouTube Data API call costs a fixed number of quota units per API key per day
+(search.list = 100, most list calls = 1, writes = 50). This module keeps a central
+budget across a pool of API keys, charges each call before it is executed, rotates
+to the key with the most remaining budget and lets callers degrade gracefully
+(skip stats refresh, use cached data) when the budget runs low.
+
+Usage is persisted per key and quota day so the API server and Celery workers share it.
+"""
+
+import os
+import hashlib
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from services import youtube_cassette
+
+load_dotenv()
+
+# Unit cost per API method (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    "youtube.search.list": 100,
+    "youtube.channels.list": 1,
+    "youtube.videos.list": 1,
+    "youtube.playlistItems.list": 1,
+    "youtube.commentThreads.list": 1,
+    "youtube.comments.list": 1,
+    "youtube.commentThreads.insert": 50,
+    "youtube.comments.insert": 50,
+    "youtube.comments.setModerationStatus": 50,
+}
+DEFAULT_QUOTA_COST = 1
+
+DAILY_QUOTA_PER_KEY = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+LOW_BUDGET_RATIO = float(os.getenv("YOUTUBE_LOW_BUDGET_RATIO", "0.2"))
+
+# Quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+class QuotaExceededError(Exception):
+    """Raised when no API key in the pool has enough budget left for a call."""
+    pass
+
+def _load_api_keys() -> List[str]:
+    """Read the API key pool from YOUTUBE_API_KEYS (comma separated), falling back to YOUTUBE_API_KEY."""
+    keys = [key.strip() for key in os.getenv("YOUTUBE_API_KEYS", "").split(",") if key.strip()]
+    if not keys and os.getenv("YOUTUBE_API_KEY"):
+        keys = [os.getenv("YOUTUBE_API_KEY")]
+    if not keys and youtube_cassette.api_mode() == "replay":
+        keys = ["replay"]  # Replayed calls are still budgeted, but need no real key
+    return keys
+
+def _is_quota_error(error: HttpError) -> bool:
+    """Check whether an HttpError is a quota/rate-limit rejection."""
+    try:
+        if error.resp.status != 403:
+            return False
+        return any(reason in str(error.content) for reason in ("quotaExceeded", "dailyLimitExceeded", "rateLimitExceeded"))
+    except Exception:
+        return False
+
+class YouTubeQuotaManager:
+    """
+    Thread-safe quota accountant for a pool of API keys.
+    """
+
+    def __init__(self, api_keys: List[str], daily_quota: int = DAILY_QUOTA_PER_KEY, low_budget_ratio: float = LOW_BUDGET_RATIO, persist: bool = True):
+        self.api_keys = list(api_keys)
+        self.daily_quota = daily_quota
+        self.low_budget_ratio = low_budget_ratio
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._quota_day = None
+        self._usage: Dict[str, int] = {}
+
+    @staticmethod
+    def cost_of(method_id: str) -> int:
+        """Get the unit cost of an API method, e.g. 'youtube.search.list'."""
+        return QUOTA_COSTS.get(method_id, DEFAULT_QUOTA_COST)
+
+    @staticmethod
+    def fingerprint(api_key: str) -> str:
+        """Stable, non-secret identifier for an API key."""
+        if api_key in ("oauth", "replay"):
+            return api_key
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+    def _current_quota_day(self):
+        return datetime.now(QUOTA_TIMEZONE).date()
+
+    def _roll_day(self):
+        """Reset (or load persisted) usage when the quota day changes. Caller holds the lock."""
+        today = self._current_quota_day()
+        if self._quota_day == today:
+            return
+
+        self._quota_day = today
+        self._usage = {key: 0 for key in self.api_keys}
+
+        if self.persist:
+            from services import database as db_service
+            stored = db_service.get_youtube_quota_usage(today)
+            for key in self.api_keys:
+                self._usage[key] = stored.get(self.fingerprint(key), 0)
+
+    def _remaining_for(self, api_key: str) -> int:
+        return max(0, self.daily_quota - self._usage.get(api_key, 0))
+
+    def remaining(self) -> int:
+        """Total units left today across the whole key pool."""
+        with self._lock:
+            self._roll_day()
+            return sum(self._remaining_for(key) for key in self.api_keys)
+
+    def total_budget(self) -> int:
+        return self.daily_quota * len(self.api_keys)
+
+    def is_budget_low(self) -> bool:
+        """True once the remaining budget drops below the low-budget threshold."""
+        return self.remaining() < self.total_budget() * self.low_budget_ratio
+
+    def can_afford(self, units: int) -> bool:
+        """Check whether a single key can still pay for a call of the given cost."""
+        with self._lock:
+            self._roll_day()
+            return any(self._remaining_for(key) >= units for key in self.api_keys)
+
+    def reserve(self, method_id: str, exclude: Optional[List[str]] = None) -> str:
+        """
+        Charge a call against the key with the most remaining budget and return that key.
+        Raises QuotaExceededError if no key can afford it.
+        """
+        units = self.cost_of(method_id)
+
+        with self._lock:
+            self._roll_day()
+            candidates = [key for key in self.api_keys if key not in (exclude or [])]
+            if not candidates:
+                raise QuotaExceededError(f"No YouTube API key available for {method_id}")
+
+            api_key = max(candidates, key=self._remaining_for)
+            if self._remaining_for(api_key) < units:
+                raise QuotaExceededError(
+                    f"YouTube API quota budget exhausted: {method_id} needs {units} units, "
+                    f"{sum(self._remaining_for(key) for key in candidates)} left today"
+                )
+
+            self._usage[api_key] = self._usage.get(api_key, 0) + units
+            quota_day = self._quota_day
+
+        if self.persist:
+            from services import database as db_service
+            total_used = db_service.increment_youtube_quota_usage(self.fingerprint(api_key), quota_day, units)
+            if total_used is not None:
+                with self._lock:
+                    # Pick up usage recorded by other processes
+                    if self._quota_day == quota_day:
+                        self._usage[api_key] = max(self._usage.get(api_key, 0), total_used)
+
+        return api_key
+
+    def mark_exhausted(self, api_key: str):
+        """Mark a key as exhausted for the rest of the day (e.g. after a quotaExceeded error)."""
+        with self._lock:
+            self._roll_day()
+            spent = self._usage.get(api_key, 0)
+            self._usage[api_key] = self.daily_quota
+            quota_day = self._quota_day
+
+        if self.persist and self.daily_quota > spent:
+            from services import database as db_service
+            db_service.increment_youtube_quota_usage(self.fingerprint(api_key), quota_day, self.daily_quota - spent)
+
+    def status(self) -> Dict:
+        """Summary of today's budget per key (keys are reported by fingerprint only)."""
+        with self._lock:
+            self._roll_day()
+            keys = [
+                {
+                    "key": self.fingerprint(key),
+                    "used": self._usage.get(key, 0),
+                    "remaining": self._remaining_for(key)
+                }
+                for key in self.api_keys
+            ]
+        remaining = sum(key["remaining"] for key in keys)
+        return {
+            "quota_day": self._quota_day.isoformat(),
+            "daily_quota_per_key": self.daily_quota,
+            "total_budget": self.total_budget(),
+            "remaining": remaining,
+            "budget_low": remaining < self.total_budget() * self.low_budget_ratio,
+            "keys": keys
+        }
+
+    def client(self) -> "QuotaTrackedYouTube":
+        """YouTube client that charges this budget and rotates across the key pool."""
+        return QuotaTrackedYouTube(self, _thread_local_client_factory())
+
+    def track(self, service) -> "QuotaTrackedYouTube":
+        """Wrap an already-built service (e.g. an OAuth client) so its calls are charged to this budget."""
+        return QuotaTrackedYouTube(self, lambda api_key: service)
+
+def _thread_local_client_factory() -> Callable:
+    """One googleapiclient service per (thread, key) - the underlying httplib2 objects are not thread-safe."""
+    local = threading.local()
+
+    def factory(api_key):
+        clients = getattr(local, "clients", None)
+        if clients is None:
+            clients = local.clients = {}
+        if api_key not in clients:
+            clients[api_key] = youtube_cassette.wrap_service(lambda: build("youtube", "v3", developerKey=api_key))
+        return clients[api_key]
+
+    return factory
+
+class _QuotaTrackedCall:
+    """
+    Records a resource/method call chain such as search().list(**kwargs) and replays it
+    against the client for the chosen key when execute() is called.
+    """
+
+    def __init__(self, tracked: "QuotaTrackedYouTube", chain):
+        self._tracked = tracked
+        self._chain = chain
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            return _QuotaTrackedCall(self._tracked, self._chain + [(name, args, kwargs)])
+        return call
+
+    @property
+    def method_id(self) -> str:
+        return "youtube." + ".".join(name for name, _, _ in self._chain)
+
+    def _build_request(self, api_key):
+        target = self._tracked._client_factory(api_key)
+        for name, args, kwargs in self._chain:
+            target = getattr(target, name)(*args, **kwargs)
+        return target
+
+    def execute(self, *args, **kwargs):
+        manager = self._tracked._manager
+        tried = []
+
+        while True:
+            api_key = manager.reserve(self.method_id, exclude=tried)
+            try:
+                return self._build_request(api_key).execute(*args, **kwargs)
+            except HttpError as e:
+                if not _is_quota_error(e):
+                    raise
+                print(f"YouTube API key {manager.fingerprint(api_key)} hit its quota, rotating")
+                manager.mark_exhausted(api_key)
+                tried.append(api_key)
+
+class QuotaTrackedYouTube:
+    """Drop-in replacement for a googleapiclient 'youtube' service object."""
+
+    def __init__(self, manager: YouTubeQuotaManager, client_factory: Callable):
+        self._manager = manager
+        self._client_factory = client_factory
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            return _QuotaTrackedCall(self, [(name, args, kwargs)])
+        return call
+
+# Replayed calls are counted in memory only, never against the persisted daily usage
+_persist_usage = youtube_cassette.api_mode() != "replay"
+
+# Shared budget for API-key (public data) calls
+quota_manager = YouTubeQuotaManager(_load_api_keys(), persist=_persist_usage)
+
+# Separate budget for calls made with the OAuth client (its own Cloud project quota)
+oauth_quota_manager = YouTubeQuotaManager(["oauth"], persist=_persist_usage)
@@ -1,16 +1,71 @@
 import os
+import re
+import shutil
+import tempfile
+import threading
+import subprocess
 import yt_dlp
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from openai import OpenAI
-from moviepy import VideoFileClip
 from models.youtube import YouTubeTranscriptionCreate
 from services import database as database_service
 from ai_agents.youtube import youtube_agent_runner
 
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
 load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Each job works in its own directory under TRANSCRIPTION_WORKSPACE_ROOT (system temp dir by default);
+# at most TRANSCRIPTION_MAX_WORKERS jobs download, extract and transcribe at the same time
+TRANSCRIPTION_WORKSPACE_ROOT = os.getenv("TRANSCRIPTION_WORKSPACE_ROOT") or None
+TRANSCRIPTION_MAX_WORKERS = int(os.getenv("TRANSCRIPTION_MAX_WORKERS", "2"))
+
+_transcription_pool = ThreadPoolExecutor(max_workers=TRANSCRIPTION_MAX_WORKERS, thread_name_prefix="transcription")
+
+# Exported videos mounted into the containers
+LOCAL_VIDEO_DIR = os.getenv("LOCAL_VIDEO_DIR", "/app/videos")
+
+# Speech-only audio sent to Whisper: mono 16 kHz at a low bitrate (~11 MB per hour as Opus)
+AUDIO_SAMPLE_RATE = 16000
+TRANSCRIPTION_AUDIO_FORMAT = os.getenv("TRANSCRIPTION_AUDIO_FORMAT", "opus")  # opus or mp3
+TRANSCRIPTION_AUDIO_BITRATE = os.getenv("TRANSCRIPTION_AUDIO_BITRATE", "24k")
+AUDIO_FORMATS = {
+    "opus": {"extension": "ogg", "muxer": "ogg", "codec": ["-c:a", "libopus", "-application", "voip"]},
+    "mp3": {"extension": "mp3", "muxer": "mp3", "codec": ["-c:a", "libmp3lame"]},
+}
+
+# Audio longer than TRANSCRIPTION_CHUNK_SECONDS is cut at silences into chunks of at most that
+# length, which are transcribed concurrently (TRANSCRIPTION_CHUNK_WORKERS per job)
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "600"))
+TRANSCRIPTION_CHUNK_WORKERS = int(os.getenv("TRANSCRIPTION_CHUNK_WORKERS", "4"))
+MIN_CHUNK_SECONDS = 60  # Silences earlier than this into a chunk aren't used as cut points
+SILENCE_NOISE_DB = float(os.getenv("TRANSCRIPTION_SILENCE_NOISE_DB", "-35"))
+SILENCE_MIN_SECONDS = 0.4
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+_AUDIO_HASH = re.compile(r"SHA256=([0-9a-f]{64})")
+
+# Backend used when a job doesn't pick one: "openai" (Whisper API) or "local" (faster-whisper on CPU)
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "openai")
+
+# Local backend: CTranslate2 Whisper model, int8-quantized by default; 0 threads lets CTranslate2 decide
+LOCAL_WHISPER_MODEL = os.getenv("LOCAL_WHISPER_MODEL", "small")
+LOCAL_WHISPER_COMPUTE_TYPE = os.getenv("LOCAL_WHISPER_COMPUTE_TYPE", "int8")
+LOCAL_WHISPER_THREADS = int(os.getenv("LOCAL_WHISPER_THREADS", "0"))
+LOCAL_WHISPER_BEAM_SIZE = int(os.getenv("LOCAL_WHISPER_BEAM_SIZE", "5"))
+
+_local_whisper_model = None
+_local_whisper_lock = threading.Lock()
+
 def download_youtube_video(url, output_path="."):
     """Downloads a YouTube video to a specified location.
 
@@ -33,86 +88,416 @@ def download_youtube_video(url, output_path="."):
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
-def transcribe_video(video_id):
-    """Transcribe a YouTube video and return transcription data."""
-    # Download the video using yt-dlp
-    video_url = f"https://www.youtube.com/watch?v={video_id}"
+@contextmanager
+def transcription_workspace(job_name):
+    """
+    Private temporary directory for one transcription job, removed afterwards even if the job fails.
+    Concurrent jobs never share intermediate files.
+    """
+    if TRANSCRIPTION_WORKSPACE_ROOT:
+        os.makedirs(TRANSCRIPTION_WORKSPACE_ROOT, exist_ok=True)
     
+    safe_name = re.sub(r"[^A-Za-z0-9_-]", "_", job_name)[:40]
+    workspace = tempfile.mkdtemp(prefix=f"transcribe-{safe_name}-", dir=TRANSCRIPTION_WORKSPACE_ROOT)
+    try:
+        yield workspace
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def _run_ffmpeg(arguments, loglevel="error"):
+    """Run ffmpeg with the given arguments and return its stderr output."""
+    command = ["ffmpeg", "-hide_banner", "-loglevel", loglevel, "-nostdin", "-y", *arguments]
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = result.stderr.decode(errors="replace")
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.strip()[-500:]}")
+    return stderr
+
+def _speech_audio_arguments(output_path):
+    """ffmpeg output arguments for mono 16 kHz low-bitrate speech audio."""
+    audio_format = AUDIO_FORMATS[TRANSCRIPTION_AUDIO_FORMAT]
+    return [
+        "-vn", "-sn", "-dn",
+        "-ac", "1",
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        *audio_format["codec"],
+        "-b:a", TRANSCRIPTION_AUDIO_BITRATE,
+        "-f", audio_format["muxer"],
+        output_path
+    ]
+
+def extract_audio(source, output_dir, http_headers=None):
+    """
+    Extract speech audio from a local file or a media URL with ffmpeg.
+    Only the audio stream is decoded (no video frames) and it is written straight to a mono
+    16 kHz low-bitrate file, so nothing is buffered in Python. Returns the output path.
+    """
+    output_path = os.path.join(output_dir, f"audio.{AUDIO_FORMATS[TRANSCRIPTION_AUDIO_FORMAT]['extension']}")
+    
+    arguments = []
+    if http_headers:
+        arguments += ["-headers", "".join(f"{key}: {value}\r\n" for key, value in http_headers.items())]
+    arguments += ["-i", source, *_speech_audio_arguments(output_path)]
+    
+    _run_ffmpeg(arguments)
+    return output_path
+
+def download_youtube_audio(video_url, output_dir):
+    """Download the best audio-only stream of a YouTube video into output_dir. Returns the file path."""
     ydl_opts = {
         'format': 'bestaudio/best',
-        'outtmpl': 'temp_audio.%(ext)s',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
+        'noplaylist': True,
+        'quiet': True,
+        'outtmpl': os.path.join(output_dir, 'source.%(ext)s'),
     }
     
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([video_url])
+        info = ydl.extract_info(video_url, download=True)
+        return ydl.prepare_filename(info)
 
-    # Use OpenAI to process the transcription
-    with open("temp_audio.mp3", "rb") as audio_file:
+def extract_youtube_audio(video_url, output_dir):
+    """
+    Extract speech audio for a YouTube video.
+    ffmpeg reads the best audio-only stream directly from the URL yt-dlp resolves, so the
+    original audio never lands on disk; if streaming fails the audio is downloaded into
+    output_dir first.
+    """
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'noplaylist': True,
+        'quiet': True,
+    }
+    
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+        
+        try:
+            return extract_audio(info["url"], output_dir, http_headers=info.get("http_headers"))
+        except Exception as e:
+            print(f"Streaming audio extraction failed for {video_url}, downloading instead: {e}")
+    
+    source_path = download_youtube_audio(video_url, output_dir)
+    try:
+        return extract_audio(source_path, output_dir)
+    finally:
+        os.remove(source_path)
+
+def get_audio_duration(audio_path):
+    """Duration of an audio file in seconds (ffprobe)."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", audio_path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.decode(errors='replace').strip()[-500:]}")
+    return float(result.stdout.decode().strip())
+
+def detect_silences(audio_path):
+    """
+    Find silent stretches with ffmpeg's energy-based silencedetect filter.
+    Returns (start, end) pairs in seconds.
+    """
+    stderr = _run_ffmpeg([
+        "-i", audio_path,
+        "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+        "-f", "null", "-"
+    ], loglevel="info")
+    
+    silences = []
+    start = None
+    for line in stderr.splitlines():
+        start_match = _SILENCE_START.search(line)
+        if start_match:
+            start = max(0.0, float(start_match.group(1)))
+            continue
+        end_match = _SILENCE_END.search(line)
+        if end_match and start is not None:
+            silences.append((start, float(end_match.group(1))))
+            start = None
+    
+    return silences
+
+def plan_chunks(duration, silences, max_seconds=None, min_seconds=MIN_CHUNK_SECONDS):
+    """
+    Split [0, duration] into chunks of at most max_seconds, cutting in the middle of the
+    latest silence that keeps the chunk within bounds (hard cut when there is none).
+    Returns (start, end) pairs.
+    """
+    max_seconds = max_seconds or TRANSCRIPTION_CHUNK_SECONDS
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+    
+    chunks = []
+    chunk_start = 0.0
+    while duration - chunk_start > max_seconds:
+        limit = chunk_start + max_seconds
+        candidates = [point for point in cut_points if chunk_start + min_seconds <= point <= limit]
+        chunk_end = candidates[-1] if candidates else limit
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    
+    chunks.append((chunk_start, duration))
+    return chunks
+
+def _transcribe_openai(audio_path):
+    """Transcribe one audio file with the OpenAI Whisper API. Returns (text, segments)."""
+    with open(audio_path, "rb") as audio_file:
         transcription = client.audio.transcriptions.create(
             model="whisper-1",
             file=audio_file,
             response_format="verbose_json",
             timestamp_granularities=["segment"]
         )
-        
+    
     segment_data = [
         {"start": s.start, "end": s.end, "text": s.text}
         for s in transcription.segments
     ]
     
-    # Clean up temporary files
-    os.remove("temp_audio.mp3")
+    return transcription.text, segment_data
+
+def _get_local_whisper_model():
+    """Load the local Whisper model once per process (loading takes seconds and hundreds of MB)."""
+    global _local_whisper_model
+    
+    with _local_whisper_lock:
+        if _local_whisper_model is None:
+            _local_whisper_model = WhisperModel(
+                LOCAL_WHISPER_MODEL,
+                device="cpu",
+                compute_type=LOCAL_WHISPER_COMPUTE_TYPE,
+                cpu_threads=LOCAL_WHISPER_THREADS
+            )
+    return _local_whisper_model
+
+def _transcribe_local(audio_path):
+    """Transcribe one audio file with faster-whisper on the CPU. Returns (text, segments)."""
+    segments, _ = _get_local_whisper_model().transcribe(audio_path, beam_size=LOCAL_WHISPER_BEAM_SIZE, vad_filter=True)
+    
+    # segments is a generator; decoding happens while it is consumed
+    segment_data = [
+        {"start": s.start, "end": s.end, "text": s.text}
+        for s in segments
+    ]
+    text = "".join(segment["text"] for segment in segment_data).strip()
+    
+    return text, segment_data
+
+# Backend name -> transcribe(audio_path) returning (text, segments). Remote backends are
+# chunked (size limit, parallel requests); the local one decodes long audio in one pass and
+# would only compete with itself for cores if chunked.
+TRANSCRIPTION_BACKENDS = {
+    "openai": {"transcribe": _transcribe_openai, "chunked": True},
+    "local": {"transcribe": _transcribe_local, "chunked": False},
+}
+
+def resolve_transcription_backend(backend=None):
+    """Validate a backend name (default TRANSCRIPTION_BACKEND) and return it."""
+    backend = backend or TRANSCRIPTION_BACKEND
+    if backend not in TRANSCRIPTION_BACKENDS:
+        raise ValueError(f"Unknown transcription backend '{backend}', expected one of: {', '.join(TRANSCRIPTION_BACKENDS)}")
+    if backend == "local" and not FASTER_WHISPER_AVAILABLE:
+        raise RuntimeError("The local transcription backend requires faster-whisper (pip install faster-whisper)")
+    return backend
+
+def _cut_chunk(audio_path, chunk_index, start, end):
+    """Cut one chunk out of the audio next to it. Returns the chunk path."""
+    chunk_path = os.path.join(
+        os.path.dirname(audio_path),
+        f"chunk_{chunk_index:04d}.{AUDIO_FORMATS[TRANSCRIPTION_AUDIO_FORMAT]['extension']}"
+    )
+    _run_ffmpeg(["-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", audio_path, *_speech_audio_arguments(chunk_path)])
+    return chunk_path
+
+def prepare_transcription_chunks(audio_path, backend=None):
+    """
+    Split audio into the pieces the backend transcribes. Returns [(start, path)], where start
+    is the chunk's offset into the whole file. For chunked backends long audio is cut at
+    silences into separate files; otherwise the whole file is a single chunk.
+    This is the ffmpeg (CPU) half of transcription; transcribe_chunks is the other half.
+    """
+    if not TRANSCRIPTION_BACKENDS[resolve_transcription_backend(backend)]["chunked"]:
+        return [(0.0, audio_path)]
+    
+    duration = get_audio_duration(audio_path)
+    if duration <= TRANSCRIPTION_CHUNK_SECONDS:
+        return [(0.0, audio_path)]
+    
+    chunks = plan_chunks(duration, detect_silences(audio_path))
+    
+    workers = max(1, min(TRANSCRIPTION_CHUNK_WORKERS, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        paths = list(executor.map(
+            lambda indexed: _cut_chunk(audio_path, indexed[0], *indexed[1]),
+            enumerate(chunks)
+        ))
+    
+    return [(start, path) for (start, _), path in zip(chunks, paths)]
+
+def remove_transcription_chunks(chunks, audio_path):
+    """Delete the chunk files cut by prepare_transcription_chunks (never the audio itself)."""
+    for _, path in chunks:
+        if path != audio_path and os.path.exists(path):
+            os.remove(path)
+
+def transcribe_chunks(chunks, backend=None):
+    """
+    Transcribe prepared chunks concurrently with the given backend and stitch them back
+    together in order, with segment times relative to the whole file. Returns (text, segments).
+    """
+    transcribe = TRANSCRIPTION_BACKENDS[resolve_transcription_backend(backend)]["transcribe"]
+    
+    if len(chunks) == 1 and chunks[0][0] == 0:
+        return transcribe(chunks[0][1])
+    
+    def transcribe_chunk(chunk):
+        start, path = chunk
+        text, segments = transcribe(path)
+        return text, [
+            {"start": segment["start"] + start, "end": segment["end"] + start, "text": segment["text"]}
+            for segment in segments
+        ]
+    
+    workers = max(1, min(TRANSCRIPTION_CHUNK_WORKERS, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(transcribe_chunk, chunks))
+    
+    text = " ".join(chunk_text.strip() for chunk_text, _ in results if chunk_text.strip())
+    segment_data = [segment for _, chunk_segments in results for segment in chunk_segments]
+    
+    return text, segment_data
+
+def _transcribe_audio_file(audio_path, backend=None):
+    """Transcribe an audio file with the given backend, chunking it if needed. Returns (text, segments)."""
+    chunks = prepare_transcription_chunks(audio_path, backend)
+    try:
+        return transcribe_chunks(chunks, backend)
+    finally:
+        remove_transcription_chunks(chunks, audio_path)
+
+def hash_audio(audio_path):
+    """
+    SHA-256 of the normalized audio stream (decoded to mono 16 kHz PCM by ffmpeg), so the
+    same audio hashes the same no matter which file or container it was extracted from.
+    """
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-i", audio_path,
+         "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), "-f", "hash", "-hash", "sha256", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    match = _AUDIO_HASH.search(result.stdout.decode(errors="replace"))
+    if result.returncode != 0 or not match:
+        raise RuntimeError(f"ffmpeg audio hash failed: {result.stderr.decode(errors='replace').strip()[-500:]}")
+    return match.group(1)
+
+def local_video_alias(file_path):
+    # A replaced file under the same name must not hit the old transcription
+    stat = os.stat(file_path)
+    return f"local:{os.path.basename(file_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+def transcribe_audio_cached(audio_path, alias, backend=None):
+    """
+    Transcribe extracted audio unless the same audio was transcribed before (by any backend).
+    Results are cached by the audio hash and the alias is pointed at them. Returns (text, segments).
+    """
+    audio_hash = hash_audio(audio_path)
+    
+    cached = database_service.get_cached_transcription(audio_hash)
+    if cached:
+        print(f"Transcription cache hit for {alias} (audio {audio_hash[:12]})")
+        database_service.save_cached_transcription(audio_hash, cached["transcription"], cached["segments"], aliases=[alias])
+        return cached["transcription"], cached["segments"]
+    
+    text, segment_data = _transcribe_audio_file(audio_path, backend)
+    database_service.save_cached_transcription(audio_hash, text, segment_data, aliases=[alias])
+    
+    return text, segment_data
+
+def transcribe_video(video_id, backend=None):
+    """Transcribe a YouTube video and return transcription data."""
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    backend = resolve_transcription_backend(backend)
+    
+    cached = database_service.get_cached_transcription_by_alias(video_id)
+    if cached:
+        return YouTubeTranscriptionCreate(
+            video_id=video_id,
+            channel_id='',
+            transcription=cached["transcription"],
+            segments=cached["segments"],
+            used=False
+        )
+    
+    with transcription_workspace(video_id) as workspace:
+        audio_path = extract_youtube_audio(video_url, workspace)
+        
+        # Use OpenAI to process the transcription (or reuse a cached one for the same audio)
+        text, segment_data = transcribe_audio_cached(audio_path, video_id, backend)
 
     return YouTubeTranscriptionCreate(
         video_id=video_id,
         channel_id='',
-        transcription=transcription.text,
+        transcription=text,
         segments=segment_data,
         used=False
     )
 
-def transcribe_local_video(video_filename):
+def transcribe_local_video(video_filename, backend=None):
     """Transcribe a local video file and return transcription data."""
-    file_path = f"/app/videos/{video_filename}"
-    # Load your MP4 file
-    video = VideoFileClip(file_path)
-
-    # Extract and write the audio to MP3
-    video.audio.write_audiofile("temp_audio.mp3")
+    file_path = os.path.join(LOCAL_VIDEO_DIR, video_filename)
+    backend = resolve_transcription_backend(backend)
+    alias = local_video_alias(file_path)
     
-    # Use OpenAI to process the transcription
-    with open("temp_audio.mp3", "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            response_format="verbose_json",
-            timestamp_granularities=["segment"]
+    cached = database_service.get_cached_transcription_by_alias(alias)
+    if cached:
+        return YouTubeTranscriptionCreate(
+            video_id=video_filename,
+            channel_id='',
+            transcription=cached["transcription"],
+            segments=cached["segments"],
+            used=False
         )
     
-    segment_data = [
-        {"start": s.start, "end": s.end, "text": s.text}
-        for s in transcription.segments
-    ]
-    
-    # Clean up temporary files
-    os.remove("temp_audio.mp3")
+    with transcription_workspace(video_filename) as workspace:
+        audio_path = extract_audio(file_path, workspace)
+        
+        # Use OpenAI to process the transcription (or reuse a cached one for the same audio)
+        text, segment_data = transcribe_audio_cached(audio_path, alias, backend)
 
     return YouTubeTranscriptionCreate(
         video_id=video_filename,
         channel_id='',
-        transcription=transcription.text,
+        transcription=text,
         segments=segment_data,
         used=False
     )
 
-def process_video(video, channel_id):
+def submit_transcription(function, *args, **kwargs):
+    """Run a transcription job on the shared pool (at most TRANSCRIPTION_MAX_WORKERS at once). Returns a Future."""
+    return _transcription_pool.submit(function, *args, **kwargs)
+
+def _run_transcriptions(function, items, backend=None):
+    """Transcribe several items on the pool; failures are reported per item instead of raising."""
+    futures = [(item, submit_transcription(function, item, backend)) for item in items]
+    results = []
+    for item, future in futures:
+        try:
+            results.append({"item": item, "transcription": future.result()})
+        except Exception as e:
+            print(f"Error transcribing {item}: {e}")
+            results.append({"item": item, "error": str(e)})
+    return results
+
+def transcribe_videos(video_ids, backend=None):
+    """Transcribe several YouTube videos in parallel."""
+    return _run_transcriptions(transcribe_video, video_ids, backend)
+
+def transcribe_local_videos(video_filenames, backend=None):
+    """Transcribe several local video files in parallel."""
+    return _run_transcriptions(transcribe_local_video, video_filenames, backend)
+
+def process_video(video, channel_id, backend=None):
     """Process a video for transcription with channel ID."""
-    transcribed_video = transcribe_video(video['video_id'])
+    transcribed_video = transcribe_video(video['video_id'], backend)
     transcribed_video.channel_id = channel_id
     
     return transcribed_video